@@ -0,0 +1,195 @@
+"""
+统计分析模块 - 由结果表按数组分组一次性计算物种相对丰富度、各相机探测率和日活动节律，并写入表格
+"""
+
+import os
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from system.config import INDEPENDENT_DETECTION_THRESHOLD
+from system.data_processor import DataProcessor
+from system.table_writer import write_table
+from system.taxonomy import Taxonomy
+
+logger = logging.getLogger(__name__)
+
+# 每个统计表：(名称, 表头, 行)
+ReportTable = Tuple[str, List[str], List[List[Any]]]
+
+_US_PER_DAY = 86400 * 10 ** 6
+# 不参与统计的物种名称
+EXCLUDED_SPECIES = frozenset({'空', ''})
+# 相对丰富度指数按每多少相机工作日计算
+RAI_CAMERA_DAYS = 100
+
+
+class Analytics:
+    """一组图片的统计结果
+
+    图片展开为 (图片, 物种) 行后，按 相机+物种 分组、组内按拍摄时间排列，与组内上一行的时间差超过阈值
+    即为该物种的一次独立探测（与 DataProcessor.process_independent_detection 的规则相同，但按物种分别计数）。
+    相机工作日为每台相机第一张和最后一张图片之间的天数（含首尾两天）。所有统计都由 bincount 一次得到，
+    人工校验后重新计算的开销与导出表格相比可以忽略。
+    """
+
+    def __init__(self, image_info_list: List[Dict[str, Any]], confidence_settings: Dict[str, float],
+                 threshold_seconds: Optional[float] = None, camera_by: Union[str, Sequence[str], None] = None,
+                 default_camera: str = "", hour_bins: int = 24):
+        """计算统计结果
+
+        Args:
+            image_info_list: 图像信息列表
+            confidence_settings: 物种置信度阈值设置
+            threshold_seconds: 独立探测的时间间隔（秒），为 None 时使用 INDEPENDENT_DETECTION_THRESHOLD
+            camera_by: 区分相机（或站点）的字段名，为 None 时所有图片属于同一台相机
+            default_camera: 不区分相机或图片没有相机信息时的相机名称
+            hour_bins: 日活动节律每天分为多少个时段
+        """
+        self.threshold = INDEPENDENT_DETECTION_THRESHOLD if threshold_seconds is None else threshold_seconds
+        self.hour_bins = max(int(hour_bins), 1)
+        camera_fields = [camera_by] if isinstance(camera_by, str) else list(camera_by or [])
+
+        dated = [img for img in image_info_list if img.get('拍摄日期对象')]
+        times = np.array([img['拍摄日期对象'] for img in dated], dtype='datetime64[us]').astype(np.int64)
+        cameras: Dict[str, int] = {}
+        if camera_fields:
+            names = [" ".join(str(img[field]) for field in camera_fields if img.get(field)) or default_camera
+                     for img in dated]
+            image_camera = np.array([cameras.setdefault(name, len(cameras)) for name in names], dtype=np.int64)
+        else:
+            if dated:
+                cameras[default_camera] = 0
+            image_camera = np.zeros(len(dated), dtype=np.int64)
+        self.cameras = list(cameras)
+        n_cameras = len(self.cameras)
+
+        # 每台相机的图片数和工作日
+        days = times // _US_PER_DAY if len(times) else np.empty(0, dtype=np.int64)
+        first_day = np.full(n_cameras, np.iinfo(np.int64).max)
+        last_day = np.full(n_cameras, np.iinfo(np.int64).min)
+        np.minimum.at(first_day, image_camera, days)
+        np.maximum.at(last_day, image_camera, days)
+        self.first_day = first_day
+        self.last_day = last_day
+        self.camera_days = (last_day - first_day + 1) if n_cameras else np.empty(0, dtype=np.int64)
+        self.camera_images = np.bincount(image_camera, minlength=n_cameras)
+
+        row_image, row_species, species_names = DataProcessor.species_rows(dated, confidence_settings)
+        # 忽略"空"等非物种行
+        included = [i for i, name in enumerate(species_names) if name not in EXCLUDED_SPECIES]
+        self.species = [species_names[i] for i in included]
+        n_species = len(self.species)
+        remap = np.full(len(species_names), -1, dtype=np.int64)
+        remap[included] = np.arange(n_species)
+        row_species = remap[row_species]
+        keep = row_species >= 0
+        row_image, row_species = row_image[keep], row_species[keep]
+
+        # 组内按拍摄时间排列，判断每一行是否为独立探测
+        row_camera = image_camera[row_image]
+        row_group = row_camera * max(n_species, 1) + row_species
+        order = np.lexsort((np.arange(len(row_image)), times[row_image], row_group))
+        row_image, row_group = row_image[order], row_group[order]
+        row_time = times[row_image]
+        independent = np.ones(len(row_image), dtype=bool)
+        independent[1:] = ((row_group[1:] != row_group[:-1])
+                           | ((row_time[1:] - row_time[:-1]) / 1e6 > self.threshold))
+
+        shape = (n_cameras, max(n_species, 1))
+        # 相机×物种的有效照片数和独立探测数
+        self.photos = np.bincount(row_group, minlength=shape[0] * shape[1]).reshape(shape)[:, :n_species]
+        event_group = row_group[independent]
+        self.events = np.bincount(event_group, minlength=shape[0] * shape[1]).reshape(shape)[:, :n_species]
+        # 物种×时段的独立探测数（按当地拍摄时间）
+        event_species = event_group % max(n_species, 1)
+        event_bin = (row_time[independent] % _US_PER_DAY) * self.hour_bins // _US_PER_DAY
+        self.activity = np.bincount(event_species * self.hour_bins + event_bin,
+                                    minlength=n_species * self.hour_bins).reshape(n_species, self.hour_bins)
+
+    @property
+    def total_camera_days(self) -> int:
+        return int(self.camera_days.sum())
+
+    @staticmethod
+    def _rate(events: np.ndarray, camera_days: np.ndarray) -> np.ndarray:
+        """每 RAI_CAMERA_DAYS 个相机工作日的独立探测数"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(camera_days > 0, events * RAI_CAMERA_DAYS / camera_days, 0.0)
+
+    def _date(self, day: int) -> str:
+        return str(np.datetime64(int(day), 'D'))
+
+    def species_table(self) -> ReportTable:
+        """各物种的独立探测数和相对丰富度指数（RAI），按独立探测数降序"""
+        taxonomy = Taxonomy.load()
+        events = self.events.sum(axis=0)
+        photos = self.photos.sum(axis=0)
+        stations = (self.events > 0).sum(axis=0)
+        rai = self._rate(events, np.full(len(events), self.total_camera_days))
+        columns = ['物种名称', '物种类型', '有效照片数', '独立探测数', '出现相机数', '相机工作日',
+                   f'相对丰富度指数(每{RAI_CAMERA_DAYS}相机日)']
+        rows = [[self.species[i], taxonomy.species_type(self.species[i]), int(photos[i]), int(events[i]),
+                 int(stations[i]), self.total_camera_days, round(float(rai[i]), 4)]
+                for i in np.lexsort((np.arange(len(events)), -events)).tolist()]
+        return "相对丰富度", columns, rows
+
+    def camera_table(self) -> ReportTable:
+        """各相机的工作日和各物种的探测率，每台相机另有一行全部物种的合计"""
+        columns = ['相机', '开始日期', '结束日期', '相机工作日', '图片数', '物种名称', '有效照片数', '独立探测数',
+                   f'探测率(每{RAI_CAMERA_DAYS}相机日)']
+        rates = self._rate(self.events, self.camera_days[:, None])
+        totals = self._rate(self.events.sum(axis=1), self.camera_days)
+        rows = []
+        for c, camera in enumerate(self.cameras):
+            head = [camera, self._date(self.first_day[c]), self._date(self.last_day[c]), int(self.camera_days[c]),
+                    int(self.camera_images[c])]
+            rows.append(head + ['全部', int(self.photos[c].sum()), int(self.events[c].sum()),
+                                round(float(totals[c]), 4)])
+            for s in np.flatnonzero(self.photos[c]).tolist():
+                rows.append(head + [self.species[s], int(self.photos[c, s]), int(self.events[c, s]),
+                                    round(float(rates[c, s]), 4)])
+        return "相机探测率", columns, rows
+
+    def activity_table(self) -> ReportTable:
+        """各物种独立探测在一天中各时段的次数"""
+        minutes = 24 * 60 // self.hour_bins
+        labels = [f"{m // 60:02d}:{m % 60:02d}" for m in range(0, 24 * 60, minutes)][:self.hour_bins]
+        columns = ['物种名称', '独立探测数'] + labels
+        rows = [[self.species[i], int(self.activity[i].sum())] + self.activity[i].tolist()
+                for i in range(len(self.species))]
+        return "日活动节律", columns, rows
+
+    def tables(self) -> List[ReportTable]:
+        return [self.species_table(), self.camera_table(), self.activity_table()]
+
+    def write(self, output_path: str, file_format: str = 'excel') -> List[str]:
+        """写入统计表
+
+        Excel 格式时每个统计表为一个工作表；CSV 格式时每个统计表为一个文件，文件名为 "文件名_统计表名称.csv"。
+
+        Args:
+            output_path: 输出文件路径
+            file_format: 文件格式 ('excel' 或 'csv')
+
+        Returns:
+            写入的文件路径
+        """
+        tables = self.tables()
+        if file_format.lower() == 'excel':
+            from openpyxl import Workbook
+            workbook = Workbook(write_only=True)
+            for name, columns, rows in tables:
+                sheet = workbook.create_sheet(title=name)
+                sheet.append(columns)
+                for row in rows:
+                    sheet.append(row)
+            workbook.save(output_path)
+            return [output_path]
+
+        base, ext = os.path.splitext(output_path)
+        paths = []
+        for name, columns, rows in tables:
+            paths.extend(write_table(rows, f"{base}_{name}{ext or '.csv'}", columns, file_format='csv'))
+        return paths
@@ -0,0 +1,155 @@
+"""
+标注渲染模块 - 在图像上绘制检测框，供预览和结果导出共用
+"""
+
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from system.utils import resource_path
+
+logger = logging.getLogger(__name__)
+
+# 物种检测框的调色板
+COLOR_PALETTE = [
+    '#FF3838', '#FF9D97', '#FF701F', '#FFB21D', '#CFD231', '#48F90A', '#92CC17', '#3CD4F5',
+    '#0052FF', '#6541D1', '#A777F5', '#701F57', '#FDE8DC', '#FFEADD', '#FFDBAD', '#FCDB6D',
+    '#E4D884', '#B6EE93', '#ECF2C2', '#C4E4E8', '#ABCDFF', '#C8B0F4'
+]
+
+FONT_PATH = "res/AlibabaPuHuiTi-3-65-Medium.ttf"
+BOX_LINE_WIDTH = 7
+
+# 字体对象不能在线程间共享，按线程缓存
+_font_cache = threading.local()
+
+
+def species_color(species_name: str) -> str:
+    """为物种分配一个固定的颜色（同一进程内同一物种总是相同颜色）"""
+    return COLOR_PALETTE[hash(species_name) % len(COLOR_PALETTE)]
+
+
+def _text_color(color: str) -> str:
+    """根据背景色亮度选择文字颜色"""
+    hex_color = color.lstrip('#')
+    r, g, b = tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+    brightness = ((r * 299) + (g * 587) + (b * 114)) / 1000
+    return "#FFFFFF" if brightness < 128 else "#000000"
+
+
+def _get_font(font_size: int):
+    """加载指定字号的中文字体，按字号缓存"""
+    fonts = getattr(_font_cache, 'fonts', None)
+    if fonts is None:
+        fonts = _font_cache.fonts = {}
+    font = fonts.get(font_size)
+    if font is None:
+        try:
+            font = ImageFont.truetype(resource_path(FONT_PATH), font_size)
+        except IOError:
+            logger.warning(f"中文字体文件 {FONT_PATH} 未找到。")
+            font = ImageFont.load_default()
+        fonts[font_size] = font
+    return font
+
+
+def load_display_image(file_path: str, max_width: int, max_height: int) -> Tuple[Image.Image, Tuple[int, int]]:
+    """以显示尺寸解码图像
+
+    JPEG 图像通过 draft 模式在解码阶段直接缩小，避免解码全分辨率像素。
+
+    Args:
+        file_path: 图像路径
+        max_width: 最大显示宽度
+        max_height: 最大显示高度
+
+    Returns:
+        (不超过显示尺寸的RGB图像, 原始图像尺寸)
+    """
+    with Image.open(file_path) as img:
+        original_size = img.size
+        img.draft('RGB', (max_width, max_height))
+        img = img.convert('RGB')
+    return fit_image(img, max_width, max_height), original_size
+
+
+def fit_image(img: Image.Image, max_width: int, max_height: int) -> Image.Image:
+    """按比例缩小图像以适应指定尺寸（不放大）"""
+    if not all([max_width > 0, max_height > 0]):
+        max_width, max_height = 400, 300
+    w, h = img.size
+    if w == 0 or h == 0:
+        return img
+    scale = min(max_width / w, max_height / h)
+    if scale >= 1:
+        return img
+    return img.resize((max(1, int(w * scale)), max(1, int(h * scale))), Image.LANCZOS)
+
+
+def draw_boxes(img: Image.Image, boxes: List[Dict[str, Any]], scale: float = 1.0,
+               conf_threshold: Optional[float] = None, color_for=species_color) -> Image.Image:
+    """在图像上绘制检测框（原地修改）
+
+    Args:
+        img: 要绘制的图像
+        boxes: 检测框列表，每项包含 物种、置信度、边界框(原图坐标 xyxy)
+        scale: 图像相对原图的缩放比例，边界框坐标、线宽按此比例换算
+        conf_threshold: 置信度阈值，低于阈值的检测框不绘制
+        color_for: 根据物种名称返回颜色的函数
+
+    Returns:
+        绘制后的图像
+    """
+    if not boxes:
+        return img
+
+    # 字号和线宽与原图上绘制后再缩放的效果保持一致
+    font_size = max(8, int(0.03 * img.height))
+    font = _get_font(font_size)
+    line_width = max(1, round(BOX_LINE_WIDTH * scale))
+    draw = ImageDraw.Draw(img)
+
+    for box in boxes:
+        confidence = box.get("置信度", 0)
+        if conf_threshold is not None and confidence < conf_threshold:
+            continue
+        bbox = box.get("边界框")
+        if not bbox:
+            continue
+        species_name = box.get("物种")
+        label = f"{species_name} {confidence:.2f}"
+        color = color_for(species_name)
+
+        p1 = (int(bbox[0] * scale), int(bbox[1] * scale))
+        p2 = (int(bbox[2] * scale), int(bbox[3] * scale))
+        draw.rectangle([p1, p2], outline=color, width=line_width)
+
+        try:
+            text_bbox = draw.textbbox((p1[0], p1[1] - font_size - 3), label, font=font)
+            draw.rectangle(text_bbox, fill=color)
+            draw.text((p1[0], p1[1] - font_size - 3), label, fill=_text_color(color), font=font)
+        except AttributeError:
+            draw.text((p1[0], p1[1] - 15), label, fill=color, font=font)
+
+    return img
+
+
+def render_annotated(file_path: str, boxes: List[Dict[str, Any]], max_width: int, max_height: int,
+                     conf_threshold: Optional[float] = None) -> Tuple[Image.Image, Tuple[int, int]]:
+    """以显示尺寸解码图像并绘制检测框
+
+    Args:
+        file_path: 图像路径
+        boxes: 检测框列表（原图坐标）
+        max_width: 最大显示宽度
+        max_height: 最大显示高度
+        conf_threshold: 置信度阈值
+
+    Returns:
+        (绘制好检测框的显示尺寸图像, 原始图像尺寸)
+    """
+    img, original_size = load_display_image(file_path, max_width, max_height)
+    scale = img.width / original_size[0] if original_size[0] else 1.0
+    return draw_boxes(img, boxes, scale, conf_threshold), original_size
@@ -0,0 +1,204 @@
+"""
+Arrow表格模块 - 将图像信息和检测数组转换为带类型的 Arrow 表（时间戳、浮点置信度、分类物种列），并读写 Parquet 文件
+"""
+
+import os
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from system.data_processor import DataProcessor, EXPORT_COLUMNS
+from system.detection_arrays import DetectionArrays, threshold_vector, filter_pairs
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# 检测表文件名的后缀：物种检测信息.parquet -> 物种检测信息_检测.parquet
+DETECTION_SUFFIX = "_检测"
+PARQUET_COMPRESSION = "zstd"
+
+
+def arrow_available() -> bool:
+    """是否安装了 pyarrow"""
+    return pa is not None
+
+
+def _require_arrow() -> None:
+    if pa is None:
+        raise ImportError("导出 Parquet 需要安装 pyarrow (pip install pyarrow)")
+
+
+def _capture_times(image_info_list: List[Dict[str, Any]]) -> np.ndarray:
+    """每张图片的拍摄时间（datetime64[us]），没有拍摄时间的图片为 NaT"""
+    return np.array([info.get('拍摄日期对象') or np.datetime64('NaT') for info in image_info_list],
+                    dtype='datetime64[us]')
+
+
+def _timestamp_array(times: np.ndarray) -> 'pa.Array':
+    return pa.array(times, type=pa.timestamp('us'), mask=np.isnat(times))
+
+
+def _categorical(values: List[Any]) -> 'pa.Array':
+    """字符串列编码为字典（分类）列，空字符串和 None 为空值"""
+    return pa.array([value if value not in ('', None) else None for value in values],
+                    type=pa.string()).dictionary_encode()
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float_or_none(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def image_table(image_info_list: List[Dict[str, Any]], confidence_settings: Dict[str, float],
+                arrays: Optional[DetectionArrays] = None, times: Optional[np.ndarray] = None) -> 'pa.Table':
+    """每张图片一行的表，物种信息按置信度阈值过滤，列与表格导出一致
+
+    拍摄时间为时间戳列，工作天数为整数列，最低置信度为浮点列（人工校验的图片为空值，并在"人工校验"列中标记），
+    独立探测首只为布尔列，格式、物种名称、物种类型、时间来源、相机为分类列。
+
+    Args:
+        image_info_list: 已计算独立探测和工作天数的图像信息列表
+        confidence_settings: 物种置信度阈值设置
+        arrays: 已由 image_info_list 打包的检测数组，为 None 时重新打包
+        times: 每张图片的拍摄时间，为 None 时重新读取
+
+    Returns:
+        Arrow 表
+    """
+    _require_arrow()
+    # 导出时会按置信度修改物种信息，使用浅拷贝
+    infos = [dict(info) for info in image_info_list]
+    rows = list(DataProcessor.iter_export_rows(infos, confidence_settings, arrays))
+    columns = dict(zip(EXPORT_COLUMNS, zip(*rows))) if rows else {name: () for name in EXPORT_COLUMNS}
+    if times is None:
+        times = _capture_times(infos)
+    reviewed = [info.get('最低置信度') == '人工校验' for info in infos]
+
+    return pa.table({
+        '文件名': pa.array(columns['文件名'], type=pa.string()),
+        '格式': _categorical(columns['格式']),
+        '拍摄时间': _timestamp_array(times),
+        '时间来源': _categorical([info.get('时间来源') for info in infos]),
+        '相机': _categorical([info.get('相机') for info in infos]),
+        '工作天数': pa.array([_int_or_none(v) for v in columns['工作天数']], type=pa.int32()),
+        '物种名称': _categorical(columns['物种名称']),
+        '物种类型': _categorical(columns['物种类型']),
+        '物种数量': pa.array([str(v) if v not in ('', None) else None for v in columns['物种数量']],
+                         type=pa.string()),
+        '最低置信度': pa.array([_float_or_none(v) for v in columns['最低置信度']], type=pa.float32()),
+        '人工校验': pa.array(reviewed, type=pa.bool_()),
+        '独立探测首只': pa.array([v == '是' for v in columns['独立探测首只']], type=pa.bool_()),
+        '备注': pa.array([v if v not in ('', None) else None for v in columns['备注']], type=pa.string()),
+    })
+
+
+def detection_table(arrays: DetectionArrays, file_names: List[str], times: np.ndarray,
+                    confidence_settings: Dict[str, float], reviewed: Optional[np.ndarray] = None) -> 'pa.Table':
+    """每个检测一行的表，数值列直接引用检测数组的列
+
+    人工校验过的图片以校验结果为准，其模型检测在"人工校验"列中标记，"保留"均为 False。
+
+    Args:
+        arrays: 检测数组，图片序号为 file_names 和 times 中的位置
+        file_names: 每张图片的文件名
+        times: 每张图片的拍摄时间（datetime64[us]，缺失为 NaT）
+        confidence_settings: 物种置信度阈值设置，用于计算"保留"列
+        reviewed: 每张图片是否经过人工校验，为 None 时视为均未校验
+
+    Returns:
+        Arrow 表：文件名和物种为分类列，拍摄时间为时间戳列，置信度和边界框为 float32 列
+    """
+    _require_arrow()
+    data = arrays.data
+    image = np.ascontiguousarray(data['image'])
+    cls = np.ascontiguousarray(data['cls'])
+    conf = np.ascontiguousarray(data['conf'])
+
+    keep = np.zeros(len(data), dtype=bool)
+    if len(data) and arrays.species:
+        thresholds = threshold_vector(arrays.species, confidence_settings)
+        keep[filter_pairs(image, cls, conf, thresholds)[3]] = True
+    if reviewed is None:
+        reviewed = np.zeros(len(file_names), dtype=bool)
+    detection_reviewed = reviewed[image] if len(reviewed) else np.zeros(len(data), dtype=bool)
+    keep &= ~detection_reviewed
+
+    columns = {
+        '文件名': pa.DictionaryArray.from_arrays(pa.array(image, type=pa.int32()),
+                                              pa.array(file_names, type=pa.string())),
+        '拍摄时间': _timestamp_array(times[image] if len(times) else np.empty(0, dtype='datetime64[us]')),
+        # 类别表中没有的类别（序号为 -1）为空值
+        '物种': pa.DictionaryArray.from_arrays(pa.array(cls, type=pa.int32(), mask=cls < 0),
+                                             pa.array(list(arrays.species), type=pa.string())),
+        '置信度': pa.array(conf, type=pa.float32()),
+    }
+    for i, name in enumerate(('x1', 'y1', 'x2', 'y2')):
+        columns[name] = pa.array(np.ascontiguousarray(data['xyxy'][:, i]), type=pa.float32())
+    columns['人工校验'] = pa.array(detection_reviewed, type=pa.bool_())
+    columns['保留'] = pa.array(keep, type=pa.bool_())
+    return pa.table(columns)
+
+
+def build_tables(image_info_list: List[Dict[str, Any]],
+                 confidence_settings: Dict[str, float]) -> Tuple['pa.Table', 'pa.Table']:
+    """由图像信息列表生成 (图片表, 检测表)"""
+    _require_arrow()
+    arrays = DetectionArrays.from_image_infos(image_info_list)
+    file_names = [info.get('文件名', '') for info in image_info_list]
+    times = _capture_times(image_info_list)
+    reviewed = np.array([info.get('最低置信度') == '人工校验' for info in image_info_list], dtype=bool)
+    return (image_table(image_info_list, confidence_settings, arrays, times),
+            detection_table(arrays, file_names, times, confidence_settings, reviewed))
+
+
+def detection_path(output_path: str) -> str:
+    """检测表的文件路径"""
+    base, ext = os.path.splitext(output_path)
+    return f"{base}{DETECTION_SUFFIX}{ext or '.parquet'}"
+
+
+def write_parquet(image_info_list: List[Dict[str, Any]], output_path: str,
+                  confidence_settings: Dict[str, float]) -> List[str]:
+    """将图片表和检测表写入两个 Parquet 文件
+
+    Args:
+        image_info_list: 已计算独立探测和工作天数的图像信息列表
+        output_path: 图片表的文件路径，检测表写入同目录下加 "_检测" 后缀的文件
+        confidence_settings: 物种置信度阈值设置
+
+    Returns:
+        写入的文件路径
+    """
+    images, detections = build_tables(image_info_list, confidence_settings)
+    paths = []
+    for table, path in ((images, output_path), (detections, detection_path(output_path))):
+        tmp_path = path + ".tmp"
+        pq.write_table(table, tmp_path, compression=PARQUET_COMPRESSION)
+        os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
+
+
+def read_parquet(output_path: str) -> Tuple['pa.Table', Optional['pa.Table']]:
+    """读取 write_parquet 写入的 (图片表, 检测表)，检测表文件不存在时为 None"""
+    _require_arrow()
+    images = pq.read_table(output_path)
+    path = detection_path(output_path)
+    detections = pq.read_table(path) if os.path.exists(path) else None
+    return images, detections
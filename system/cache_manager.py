@@ -0,0 +1,243 @@
+"""
+缓存管理模块 - 按项目文件夹统计临时缓存大小，超出上限时按最近使用时间淘汰，并在后台删除
+"""
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Callable
+
+from system.verdict_journal import JOURNAL_FILE
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "cache_index.json"
+DEFAULT_CACHE_LIMIT_MB = 10240
+
+
+def format_size(size_in_bytes: int) -> str:
+    """将字节数格式化为易读的大小"""
+    if size_in_bytes < 1024:
+        return f"{size_in_bytes} Bytes"
+    if size_in_bytes < 1024 ** 2:
+        return f"{size_in_bytes / 1024:.2f} KB"
+    if size_in_bytes < 1024 ** 3:
+        return f"{size_in_bytes / 1024 ** 2:.2f} MB"
+    return f"{size_in_bytes / 1024 ** 3:.2f} GB"
+
+
+def folder_size(path: str) -> int:
+    """统计文件夹中所有文件的大小（不跟随符号链接）"""
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total += folder_size(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError:
+        return 0
+    return total
+
+
+def has_validation_data(project_dir: str) -> bool:
+    """项目文件夹中是否保存有校验结果（有校验结果的项目不会被自动淘汰）"""
+    if os.path.exists(os.path.join(project_dir, "validation.json")):
+        return True
+    journal_path = os.path.join(project_dir, JOURNAL_FILE)
+    if os.path.exists(journal_path) and os.path.getsize(journal_path) > 0:
+        return True
+    db_path = os.path.join(project_dir, "results.db")
+    if not os.path.exists(db_path):
+        return False
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT 1 FROM validation LIMIT 1").fetchone() is not None
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        # 无法确认时按有校验结果处理，避免误删
+        return True
+
+
+class CacheManager:
+    """图片缓存管理器
+
+    temp/photo 下每个源文件夹对应一个项目文件夹。各项目的大小、最近使用时间和是否有校验结果
+    记录在 cache_index.json 中，只在项目被使用或处理完成后重新统计该项目，
+    显示总大小时不再遍历整个缓存目录。
+    """
+
+    def __init__(self, cache_dir: str, limit_mb: int = DEFAULT_CACHE_LIMIT_MB,
+                 before_delete: Optional[Callable[[str], None]] = None):
+        """初始化缓存管理器
+
+        Args:
+            cache_dir: 缓存根目录（temp/photo）
+            limit_mb: 缓存大小上限（MB），0 表示不限制
+            before_delete: 删除项目文件夹前调用，用于关闭该项目打开的文件
+        """
+        self.cache_dir = cache_dir
+        self.limit_mb = limit_mb
+        self.before_delete = before_delete
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self._lock = threading.RLock()
+        self._projects: Dict[str, Dict[str, Any]] = {}
+        self._deleting = set()
+        self._load()
+
+    def _load(self) -> None:
+        self.indexed = False
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._projects = json.load(f).get('projects', {})
+            self.indexed = True
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取缓存索引失败，将重新统计: {e}")
+
+    def ensure_index(self) -> None:
+        """索引不存在或已损坏时重新统计（首次使用时遍历一次缓存目录，应在后台线程中调用）"""
+        if not self.indexed:
+            self.rebuild()
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'projects': self._projects}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.error(f"保存缓存索引失败: {e}")
+
+    def rebuild(self) -> None:
+        """遍历缓存目录，重新统计所有项目（索引丢失或损坏时使用）"""
+        projects = {}
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            names = []
+        with self._lock:
+            for name in names:
+                path = os.path.join(self.cache_dir, name)
+                if not os.path.isdir(path) or name in self._deleting:
+                    continue
+                old = self._projects.get(name, {})
+                projects[name] = {
+                    'size': folder_size(path),
+                    'last_used': old.get('last_used', os.path.getmtime(path)),
+                    'source': old.get('source', ''),
+                    'validated': has_validation_data(path),
+                }
+            self._projects = projects
+            self.indexed = True
+            self._save()
+
+    def touch(self, project_dir: str, source: str = '') -> None:
+        """记录项目被使用（选择文件夹时调用）并重新统计其大小"""
+        name = os.path.basename(os.path.normpath(project_dir))
+        with self._lock:
+            entry = self._projects.setdefault(name, {'size': 0, 'source': source, 'validated': False})
+            entry['last_used'] = time.time()
+            if source:
+                entry['source'] = source
+        self.update_project(project_dir)
+
+    def update_project(self, project_dir: str) -> None:
+        """重新统计一个项目的大小和校验状态（处理完成或校验后调用）"""
+        name = os.path.basename(os.path.normpath(project_dir))
+        size = folder_size(project_dir)
+        validated = has_validation_data(project_dir)
+        with self._lock:
+            entry = self._projects.setdefault(name, {'last_used': time.time(), 'source': ''})
+            entry['size'] = size
+            entry['validated'] = validated
+            self._save()
+
+    def total_size(self) -> int:
+        """缓存总大小（按索引累计）"""
+        with self._lock:
+            return sum(p.get('size', 0) for name, p in self._projects.items() if name not in self._deleting)
+
+    def eviction_candidates(self, protect: Optional[List[str]] = None) -> List[str]:
+        """按最近使用时间从旧到新列出超出上限时应淘汰的项目
+
+        Args:
+            protect: 不淘汰的项目文件夹（如当前正在使用的项目）
+        """
+        if not self.limit_mb or self.limit_mb <= 0:
+            return []
+        protected = {os.path.basename(os.path.normpath(p)) for p in (protect or [])}
+        limit = self.limit_mb * 1024 ** 2
+        with self._lock:
+            total = self.total_size()
+            candidates = []
+            for name, entry in sorted(self._projects.items(), key=lambda kv: kv[1].get('last_used', 0)):
+                if total <= limit:
+                    break
+                if name in protected or name in self._deleting or entry.get('validated'):
+                    continue
+                candidates.append(name)
+                total -= entry.get('size', 0)
+            return candidates
+
+    def enforce_limit(self, protect: Optional[List[str]] = None,
+                      on_done: Optional[Callable[[int], None]] = None) -> List[str]:
+        """淘汰最久未使用的项目，使缓存不超过上限（在后台线程中删除）
+
+        Returns:
+            被淘汰的项目文件夹名
+        """
+        candidates = self.eviction_candidates(protect)
+        if candidates:
+            logger.info(f"缓存超出上限 {self.limit_mb} MB，淘汰 {len(candidates)} 个项目")
+            self._delete_in_background(candidates, on_done)
+        return candidates
+
+    def clear_all(self, on_done: Optional[Callable[[int], None]] = None) -> None:
+        """在后台删除所有项目文件夹"""
+        with self._lock:
+            names = [n for n in os.listdir(self.cache_dir)
+                     if os.path.isdir(os.path.join(self.cache_dir, n))] if os.path.isdir(self.cache_dir) else []
+        self._delete_in_background(names, on_done)
+
+    def _delete_in_background(self, names: List[str], on_done: Optional[Callable[[int], None]]) -> None:
+        with self._lock:
+            names = [n for n in names if n not in self._deleting]
+            self._deleting.update(names)
+
+        def delete_thread():
+            freed = 0
+            for name in names:
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    if self.before_delete:
+                        self.before_delete(path)
+                    shutil.rmtree(path)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.error(f"删除缓存项目失败 ({path}): {e}")
+                    with self._lock:
+                        self._deleting.discard(name)
+                    continue
+                with self._lock:
+                    freed += self._projects.pop(name, {}).get('size', 0)
+                    self._deleting.discard(name)
+            with self._lock:
+                self._save()
+            if on_done:
+                on_done(freed)
+
+        threading.Thread(target=delete_thread, daemon=True, name="cache-cleanup").start()
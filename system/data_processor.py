@@ -1,17 +1,22 @@
 # system/data_processor.py
 
-import os
 import logging
-from typing import Dict, List, Optional
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 from datetime import datetime
-import pandas as pd
-from collections import Counter
+import numpy as np
 
 from system.config import INDEPENDENT_DETECTION_THRESHOLD
-from system.utils import resource_path
+from system.detection_arrays import DetectionArrays, SpeciesSummary
+from system.taxonomy import Taxonomy
+from system.table_writer import write_table
 
 logger = logging.getLogger(__name__)
 
+# 导出表格的列
+EXPORT_COLUMNS = ['文件名', '格式', '拍摄日期', '拍摄时间', '工作天数',
+                  '物种名称', '物种类型', '物种数量', '最低置信度', '独立探测首只', '备注']
+
 
 class DataProcessor:
     """数据处理类，处理图像信息集合"""
@@ -40,209 +45,244 @@ class DataProcessor:
         return image_info_list
 
     @staticmethod
-    def process_independent_detection(image_info_list: List[Dict], confidence_settings: Dict[str, float]) -> List[Dict]:
+    def process_independent_detection(image_info_list: List[Dict], confidence_settings: Dict[str, float],
+                                      threshold_seconds: Optional[float] = None,
+                                      partition_by: Union[str, Sequence[str], None] = None) -> List[Dict]:
         """处理独立探测首只标记
 
+        将图片展开为 (图片, 物种) 行，按 分区+物种 分组、组内按拍摄时间排列，与组内上一行的时间差
+        超过阈值（或为该组第一行）即为独立探测；图片中任一物种为独立探测时标记为"是"。
+
         Args:
             image_info_list: 图像信息列表
             confidence_settings: 物种置信度阈值设置
+            threshold_seconds: 独立探测的时间间隔（秒），为 None 时使用 INDEPENDENT_DETECTION_THRESHOLD
+            partition_by: 分区字段名（如站点、相机），各分区分别计算；为 None 时所有图片属于同一分区
 
         Returns:
             更新后的图像信息列表
         """
-        # 按拍摄日期排序
-        sorted_images = sorted(
-            [img for img in image_info_list if img.get('拍摄日期对象')],
-            key=lambda x: x['拍摄日期对象']
-        )
-
-        species_last_detected = {}  # 记录每个物种的最后探测时间
-
-        for img_info in sorted_images:
-            # --- 新增逻辑：根据置信度过滤当前图片的物种 ---
-            if img_info.get('最低置信度') == '人工校验':
-                # 对于人工校验过的数据，直接使用已有的物种名称
-                species_names = img_info.get('物种名称', '').split(',')
-            else:
-                confidences = img_info.get('all_confidences', [])
-                classes = img_info.get('all_classes', [])
-                names_map = img_info.get('names_map', {})
-
-                if not confidences or not classes or not names_map:
-                    img_info['独立探测首只'] = ''
-                    continue
-
-                final_species_counts = Counter()
-                for cls, conf in zip(classes, confidences):
-                    species_name = names_map.get(str(int(cls)))
-                    if species_name:
-                        # 优先使用物种特定阈值，否则使用全局阈值
-                        threshold = confidence_settings.get(species_name, confidence_settings.get("global", 0.25))
-                        if conf >= threshold:
-                            final_species_counts[species_name] += 1
-
-                if not final_species_counts:
-                    species_names = ['空']
-                else:
-                    species_names = list(final_species_counts.keys())
-            # --- 过滤逻辑结束 ---
-
-            current_time = img_info.get('拍摄日期对象')
-
-            if not current_time or not species_names or species_names == [''] or species_names == ['空']:
-                img_info['独立探测首只'] = ''
-                continue
+        threshold = INDEPENDENT_DETECTION_THRESHOLD if threshold_seconds is None else threshold_seconds
+        partition_fields = [partition_by] if isinstance(partition_by, str) else list(partition_by or [])
 
-            is_independent = False
+        dated = [img for img in image_info_list if img.get('拍摄日期对象')]
+        if not dated:
+            return image_info_list
 
-            for species in species_names:
-                if species in species_last_detected:
-                    # 检查时间差是否超过阈值
-                    time_diff = (current_time - species_last_detected[species]).total_seconds()
-                    if time_diff > INDEPENDENT_DETECTION_THRESHOLD:
-                        is_independent = True
-                else:
-                    # 首次探测该物种
-                    is_independent = True
+        # 按拍摄日期稳定排序后的名次，时间相同的图片保持原有顺序
+        times = np.array([img['拍摄日期对象'] for img in dated], dtype='datetime64[us]').astype(np.int64)
+        rank = np.empty(len(dated), dtype=np.int64)
+        rank[np.argsort(times, kind='stable')] = np.arange(len(dated))
+
+        row_image, row_species, species_names = DataProcessor.species_rows(dated, confidence_settings)
+
+        if partition_fields:
+            partitions: Dict[tuple, int] = {}
+            partition_code = np.array([partitions.setdefault(tuple(img.get(field) for field in partition_fields),
+                                                             len(partitions)) for img in dated], dtype=np.int64)
+            row_group = partition_code[row_image] * max(len(species_names), 1) + row_species
+        else:
+            row_group = row_species
+
+        # 组内按拍摄时间排列，同一图片中重复的物种按出现顺序排列
+        order = np.lexsort((np.arange(len(row_image)), rank[row_image], row_group))
+        row_image = row_image[order]
+        row_group = row_group[order]
+        row_time = times[row_image]
+
+        # 组内第一行（首次探测该物种）或与上一行的时间差（秒）超过阈值即为独立探测
+        independent = np.ones(len(row_image), dtype=bool)
+        independent[1:] = ((row_group[1:] != row_group[:-1])
+                           | ((row_time[1:] - row_time[:-1]) / 1e6 > threshold))
+
+        flags = np.zeros(len(dated), dtype=bool)
+        flags[row_image[independent]] = True
+        for img_info, flag in zip(dated, flags.tolist()):
+            img_info['独立探测首只'] = '是' if flag else ''
 
-                # 更新最后探测时间
-                species_last_detected[species] = current_time
+        return image_info_list
 
-            img_info['独立探测首只'] = '是' if is_independent else ''
+    @staticmethod
+    def species_rows(image_info_list: List[Dict],
+                     confidence_settings: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """将图片展开为参与独立探测计算的 (图片, 物种) 行
 
-        return image_info_list
+        人工校验过的图片使用已有的物种名称，其他图片按置信度设置过滤检测；
+        没有检测结果、过滤后为空或只标记为"空"的图片没有对应的行。
+
+        Args:
+            image_info_list: 图像信息列表
+            confidence_settings: 物种置信度阈值设置
+
+        Returns:
+            (图片在列表中的位置, 物种序号, 物种名称表)，同一图片的行连续排列，
+            物种按在图片中出现的顺序排列
+        """
+        # 所有图片的检测按物种阈值向量一次性过滤，直接得到展开后的行
+        arrays = DetectionArrays.from_image_infos(image_info_list)
+        manual = np.array([img.get('最低置信度') == '人工校验' for img in image_info_list], dtype=bool)
+        row_image, row_species = arrays.species_rows(confidence_settings)
+        keep = ~manual[row_image]
+        row_image, row_species = row_image[keep], row_species[keep]
+
+        species_codes = {name: i for i, name in enumerate(arrays.species)}
+        empty_code = species_codes.get('空')
+        if empty_code is not None and len(row_image):
+            # 过滤后只剩"空"这一个物种的图片不参与计算
+            per_image = np.bincount(row_image, minlength=len(image_info_list))
+            keep = (per_image[row_image] > 1) | (row_species != empty_code)
+            row_image, row_species = row_image[keep], row_species[keep]
+
+        # 人工校验过的数据直接使用已有的物种名称
+        manual_image: List[int] = []
+        manual_species: List[int] = []
+        for pos in np.flatnonzero(manual).tolist():
+            species_names = image_info_list[pos].get('物种名称', '').split(',')
+            if species_names == [''] or species_names == ['空']:
+                continue
+            for species in species_names:
+                manual_image.append(pos)
+                manual_species.append(species_codes.setdefault(species, len(species_codes)))
+
+        row_image = np.concatenate([row_image, np.array(manual_image, dtype=np.int64)])
+        row_species = np.concatenate([row_species, np.array(manual_species, dtype=np.int64)])
+        return row_image, row_species, list(species_codes)
 
     @staticmethod
     def export_to_excel(image_info_list: List[Dict], output_path: str, confidence_settings: Dict[str, float],
-                        file_format: str = 'excel') -> bool:
+                        file_format: str = 'excel',
+                        progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+                        stop_event: Optional[threading.Event] = None) -> bool:
         """将图像信息导出为Excel或CSV文件
 
+        逐行流式写入，超出Excel行数上限时分为多个工作表（CSV 为多个文件）。
+
         Args:
             image_info_list: 图像信息列表
             output_path: 输出文件路径
             confidence_settings: 物种置信度阈值设置
             file_format: 文件格式 ('excel' 或 'csv')
+            progress_callback: 进度回调 (已写入行数, 总行数)
+            stop_event: 设置后停止导出并删除未完成的文件
 
         Returns:
-            是否成功导出
+            是否成功导出（被停止时为 False）
         """
         if not image_info_list:
             logger.warning("没有数据可导出")
             return False
 
-        # 加载鸟类名录用于物种类型分类
-        bird_list_path = resource_path(os.path.join("res", "中国鸟类名录.xlsx"))
-        bird_names = set()
-        if os.path.exists(bird_list_path):
-            try:
-                df_birds = pd.read_excel(bird_list_path)
-                # 假设物种名称在C列
-                if df_birds.shape[1] > 2:
-                    bird_names = set(df_birds.iloc[:, 2].dropna().astype(str).tolist())
-            except Exception as e:
-                logger.error(f"加载鸟类名录失败: {e}")
+        try:
+            paths = write_table(DataProcessor.iter_export_rows(image_info_list, confidence_settings),
+                                output_path, EXPORT_COLUMNS, file_format=file_format, sheet_name="物种检测信息",
+                                total=len(image_info_list), progress_callback=progress_callback,
+                                stop_event=stop_event)
+            if not paths:
+                return False
+            if len(paths) > 1:
+                logger.info(f"导出数据已分为 {len(paths)} 个文件: {', '.join(paths)}")
+            return True
+        except Exception as e:
+            logger.error(f"导出文件失败: {e}")
+            return False
 
-        personnel_names = {"人", "牧民", "人员"}
+    @staticmethod
+    def export_to_parquet(image_info_list: List[Dict], output_path: str,
+                          confidence_settings: Dict[str, float]) -> bool:
+        """将图像信息导出为 Parquet 文件（需要 pyarrow）
 
-        try:
-            # 在导出前根据置信度阈值更新数据
-            for info in image_info_list:
-                species_names_str = info.get('物种名称', '')
-                if info.get('最低置信度') == '人工校验':
-                    if species_names_str and species_names_str != '空':
-                        species_list = [s.strip() for s in species_names_str.split(',')]
-                        type_list = []
-                        for species in species_list:
-                            if species in personnel_names:
-                                type_list.append("人员")
-                            elif species in bird_names:
-                                type_list.append("鸟")
-                            else:
-                                type_list.append("兽")
-                        # --- 修改开始 ---
-                        # 去重并排序后合并，实现您的需求
-                        unique_types = sorted(list(set(type_list)))
-                        info['物种类型'] = ','.join(unique_types)
-                        # --- 修改结束 ---
-                    else:
-                        info['物种类型'] = ''
-                    continue
-
-                species_names_original = info.get('物种名称', '').split(',')
-                if not species_names_original or species_names_original == ['']:
-                    info['物种类型'] = ''
-                    continue
-
-                confidences = info.get('all_confidences', [])
-                classes = info.get('all_classes', [])
-                names_map = info.get('names_map', {})
-
-                if not confidences or not classes or not names_map:
-                    info['物种类型'] = ''
-                    continue
-
-                final_species_counts = Counter()
-                valid_confidences = []
-
-                for cls, conf in zip(classes, confidences):
-                    species_name = names_map.get(str(int(cls)))  # JSON keys are strings
-                    if species_name:
-                        # 优先使用物种特定阈值，否则使用全局阈值
-                        threshold = confidence_settings.get(species_name, confidence_settings.get("global", 0.25))
-                        if conf >= threshold:
-                            final_species_counts[species_name] += 1
-                            valid_confidences.append(conf)
-
-                type_list = []
-                if not final_species_counts:
-                    info['物种名称'] = '空'
-                    info['物种数量'] = '空'
-                    info['最低置信度'] = ''
-                    info['物种类型'] = ''
-                else:
-                    filtered_species_list = list(final_species_counts.keys())
-                    for species in filtered_species_list:
-                        if species in personnel_names:
-                            type_list.append("人员")
-                        elif species in bird_names:
-                            type_list.append("鸟")
-                        else:
-                            type_list.append("兽")
-                    # --- 修改开始 ---
-                    # 去重并排序后合并，实现您的需求
-                    unique_types = sorted(list(set(type_list)))
-                    info['物种类型'] = ','.join(unique_types)
-                    # --- 修改结束 ---
-
-                    info['物种名称'] = ','.join(filtered_species_list)
-                    info['物种数量'] = ','.join(map(str, final_species_counts.values()))
-                    if valid_confidences:
-                        info['最低置信度'] = f"{min(valid_confidences):.3f}"
-                    else:
-                        info['最低置信度'] = ''
-
-            # 使用pandas创建DataFrame更高效
-            df = pd.DataFrame(image_info_list)
-
-            # 选择需要的列并按顺序排列
-            columns = ['文件名', '格式', '拍摄日期', '拍摄时间', '工作天数',
-                       '物种名称', '物种类型', '物种数量', '最低置信度', '独立探测首只', '备注']
-
-            # 确保所有列都存在，不存在的列填充空值
-            for col in columns:
-                if col not in df.columns:
-                    df[col] = ''
-
-            # 只保留需要的列并排序
-            df = df[columns]
-
-            # 根据选择的格式导出文件
-            if file_format.lower() == 'excel':
-                df.to_excel(output_path, sheet_name="物种检测信息", index=False)
-            elif file_format.lower() == 'csv':
-                df.to_csv(output_path, index=False, encoding='utf-8-sig')  # 使用 utf-8-sig 以便 Excel 正确显示中文
+        图片表写入 output_path，每个检测一行的检测表写入同目录下加 "_检测" 后缀的文件。
+
+        Args:
+            image_info_list: 图像信息列表
+            output_path: 输出文件路径
+            confidence_settings: 物种置信度阈值设置
 
+        Returns:
+            是否成功导出
+        """
+        if not image_info_list:
+            logger.warning("没有数据可导出")
+            return False
+
+        # arrow_tables 依赖本模块，在此处导入
+        from system.arrow_tables import write_parquet
+        try:
+            paths = write_parquet(image_info_list, output_path, confidence_settings)
+            logger.info(f"数据已导出为 Parquet: {', '.join(paths)}")
             return True
         except Exception as e:
-            logger.error(f"导出文件失败: {e}")
-            return False
\ No newline at end of file
+            logger.error(f"导出 Parquet 文件失败: {e}")
+            return False
+
+    @staticmethod
+    def iter_export_rows(image_info_list: List[Dict], confidence_settings: Dict[str, float],
+                         arrays: Optional[DetectionArrays] = None) -> Iterator[List]:
+        """根据置信度阈值更新每张图片的物种信息，并逐行生成导出列的值
+
+        arrays 为已由 image_info_list 打包的检测数组，为 None 时重新打包。
+        """
+        # 物种类型分类使用编译好的分类索引，鸟类名录变化时才会重新读取
+        taxonomy = Taxonomy.load()
+
+        # 在导出前根据置信度阈值更新数据，所有图片的检测一次性过滤
+        if arrays is None:
+            arrays = DetectionArrays.from_image_infos(image_info_list)
+        filtered = arrays.filter(confidence_settings)
+        for pos, info in enumerate(image_info_list):
+            DataProcessor._apply_export_filter(info, filtered.get(pos), taxonomy)
+            yield [info.get(column, '') for column in EXPORT_COLUMNS]
+
+    @staticmethod
+    def export_row(info: Dict, confidence_settings: Dict[str, float], taxonomy: Optional[Taxonomy] = None) -> List:
+        """按置信度阈值过滤一张图片的检测并返回导出列的值，不修改 info
+
+        Args:
+            info: 图像信息
+            confidence_settings: 物种置信度阈值设置
+            taxonomy: 物种分类索引，为 None 时使用共享的索引
+
+        Returns:
+            与 EXPORT_COLUMNS 顺序一致的值
+        """
+        info = dict(info)
+        summary = DetectionArrays.from_image_infos([info]).filter(confidence_settings).get(0)
+        DataProcessor._apply_export_filter(info, summary, taxonomy or Taxonomy.load())
+        return [info.get(column, '') for column in EXPORT_COLUMNS]
+
+    @staticmethod
+    def _apply_export_filter(info: Dict, summary: Optional[SpeciesSummary], taxonomy: Taxonomy) -> None:
+        """按过滤结果更新一张图片的物种名称、数量、最低置信度和物种类型"""
+        species_names_str = info.get('物种名称', '')
+        if info.get('最低置信度') == '人工校验':
+            if species_names_str and species_names_str != '空':
+                # 去重并排序后合并
+                info['物种类型'] = taxonomy.species_types(species_names_str.split(','))
+            else:
+                info['物种类型'] = ''
+            return
+
+        species_names_original = info.get('物种名称', '').split(',')
+        if not species_names_original or species_names_original == ['']:
+            info['物种类型'] = ''
+            return
+
+        if summary is None:
+            info['物种类型'] = ''
+            return
+
+        if not summary.species:
+            info['物种名称'] = '空'
+            info['物种数量'] = '空'
+            info['最低置信度'] = ''
+            info['物种类型'] = ''
+        else:
+            filtered_species_list = summary.species
+            info['物种类型'] = taxonomy.species_types(filtered_species_list)
+
+            info['物种名称'] = ','.join(filtered_species_list)
+            info['物种数量'] = ','.join(map(str, summary.counts))
+            if summary.min_conf is not None:
+                info['最低置信度'] = f"{summary.min_conf:.3f}"
+            else:
+                info['最低置信度'] = ''
\ No newline at end of file
@@ -0,0 +1,355 @@
+"""
+检测数组模块 - 将检测框打包为列式 numpy 数组，按物种阈值向量一次性重新过滤所有图片
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Dict, Any, List, Optional, NamedTuple, Sequence, Hashable, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 列式检测数组保存在项目临时目录的子目录中
+ARRAY_DIR = "arrays"
+# 每个数据库版本写入新的数组文件，Windows 下仍被映射的旧文件无法覆盖或删除，释放映射后再清理
+ARRAY_PREFIX = "detections"
+ARRAY_FILE = "detections.npy"
+INDEX_FILE = "index.json"
+DEFAULT_THRESHOLD = 0.25
+
+# 每个检测一行：所属图片序号、物种序号（-1 表示类别表中没有该类别）、置信度、边界框
+DETECTION_DTYPE = np.dtype([
+    ('image', '<i4'),
+    ('cls', '<i4'),
+    ('conf', '<f4'),
+    ('xyxy', '<f4', (4,)),
+])
+
+# 按结果数据库缓存已加载的数组
+_store_cache: Dict[str, 'DetectionArrays'] = {}
+_store_cache_lock = threading.Lock()
+
+
+class SpeciesSummary(NamedTuple):
+    """一张图片按阈值过滤后的物种统计"""
+    species: List[str]
+    counts: List[int]
+    min_conf: Optional[float]
+
+
+def threshold_vector(species: Sequence[str], confidence_settings: Dict[str, float]) -> np.ndarray:
+    """将置信度设置编译为按物种序号索引的阈值向量（未单独设置的物种使用全局阈值）"""
+    default = confidence_settings.get("global", DEFAULT_THRESHOLD)
+    return np.array([confidence_settings.get(name, default) for name in species], dtype=np.float64)
+
+
+def filter_pairs(image: np.ndarray, cls: np.ndarray, conf: np.ndarray,
+                 thresholds: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """按阈值向量过滤检测，并把同一图片中的同一物种合并为一行
+
+    Args:
+        image: 每个检测所属的图片序号（同一图片的检测需连续排列）
+        cls: 每个检测的物种序号，-1 表示无法映射到物种
+        conf: 每个检测的置信度
+        thresholds: 按物种序号索引的阈值向量
+
+    Returns:
+        (图片序号, 物种序号, 检测数量, 保留的检测下标)，前三项每个 (图片, 物种) 一行，
+        按图片序号、物种在图片中首次出现的顺序排列
+    """
+    # 置信度按 float64 比较，与直接比较原始数值的结果一致
+    mapped = cls >= 0
+    keep = np.zeros(len(cls), dtype=bool)
+    keep[mapped] = conf[mapped].astype(np.float64) >= thresholds[cls[mapped]]
+    kept = np.flatnonzero(keep)
+
+    n_species = max(len(thresholds), 1)
+    pair = image[kept].astype(np.int64) * n_species + cls[kept]
+    pairs, first, counts = np.unique(pair, return_index=True, return_counts=True)
+    order = np.lexsort((first, pairs // n_species))
+    pairs = pairs[order]
+    return pairs // n_species, pairs % n_species, counts[order], kept
+
+
+def summarize(image: np.ndarray, cls: np.ndarray, conf: np.ndarray, thresholds: np.ndarray,
+              species: Sequence[str]) -> Dict[int, SpeciesSummary]:
+    """一次性过滤所有检测并按图片统计物种、数量和最低置信度
+
+    Args:
+        image: 每个检测所属的图片序号（同一图片的检测需连续排列）
+        cls: 每个检测的物种序号，-1 表示无法映射到物种
+        conf: 每个检测的置信度
+        thresholds: 按物种序号索引的阈值向量
+        species: 物种名称表
+
+    Returns:
+        {图片序号: 过滤后的统计}，只包含至少有一个原始检测的图片；
+        物种按其在图片中首次出现的顺序排列
+    """
+    summaries = {int(i): SpeciesSummary([], [], None) for i in np.unique(image)}
+    if not len(cls) or not len(species):
+        return summaries
+
+    pair_image, pair_cls, counts, kept = filter_pairs(image, cls, conf, thresholds)
+    if not kept.size:
+        return summaries
+
+    kept_image = image[kept].astype(np.int64)
+    kept_conf = conf[kept].astype(np.float64)
+    min_conf = np.full(int(kept_image.max()) + 1, np.inf)
+    np.minimum.at(min_conf, kept_image, kept_conf)
+
+    for img_idx, cls_idx, count in zip(pair_image.tolist(), pair_cls.tolist(), counts.tolist()):
+        summary = summaries[img_idx]
+        summary.species.append(species[cls_idx])
+        summary.counts.append(count)
+    for img_idx in np.unique(kept_image):
+        summaries[int(img_idx)] = summaries[int(img_idx)]._replace(min_conf=float(min_conf[img_idx]))
+    return summaries
+
+
+def summarize_boxes(boxes: List[Dict[str, Any]], conf_threshold: float) -> SpeciesSummary:
+    """按统一阈值统计一张图片的检测框
+
+    Args:
+        boxes: 检测框列表，每项包含 物种、置信度
+        conf_threshold: 置信度阈值
+
+    Returns:
+        过滤后的统计
+    """
+    species_index: Dict[str, int] = {}
+    cls = np.array([species_index.setdefault(box["物种"], len(species_index)) if box.get("物种") else -1
+                    for box in boxes], dtype=np.int32)
+    conf = np.array([box.get("置信度", 0) for box in boxes], dtype=np.float64)
+    thresholds = np.full(len(species_index), conf_threshold, dtype=np.float64)
+    summaries = summarize(np.zeros(len(cls), dtype=np.int32), cls, conf, thresholds, list(species_index))
+    return summaries.get(0, SpeciesSummary([], [], None))
+
+
+class DetectionArrays:
+    """一组图片的列式检测数组
+
+    每个检测占一行，物种统一编号；阈值变化时只需重新生成阈值向量，
+    所有图片的过滤结果在一次向量化计算中得到。
+    """
+
+    def __init__(self, data: np.ndarray, keys: List[Hashable], species: List[str], revision: int = 0):
+        """初始化
+
+        Args:
+            data: DETECTION_DTYPE 结构数组
+            keys: 按图片序号排列的图片标识
+            species: 按物种序号排列的物种名称
+            revision: 数组对应的结果数据库版本号
+        """
+        self.data = data
+        self.keys = keys
+        self.species = species
+        self.revision = revision
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def filter(self, confidence_settings: Dict[str, float]) -> Dict[Hashable, SpeciesSummary]:
+        """按物种置信度设置重新过滤所有图片
+
+        Returns:
+            {图片标识: 过滤后的统计}，没有可用原始检测的图片不在结果中
+        """
+        thresholds = threshold_vector(self.species, confidence_settings)
+        summaries = summarize(self.data['image'], self.data['cls'], self.data['conf'], thresholds, self.species)
+        return {self.keys[i]: summary for i, summary in summaries.items()}
+
+    def species_rows(self, confidence_settings: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """按物种置信度设置过滤，返回展开后的 (图片, 物种) 行
+
+        Returns:
+            (图片序号, 物种序号)，图片序号为 keys 中的位置；每张图片的每个物种一行，
+            按图片序号、物种在图片中首次出现的顺序排列
+        """
+        if not len(self.data) or not self.species:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        thresholds = threshold_vector(self.species, confidence_settings)
+        pair_image, pair_cls, _, _ = filter_pairs(self.data['image'], self.data['cls'], self.data['conf'], thresholds)
+        return pair_image, pair_cls
+
+    @classmethod
+    def from_image_infos(cls, image_info_list: List[Dict[str, Any]]) -> 'DetectionArrays':
+        """由图像信息列表打包，图片标识为其在列表中的位置
+
+        只打包 all_classes、all_confidences、names_map 都不为空的图片。
+        """
+        species_index: Dict[str, int] = {}
+        images: List[int] = []
+        classes: List[int] = []
+        confs: List[float] = []
+        boxes: List[List[float]] = []
+        nan_box = [np.nan] * 4
+
+        for pos, info in enumerate(image_info_list):
+            confidences = info.get('all_confidences') or []
+            all_classes = info.get('all_classes') or []
+            names_map = info.get('names_map') or {}
+            if not confidences or not all_classes or not names_map:
+                continue
+            lookup = {key: species_index.setdefault(name, len(species_index))
+                      for key, name in names_map.items() if name}
+            detection_boxes = info.get('检测框') or []
+            count = min(len(all_classes), len(confidences))
+            images.extend([pos] * count)
+            classes.extend(lookup.get(str(int(c)), -1) for c in all_classes[:count])
+            confs.extend(confidences[:count])
+            for idx in range(count):
+                bbox = detection_boxes[idx].get('边界框') if idx < len(detection_boxes) else None
+                boxes.append(list(bbox[:4]) if bbox and len(bbox) >= 4 else nan_box)
+
+        data = np.empty(len(images), dtype=DETECTION_DTYPE)
+        data['image'] = images
+        data['cls'] = classes
+        data['conf'] = confs
+        if boxes:
+            data['xyxy'] = boxes
+        return cls(data, list(range(len(image_info_list))), list(species_index))
+
+    @classmethod
+    def from_store(cls, store) -> 'DetectionArrays':
+        """加载结果数据库对应的检测数组，图片标识为不含扩展名的文件名
+
+        数组以内存映射文件保存在项目目录中，数据库版本号未变化时直接映射已有文件，
+        否则从数据库重新打包。
+        """
+        revision = store.revision()
+        with _store_cache_lock:
+            cached = _store_cache.get(store.db_path)
+            if cached is not None and cached.revision == revision:
+                return cached
+            _store_cache.pop(store.db_path, None)
+
+            array_dir = os.path.join(store.project_dir, ARRAY_DIR)
+            arrays = cls._load_mapped(array_dir, revision)
+            if arrays is None:
+                arrays = cls._pack_store(store, revision)
+                arrays = cls._save_mapped(arrays, array_dir)
+                cls._prune_mapped(array_dir)
+            _store_cache[store.db_path] = arrays
+            return arrays
+
+    @classmethod
+    def release(cls, store=None) -> None:
+        """释放缓存的内存映射（删除项目目录前调用），store 为 None 时释放全部
+
+        释放后删除不再使用的旧版本数组文件。
+        """
+        with _store_cache_lock:
+            if store is None:
+                db_paths = list(_store_cache)
+                _store_cache.clear()
+            else:
+                db_paths = [store.db_path]
+                _store_cache.pop(store.db_path, None)
+        for db_path in db_paths:
+            cls._prune_mapped(os.path.join(os.path.dirname(db_path), ARRAY_DIR))
+
+    @classmethod
+    def _pack_store(cls, store, revision: int) -> 'DetectionArrays':
+        """从结果数据库打包检测数组"""
+        rows = store.detection_columns()
+        class_tables = store.class_tables()
+        species_index: Dict[str, int] = {}
+        lookups = {table_id: {key: species_index.setdefault(name, len(species_index))
+                              for key, name in names_map.items() if name}
+                   for table_id, names_map in class_tables.items()}
+
+        stems: List[str] = []
+        data = np.empty(len(rows), dtype=DETECTION_DTYPE)
+        image_col = data['image']
+        cls_col = data['cls']
+        conf_col = data['conf']
+        xyxy_col = data['xyxy']
+        for i, (stem, table_id, class_id, confidence, x1, y1, x2, y2) in enumerate(rows):
+            if not stems or stems[-1] != stem:
+                stems.append(stem)
+            image_col[i] = len(stems) - 1
+            cls_col[i] = lookups.get(table_id, {}).get(str(int(class_id)), -1)
+            conf_col[i] = confidence if confidence is not None else np.nan
+            xyxy_col[i] = [np.nan if v is None else v for v in (x1, y1, x2, y2)]
+        return cls(data, stems, list(species_index), revision)
+
+    @staticmethod
+    def _read_index(array_dir: str) -> Optional[Dict[str, Any]]:
+        index_path = os.path.join(array_dir, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return None
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @classmethod
+    def _load_mapped(cls, array_dir: str, revision: int) -> Optional['DetectionArrays']:
+        """映射已保存的数组，不存在或版本号不一致时返回 None"""
+        try:
+            index = cls._read_index(array_dir)
+            if index is None or index.get('revision') != revision:
+                return None
+            # 旧版本的索引没有记录文件名
+            array_path = os.path.join(array_dir, index.get('file', ARRAY_FILE))
+            if not os.path.exists(array_path):
+                return None
+            if index.get('count', 0):
+                data = np.load(array_path, mmap_mode='r')
+            else:
+                data = np.empty(0, dtype=DETECTION_DTYPE)
+            if data.dtype != DETECTION_DTYPE or len(data) != index.get('count', 0):
+                return None
+            return cls(data, index['keys'], index['species'], revision)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"读取检测数组失败，将重新生成: {e}")
+            return None
+
+    @classmethod
+    def _save_mapped(cls, arrays: 'DetectionArrays', array_dir: str) -> 'DetectionArrays':
+        """保存数组并改为内存映射，保存失败时返回内存中的数组
+
+        数组写入以版本号命名的新文件并记录在索引中，不覆盖可能仍被映射的旧文件。
+        """
+        index_path = os.path.join(array_dir, INDEX_FILE)
+        array_name = f"{ARRAY_PREFIX}.{arrays.revision}.npy"
+        array_path = os.path.join(array_dir, array_name)
+        try:
+            os.makedirs(array_dir, exist_ok=True)
+            tmp_path = array_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, arrays.data)
+            os.replace(tmp_path, array_path)
+            tmp_path = index_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'revision': arrays.revision, 'file': array_name, 'count': len(arrays.data),
+                           'keys': arrays.keys, 'species': arrays.species}, f, ensure_ascii=False)
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            logger.warning(f"保存检测数组失败: {e}")
+            return arrays
+        if len(arrays.data):
+            arrays.data = np.load(array_path, mmap_mode='r')
+        return arrays
+
+    @classmethod
+    def _prune_mapped(cls, array_dir: str) -> None:
+        """删除索引未引用的旧版本数组文件，仍被映射而无法删除的文件留待下次清理"""
+        try:
+            index = cls._read_index(array_dir)
+            names = os.listdir(array_dir)
+        except (OSError, ValueError) as e:
+            logger.debug(f"清理检测数组文件失败: {e}")
+            return
+        current = index.get('file', ARRAY_FILE) if index else None
+        for name in names:
+            if name == current or not name.startswith(ARRAY_PREFIX + ".") or not name.endswith(".npy"):
+                continue
+            try:
+                os.remove(os.path.join(array_dir, name))
+            except OSError as e:
+                logger.debug(f"旧的检测数组文件仍在使用，稍后再删除 ({name}): {e}")
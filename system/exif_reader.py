@@ -0,0 +1,181 @@
+"""
+EXIF读取模块 - 只读取文件头中的EXIF段和图像尺寸并按需解析指定标签，不解码图像
+"""
+
+import struct
+import logging
+from typing import Dict, Optional, Iterable, BinaryIO, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+TAG_IMAGE_WIDTH = 256
+TAG_IMAGE_LENGTH = 257
+TAG_MAKE = 271
+TAG_MODEL = 272
+TAG_DATETIME = 306
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 36867
+
+DEFAULT_TAGS = (TAG_DATETIME_ORIGINAL, TAG_DATETIME)
+
+_TYPE_ASCII = 2
+_TYPE_SHORT = 3
+_TYPE_LONG = 4
+# JPEG 中没有长度字段的标记
+_STANDALONE_MARKERS = {0x01} | set(range(0xD0, 0xD8))
+# 帧头标记（SOF0-SOF15，不含 DHT、JPG、DAC）
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_MAX_IFD_ENTRIES = 1024
+
+
+class ImageHeader(NamedTuple):
+    """文件头中读取到的信息"""
+    tags: Dict[int, object]
+    size: Optional[Tuple[int, int]]
+    format: str
+
+
+class _TiffReader:
+    """在文件中按 TIFF 头的相对偏移读取 IFD"""
+
+    def __init__(self, f: BinaryIO, base: int, limit: Optional[int] = None):
+        self.f = f
+        self.base = base
+        self.limit = limit
+        f.seek(base)
+        header = f.read(8)
+        if len(header) < 8 or header[:2] not in (b"II", b"MM"):
+            raise ValueError("无效的TIFF头")
+        self.endian = "<" if header[:2] == b"II" else ">"
+        magic, self.first_ifd = struct.unpack(self.endian + "HI", header[2:8])
+        if magic != 42:
+            raise ValueError("无效的TIFF头")
+
+    def read(self, offset: int, size: int) -> bytes:
+        if self.limit is not None and offset + size > self.limit:
+            raise ValueError("EXIF偏移超出范围")
+        self.f.seek(self.base + offset)
+        data = self.f.read(size)
+        if len(data) < size:
+            raise ValueError("EXIF数据不完整")
+        return data
+
+    def entries(self, offset: int) -> Dict[int, tuple]:
+        """读取一个 IFD，返回 {标签: (类型, 数量, 值或偏移字段原始字节)}"""
+        count, = struct.unpack(self.endian + "H", self.read(offset, 2))
+        if count > _MAX_IFD_ENTRIES:
+            raise ValueError("IFD条目数异常")
+        data = self.read(offset + 2, 12 * count)
+        result = {}
+        for i in range(count):
+            tag, typ, n = struct.unpack_from(self.endian + "HHI", data, 12 * i)
+            result[tag] = (typ, n, data[12 * i + 8:12 * i + 12])
+        return result
+
+    def value(self, entry: tuple):
+        """解析 ASCII 以及单个 SHORT、LONG 类型的值，其他类型返回 None"""
+        typ, n, raw = entry
+        if typ == _TYPE_ASCII:
+            data = raw[:n] if n <= 4 else self.read(struct.unpack(self.endian + "I", raw)[0], n)
+            return data.split(b"\x00", 1)[0].decode("latin-1").strip()
+        if typ == _TYPE_SHORT and n == 1:
+            return struct.unpack(self.endian + "H", raw[:2])[0]
+        if typ == _TYPE_LONG and n == 1:
+            return struct.unpack(self.endian + "I", raw)[0]
+        return None
+
+    def tags(self, wanted: set, ifd0: Optional[Dict[int, tuple]] = None) -> Dict[int, object]:
+        """在 IFD0 和 Exif 子 IFD 中查找指定标签"""
+        result: Dict[int, object] = {}
+        if ifd0 is None:
+            ifd0 = self.entries(self.first_ifd)
+        for tag in wanted & ifd0.keys():
+            value = self.value(ifd0[tag])
+            if value is not None:
+                result[tag] = value
+        remaining = wanted - result.keys()
+        if remaining and TAG_EXIF_IFD in ifd0:
+            exif_offset = self.value(ifd0[TAG_EXIF_IFD])
+            if isinstance(exif_offset, int):
+                exif_ifd = self.entries(exif_offset)
+                for tag in remaining & exif_ifd.keys():
+                    value = self.value(exif_ifd[tag])
+                    if value is not None:
+                        result[tag] = value
+        return result
+
+
+def _scan_jpeg(f: BinaryIO, wanted: set) -> ImageHeader:
+    """依次跳过 JPEG 的各个段，解析 APP1 Exif 段中的标签和帧头中的尺寸，到图像数据开始处为止"""
+    tags: Dict[int, object] = {}
+    size = None
+    while size is None or (wanted and not tags):
+        byte = f.read(1)
+        if not byte:
+            break
+        if byte != b"\xff":
+            raise ValueError("JPEG标记无效")
+        marker = f.read(1)
+        while marker == b"\xff":
+            marker = f.read(1)
+        if not marker:
+            break
+        code = marker[0]
+        if code in _STANDALONE_MARKERS:
+            continue
+        # 图像数据开始或文件结束，之后不会再有 APP 段和帧头
+        if code in (0xDA, 0xD9):
+            break
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            break
+        length, = struct.unpack(">H", length_bytes)
+        if length < 2:
+            raise ValueError("JPEG段长度无效")
+        segment_end = f.tell() + length - 2
+        if code == 0xE1 and length >= 8 and not tags and f.read(6) == b"Exif\x00\x00":
+            tags = _TiffReader(f, f.tell(), length - 8).tags(wanted)
+        elif code in _SOF_MARKERS and length >= 7:
+            height, width = struct.unpack(">xHH", f.read(5))
+            size = (width, height)
+        f.seek(segment_end)
+    return ImageHeader(tags, size, "JPEG")
+
+
+def read_image_header(path: str, tags: Iterable[int] = DEFAULT_TAGS) -> Optional[ImageHeader]:
+    """只读取文件头，返回指定EXIF标签的值和图像尺寸
+
+    支持 JPEG 和 TIFF，标签可以位于 IFD0 或 Exif 子 IFD 中，只解析 ASCII 以及单个 SHORT、LONG 类型。
+
+    Args:
+        path: 图像文件路径
+        tags: 需要读取的标签
+
+    Returns:
+        文件头信息，tags 只包含找到的标签；文件格式不受支持时返回 None，调用方应改用其他方式读取
+
+    Raises:
+        OSError: 文件无法读取
+        ValueError: 文件头结构损坏
+    """
+    wanted = set(tags)
+    with open(path, "rb") as f:
+        head = f.read(4)
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            return _scan_jpeg(f, wanted)
+        if head in (b"II*\x00", b"MM\x00*"):
+            reader = _TiffReader(f, 0)
+            ifd0 = reader.entries(reader.first_ifd)
+            dims = reader.tags({TAG_IMAGE_WIDTH, TAG_IMAGE_LENGTH}, ifd0)
+            size = None
+            if len(dims) == 2:
+                size = (dims[TAG_IMAGE_WIDTH], dims[TAG_IMAGE_LENGTH])
+            return ImageHeader(reader.tags(wanted, ifd0), size, "TIFF")
+        return None
+
+
+def read_exif_tags(path: str, tags: Iterable[int] = DEFAULT_TAGS) -> Optional[Dict[int, object]]:
+    """只读取文件头中的EXIF，返回指定标签的值（见 read_image_header）"""
+    header = read_image_header(path, tags)
+    return header.tags if header is not None else None
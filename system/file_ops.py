@@ -0,0 +1,232 @@
+"""
+批量文件操作模块 - 在后台线程池中复制或链接图片，支持进度报告、取消和去重
+"""
+
+import os
+import sys
+import errno
+import shutil
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+# 文件放置方式
+# copy: 完整复制；hardlink: 硬链接（同一分区，不占额外空间）；
+# reflink: 写时复制克隆（Btrfs/XFS/APFS 等支持时），symlink: 符号链接
+LINK_MODES = {
+    'copy': '复制',
+    'hardlink': '硬链接',
+    'reflink': '写时复制',
+    'symlink': '符号链接',
+}
+DEFAULT_LINK_MODE = 'copy'
+
+# Linux FICLONE ioctl 请求码
+_FICLONE = 0x40049409
+
+
+def link_mode_from_label(label: str) -> str:
+    """根据界面显示的名称获取放置方式键名"""
+    for key, mode_label in LINK_MODES.items():
+        if mode_label == label:
+            return key
+    return DEFAULT_LINK_MODE
+
+
+def reflink_file(src: str, dst: str) -> None:
+    """以写时复制方式克隆文件，文件系统不支持时抛出 OSError"""
+    if sys.platform.startswith('linux'):
+        import fcntl
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            except OSError:
+                fdst.close()
+                os.remove(dst)
+                raise
+        shutil.copystat(src, dst)
+    elif sys.platform == 'darwin':
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+    else:
+        raise OSError(errno.EOPNOTSUPP, "当前平台不支持写时复制")
+
+
+def place_file(src: str, dst: str, mode: str = DEFAULT_LINK_MODE) -> str:
+    """按指定方式将文件放置到目标路径，链接失败时回退为复制
+
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径
+        mode: 放置方式，见 LINK_MODES
+
+    Returns:
+        实际使用的放置方式
+    """
+    if os.path.islink(dst):
+        # 替换指向其他文件的旧符号链接，避免复制时写入链接指向的文件
+        os.remove(dst)
+    if mode != 'copy':
+        try:
+            if mode == 'hardlink':
+                os.link(src, dst)
+            elif mode == 'reflink':
+                reflink_file(src, dst)
+            elif mode == 'symlink':
+                os.symlink(os.path.abspath(src), dst)
+            else:
+                raise ValueError(f"未知的放置方式: {mode}")
+            return mode
+        except (OSError, NotImplementedError) as e:
+            # 跨分区、文件系统不支持或没有创建链接的权限时回退为复制
+            logger.debug(f"{LINK_MODES.get(mode, mode)}失败，改为复制 ({os.path.basename(src)}): {e}")
+    # 保留修改时间，之后可据此识别已放置的副本
+    shutil.copy2(src, dst)
+    return 'copy'
+
+
+def target_present(src: str, dst: str) -> bool:
+    """判断目标路径是否已存在同一文件（链接到同一文件，或大小和修改时间都一致的副本）
+
+    只有大小相同不能说明是同一文件：同名同大小的其他照片（如另一文件夹分类到同一保存路径，
+    或相机编号重置）不能被跳过。
+    """
+    try:
+        if not os.path.lexists(dst):
+            return False
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            return True
+        src_stat, dst_stat = os.stat(src), os.stat(dst)
+        return src_stat.st_size == dst_stat.st_size and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+    except OSError:
+        return False
+
+
+class FileOpEngine:
+    """批量文件操作引擎
+
+    任务在线程池中执行，已存在的目标文件会被跳过；cancel 后尚未开始的任务不再执行。
+    """
+
+    def __init__(self, link_mode: str = DEFAULT_LINK_MODE, max_workers: int = 4,
+                 progress_callback: Optional[Callable[[int, int], None]] = None):
+        """初始化文件操作引擎
+
+        Args:
+            link_mode: 放置方式，见 LINK_MODES
+            max_workers: 工作线程数
+            progress_callback: 进度回调，参数为 (已完成数, 已提交数)，在工作线程中调用
+        """
+        self.link_mode = link_mode if link_mode in LINK_MODES else DEFAULT_LINK_MODE
+        self.progress_callback = progress_callback
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="file-ops")
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._done = 0
+        self._skipped = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._methods: Dict[str, int] = {}
+        self._failed_files = []
+        self._cancelled_files = []
+        self._claimed = set()
+
+    def submit(self, src: str, dst_dir: str, dst_name: Optional[str] = None) -> None:
+        """提交一个文件放置任务
+
+        Args:
+            src: 源文件路径
+            dst_dir: 目标目录（不存在时自动创建）
+            dst_name: 目标文件名，默认与源文件相同
+        """
+        with self._lock:
+            self._submitted += 1
+        self._executor.submit(self._run, src, dst_dir, dst_name or os.path.basename(src))
+
+    def _run(self, src: str, dst_dir: str, dst_name: str) -> None:
+        if self._cancel_event.is_set():
+            with self._lock:
+                self._cancelled += 1
+                self._cancelled_files.append(src)
+            return
+        try:
+            os.makedirs(dst_dir, exist_ok=True)
+            dst = os.path.join(dst_dir, dst_name)
+            with self._lock:
+                # 同一批任务中重复提交的目标只处理一次
+                duplicate = dst in self._claimed
+                self._claimed.add(dst)
+            if duplicate or target_present(src, dst):
+                with self._lock:
+                    self._skipped += 1
+            else:
+                method = place_file(src, dst, self.link_mode)
+                with self._lock:
+                    self._methods[method] = self._methods.get(method, 0) + 1
+        except Exception as e:
+            logger.error(f"文件操作失败 ({src} -> {dst_dir}): {e}")
+            with self._lock:
+                self._failed += 1
+                self._failed_files.append(src)
+        finally:
+            with self._lock:
+                self._done += 1
+                done, submitted = self._done, self._submitted
+            if self.progress_callback:
+                try:
+                    self.progress_callback(done, submitted)
+                except Exception as e:
+                    logger.debug(f"文件操作进度回调失败: {e}")
+
+    def cancel(self) -> None:
+        """取消尚未开始的任务"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已取消"""
+        return self._cancel_event.is_set()
+
+    def close(self, wait: bool = True) -> Dict[str, Any]:
+        """关闭线程池
+
+        Args:
+            wait: 是否等待已提交的任务完成
+
+        Returns:
+            文件操作统计
+        """
+        self._executor.shutdown(wait=wait)
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        """生成文件操作统计"""
+        with self._lock:
+            return {
+                'file_ops_link_mode': self.link_mode,
+                'file_ops_submitted': self._submitted,
+                'file_ops_placed': dict(self._methods),
+                'file_ops_skipped': self._skipped,
+                'file_ops_failed': self._failed,
+                'file_ops_cancelled': self._cancelled,
+            }
+
+    @property
+    def failed_files(self):
+        """放置失败的源文件列表"""
+        with self._lock:
+            return list(self._failed_files)
+
+    @property
+    def cancelled_files(self):
+        """因取消而未执行的源文件列表"""
+        with self._lock:
+            return list(self._cancelled_files)
@@ -0,0 +1,163 @@
+"""
+文件夹索引模块 - 持久化记录图像文件夹的文件列表，目录未变化时免去重新列出目录
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from system.config import SUPPORTED_IMAGE_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "folder_index.json"
+INDEX_VERSION = 1
+# 目录修改时间与扫描时间过于接近时，同一时间粒度内的后续修改可能无法察觉，下次需重新扫描
+_MTIME_GRACE = 2.0
+
+
+class FolderIndex:
+    """图像文件夹索引
+
+    记录目录的修改时间以及每个图像文件的大小和修改时间。刷新时先只检查目录本身，
+    目录修改时间不变（没有文件增删或重命名）时直接使用已有列表，否则重新扫描目录，
+    并只统计大小或修改时间发生变化的文件。
+    """
+
+    _instances: Dict[str, 'FolderIndex'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, directory: str, index_path: Optional[str] = None):
+        """初始化文件夹索引（一般通过 FolderIndex.open 获取共享实例）
+
+        Args:
+            directory: 图像文件夹
+            index_path: 索引文件保存路径，为 None 时不持久化
+        """
+        self.directory = directory
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._dir_mtime: Optional[int] = None
+        self._scanned_at = 0.0
+        self._entries: Dict[str, Tuple[int, float]] = {}
+        self._files: List[str] = []
+        self._basename_map: Dict[str, str] = {}
+        self._load()
+
+    @classmethod
+    def open(cls, directory: str, project_dir: Optional[str] = None) -> 'FolderIndex':
+        """获取图像文件夹对应的共享索引实例
+
+        Args:
+            directory: 图像文件夹
+            project_dir: 项目临时目录，索引文件保存在其中
+        """
+        key = os.path.normcase(os.path.abspath(directory))
+        with cls._instances_lock:
+            index = cls._instances.get(key)
+            if index is None:
+                index_path = os.path.join(project_dir, INDEX_FILE) if project_dir else None
+                index = cls(directory, index_path)
+                cls._instances[key] = index
+            return index
+
+    @classmethod
+    def forget_all(cls) -> None:
+        """丢弃所有内存中的索引（删除缓存目录后调用）"""
+        with cls._instances_lock:
+            cls._instances.clear()
+
+    def _load(self) -> None:
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return
+            self._dir_mtime = data.get('dir_mtime')
+            self._scanned_at = data.get('scanned_at', 0.0)
+            self._set_entries({name: tuple(sig) for name, sig in data.get('entries', {}).items()})
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"读取文件夹索引失败，将重新扫描: {e}")
+            self._dir_mtime = None
+
+    def _save(self) -> None:
+        if not self.index_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION, 'directory': self.directory, 'dir_mtime': self._dir_mtime,
+                           'scanned_at': self._scanned_at,
+                           'entries': {name: list(sig) for name, sig in self._entries.items()}},
+                          f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"保存文件夹索引失败: {e}")
+
+    def _set_entries(self, entries: Dict[str, Tuple[int, float]]) -> None:
+        self._entries = entries
+        self._files = sorted(entries)
+        self._basename_map = {os.path.splitext(f)[0]: f for f in self._files}
+
+    def refresh(self) -> int:
+        """检查目录是否变化，变化时重新扫描
+
+        Returns:
+            新增、删除或被修改的文件数，目录未变化时为 0
+
+        Raises:
+            FileNotFoundError: 目录不存在
+        """
+        with self._lock:
+            dir_mtime = os.stat(self.directory).st_mtime_ns
+            if (dir_mtime == self._dir_mtime
+                    and dir_mtime / 1e9 < self._scanned_at - _MTIME_GRACE):
+                return 0
+
+            scanned_at = time.time()
+            entries: Dict[str, Tuple[int, float]] = {}
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries[entry.name] = (stat.st_size, round(stat.st_mtime, 3))
+
+            changed = sum(1 for name, sig in entries.items() if self._entries.get(name) != sig)
+            changed += sum(1 for name in self._entries if name not in entries)
+            self._dir_mtime = dir_mtime
+            self._scanned_at = scanned_at
+            if changed:
+                self._set_entries(entries)
+            self._save()
+            if changed:
+                logger.info(f"文件夹索引已更新 ({self.directory}): {changed} 个文件有变化")
+            return changed
+
+    def image_files(self) -> List[str]:
+        """刷新并返回排序后的图像文件名列表"""
+        self.refresh()
+        with self._lock:
+            return list(self._files)
+
+    def basename_map(self) -> Dict[str, str]:
+        """刷新并返回 {不含扩展名的文件名: 文件名} 映射"""
+        self.refresh()
+        with self._lock:
+            return dict(self._basename_map)
+
+    def signature(self, filename: str) -> Optional[Tuple[int, float]]:
+        """返回索引中记录的 (大小, 修改时间)，不在索引中时返回 None"""
+        with self._lock:
+            return self._entries.get(filename)
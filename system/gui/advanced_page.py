@@ -10,7 +10,10 @@ import sys
 
 from system.gui.ui_components import CollapsiblePanel
 from system.utils import resource_path
-from system.config import APP_VERSION
+from system.config import APP_VERSION, INDEPENDENT_DETECTION_THRESHOLD
+from system.result_encoder import RESULT_IMAGE_DEFAULTS
+from system.file_ops import LINK_MODES, DEFAULT_LINK_MODE
+from system.cache_manager import DEFAULT_CACHE_LIMIT_MB, format_size
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,16 @@ class AdvancedPage(ttk.Frame):
         self.controller.use_fp16_var = tk.BooleanVar(value=self.controller.cuda_available)
         self.controller.use_augment_var = tk.BooleanVar(value=True)
         self.controller.use_agnostic_nms_var = tk.BooleanVar(value=True)
+        self.controller.memory_budget_var = tk.IntVar(value=4096)
+        self.controller.max_inflight_var = tk.IntVar(value=4)
+        self.controller.pin_affinity_var = tk.BooleanVar(value=False)
+        self.controller.result_max_dim_var = tk.IntVar(value=RESULT_IMAGE_DEFAULTS['max_dim'])
+        self.controller.result_quality_var = tk.IntVar(value=RESULT_IMAGE_DEFAULTS['quality'])
+        self.controller.result_skip_empty_var = tk.BooleanVar(value=RESULT_IMAGE_DEFAULTS['skip_empty'])
+        self.controller.result_lazy_var = tk.BooleanVar(value=RESULT_IMAGE_DEFAULTS['lazy'])
+        self.controller.file_link_mode_var = tk.StringVar(value=LINK_MODES[DEFAULT_LINK_MODE])
+        self.controller.cache_limit_var = tk.IntVar(value=DEFAULT_CACHE_LIMIT_MB)
+        self.controller.independent_interval_var = tk.IntVar(value=INDEPENDENT_DETECTION_THRESHOLD // 60)
 
         # Theme variable
         self.theme_var = tk.StringVar(value="自动")
@@ -41,8 +54,8 @@ class AdvancedPage(ttk.Frame):
         self.is_dark_mode = self.controller.is_dark_mode
         # 更新所有可折叠面板
         panels = [
-            self.threshold_panel, self.accel_panel, self.advanced_detect_panel,
-            self.pytorch_panel, self.model_panel, self.python_panel,
+            self.threshold_panel, self.accel_panel, self.advanced_detect_panel, self.memory_panel,
+            self.result_image_panel, self.file_ops_panel, self.independent_panel, self.pytorch_panel, self.model_panel, self.python_panel,
             self.theme_panel, self.cache_panel, self.update_panel
         ]
         for panel in panels:
@@ -119,7 +132,7 @@ class AdvancedPage(ttk.Frame):
         self.cache_panel = CollapsiblePanel(
             self.software_content_frame,
             "缓存管理",
-            subtitle="清除应用程序生成的临时文件",
+            subtitle="限制和清除应用程序生成的临时文件",
             icon="🗑️"
         )
         self.cache_panel.pack(fill="x", expand=False, pady=(0, 1))
@@ -131,13 +144,31 @@ class AdvancedPage(ttk.Frame):
         cache_info_label = ttk.Label(cache_action_frame, textvariable=self.cache_size_var)
         cache_info_label.grid(row=0, column=0, sticky='w', pady=(0, 10))
 
+        limit_frame = ttk.Frame(cache_action_frame)
+        limit_frame.grid(row=1, column=0, sticky='ew', pady=(0, 5))
+        ttk.Label(limit_frame, text="缓存上限 (MB)").pack(side="left")
+        ttk.Spinbox(
+            limit_frame,
+            from_=0,
+            to=1048576,
+            increment=1024,
+            textvariable=self.controller.cache_limit_var,
+            width=10
+        ).pack(side="right")
+        ttk.Label(
+            cache_action_frame,
+            text="超出上限时自动删除最久未使用的文件夹缓存，含校验结果的文件夹会被保留；0 表示不限制",
+            font=("Segoe UI", 8),
+            foreground="#888888"
+        ).grid(row=2, column=0, sticky='w', pady=(0, 10))
+
         buttons_container = ttk.Frame(cache_action_frame)
-        buttons_container.grid(row=1, column=0, sticky='e')
+        buttons_container.grid(row=3, column=0, sticky='e')
 
         refresh_button = ttk.Button(
             buttons_container,
             text="刷新大小",
-            command=self.update_cache_size,
+            command=lambda: self.update_cache_size(rescan=True),
             style="Secondary.TButton"
         )
         refresh_button.pack(side='left', padx=(0, 5))
@@ -190,44 +221,29 @@ class AdvancedPage(ttk.Frame):
         self._configure_software_scrolling()
         self.master.after(100, lambda: self.software_canvas.yview_moveto(0.0))
 
-    def update_cache_size(self):
-        """Calculates and updates the cache size display in a separate thread."""
-        self.cache_size_var.set("缓存大小: 正在计算...")
-        self.master.update_idletasks()
+    def update_cache_size(self, rescan=False):
+        """更新缓存大小显示
 
-        def get_dir_size(path):
-            total_size = 0
-            try:
-                for dirpath, dirnames, filenames in os.walk(path):
-                    for f in filenames:
-                        fp = os.path.join(dirpath, f)
-                        if not os.path.islink(fp):
-                            total_size += os.path.getsize(fp)
-            except FileNotFoundError:
-                return 0  # Path doesn't exist
-            return total_size
+        Args:
+            rescan: 是否在后台重新统计整个缓存目录，否则直接使用缓存索引中累计的大小
+        """
+        cache_manager = self.controller.cache_manager
+        if not rescan and cache_manager.indexed:
+            self.cache_size_var.set(f"缓存大小: {format_size(cache_manager.total_size())}")
+            return
 
-        def size_thread():
-            cache_dir = os.path.join(self.controller.settings_manager.base_dir, "temp", "photo")
-            size_in_bytes = get_dir_size(cache_dir)
-
-            if size_in_bytes < 1024:
-                size_str = f"{size_in_bytes} Bytes"
-            elif size_in_bytes < 1024 ** 2:
-                size_str = f"{size_in_bytes / 1024:.2f} KB"
-            elif size_in_bytes < 1024 ** 3:
-                size_str = f"{size_in_bytes / 1024 ** 2:.2f} MB"
-            else:
-                size_str = f"{size_in_bytes / 1024 ** 3:.2f} GB"
+        self.cache_size_var.set("缓存大小: 正在计算...")
 
-            if self.winfo_exists():
-                self.cache_size_var.set(f"缓存大小: {size_str}")
+        def size_thread():
+            cache_manager.rebuild()
+            size_str = format_size(cache_manager.total_size())
+            self.master.after(0, lambda: self.winfo_exists() and self.cache_size_var.set(f"缓存大小: {size_str}"))
 
-        self.master.after(500, lambda: threading.Thread(target=size_thread, daemon=True).start())
+        threading.Thread(target=size_thread, daemon=True).start()
 
     def _clear_image_cache_with_refresh(self):
+        # 缓存在后台删除，删除完成后由 clear_image_cache 刷新大小显示
         self.controller.clear_image_cache()
-        self.master.after(500, self.update_cache_size)
 
     def _configure_software_scrolling(self):
         """配置软件设置页面的滚动"""
@@ -379,6 +395,156 @@ class AdvancedPage(ttk.Frame):
         )
         agnostic_check.pack(anchor="w")
 
+        self.memory_panel = CollapsiblePanel(
+            self.params_content_frame,
+            "资源管理",
+            subtitle="限制批处理的内存与CPU占用，保持界面流畅",
+            icon="🧠"
+        )
+        self.memory_panel.pack(fill="x", expand=False, pady=(0, 1))
+
+        budget_frame = ttk.Frame(self.memory_panel.content_padding)
+        budget_frame.pack(fill="x", pady=5)
+        ttk.Label(budget_frame, text="内存预算 (MB)").pack(side="left")
+        ttk.Spinbox(
+            budget_frame,
+            from_=1024,
+            to=65536,
+            increment=512,
+            textvariable=self.controller.memory_budget_var,
+            width=10
+        ).pack(side="right")
+
+        inflight_frame = ttk.Frame(self.memory_panel.content_padding)
+        inflight_frame.pack(fill="x", pady=5)
+        ttk.Label(inflight_frame, text="最大在途帧数").pack(side="left")
+        ttk.Spinbox(
+            inflight_frame,
+            from_=1,
+            to=32,
+            increment=1,
+            textvariable=self.controller.max_inflight_var,
+            width=10
+        ).pack(side="right")
+        ttk.Label(
+            self.memory_panel.content_padding,
+            text="超出预算时暂停读取新图像并回收内存，每次运行的内存峰值记录在 temp/run_metrics.json",
+            font=("Segoe UI", 8),
+            foreground="#888888"
+        ).pack(anchor="w", pady=(2, 0))
+
+        affinity_frame = ttk.Frame(self.memory_panel.content_padding)
+        affinity_frame.pack(fill="x", pady=5)
+        ttk.Checkbutton(
+            affinity_frame,
+            text="交互优先模式下将处理线程绑定到其余CPU核心 (保留第一个核心给界面)",
+            variable=self.controller.pin_affinity_var
+        ).pack(anchor="w")
+        ttk.Label(
+            self.memory_panel.content_padding,
+            text="交互优先模式会降低处理线程的优先级；优先级和核心绑定只作用于处理线程，torch 计算线程只受线程数限制。"
+                 "Linux 下普通用户降低优先级后无法恢复，此时不降低优先级",
+            font=("Segoe UI", 8),
+            foreground="#888888",
+            wraplength=520
+        ).pack(anchor="w", pady=(2, 0))
+
+        self.result_image_panel = CollapsiblePanel(
+            self.params_content_frame,
+            "结果图片",
+            subtitle="设置探测结果图片的尺寸、质量和生成方式",
+            icon="🖼"
+        )
+        self.result_image_panel.pack(fill="x", expand=False, pady=(0, 1))
+
+        max_dim_frame = ttk.Frame(self.result_image_panel.content_padding)
+        max_dim_frame.pack(fill="x", pady=5)
+        ttk.Label(max_dim_frame, text="最大边长 (像素，0为原始尺寸)").pack(side="left")
+        ttk.Spinbox(
+            max_dim_frame,
+            from_=0,
+            to=8192,
+            increment=320,
+            textvariable=self.controller.result_max_dim_var,
+            width=10
+        ).pack(side="right")
+
+        quality_frame = ttk.Frame(self.result_image_panel.content_padding)
+        quality_frame.pack(fill="x", pady=5)
+        ttk.Label(quality_frame, text="JPEG质量").pack(side="left")
+        ttk.Spinbox(
+            quality_frame,
+            from_=50,
+            to=100,
+            increment=5,
+            textvariable=self.controller.result_quality_var,
+            width=10
+        ).pack(side="right")
+
+        result_options_frame = ttk.Frame(self.result_image_panel.content_padding)
+        result_options_frame.pack(fill="x", pady=5)
+        ttk.Checkbutton(
+            result_options_frame,
+            text="跳过未检测到物种的图片",
+            variable=self.controller.result_skip_empty_var
+        ).pack(anchor="w")
+        ttk.Checkbutton(
+            result_options_frame,
+            text="按需生成 (处理时只保存检测框，在预览页导出\"结果图片\"时生成)",
+            variable=self.controller.result_lazy_var
+        ).pack(anchor="w", pady=(5, 0))
+
+        self.file_ops_panel = CollapsiblePanel(
+            self.params_content_frame,
+            "文件整理",
+            subtitle="设置按物种分类和导出错误照片时的文件放置方式",
+            icon="📁"
+        )
+        self.file_ops_panel.pack(fill="x", expand=False, pady=(0, 1))
+
+        link_mode_frame = ttk.Frame(self.file_ops_panel.content_padding)
+        link_mode_frame.pack(fill="x", pady=5)
+        ttk.Label(link_mode_frame, text="放置方式").pack(side="left")
+        ttk.Combobox(
+            link_mode_frame,
+            textvariable=self.controller.file_link_mode_var,
+            values=list(LINK_MODES.values()),
+            width=10,
+            state="readonly"
+        ).pack(side="right")
+        ttk.Label(
+            self.file_ops_panel.content_padding,
+            text="硬链接和写时复制不占用额外磁盘空间；不支持时自动改为复制，目标中已存在的图片会被跳过",
+            font=("Segoe UI", 8),
+            foreground="#888888"
+        ).pack(anchor="w", pady=(2, 0))
+
+        self.independent_panel = CollapsiblePanel(
+            self.params_content_frame,
+            "独立探测",
+            subtitle="设置同一物种两次探测视为相互独立的最短时间间隔",
+            icon="⏱"
+        )
+        self.independent_panel.pack(fill="x", expand=False, pady=(0, 1))
+
+        interval_frame = ttk.Frame(self.independent_panel.content_padding)
+        interval_frame.pack(fill="x", pady=5)
+        ttk.Label(interval_frame, text="时间间隔 (分钟)").pack(side="left")
+        ttk.Spinbox(
+            interval_frame,
+            from_=1,
+            to=1440,
+            increment=5,
+            textvariable=self.controller.independent_interval_var,
+            width=10
+        ).pack(side="right")
+        ttk.Label(
+            self.independent_panel.content_padding,
+            text="同一物种与上一次探测的间隔超过该值时标记为独立探测首只，导出表格时生效",
+            font=("Segoe UI", 8),
+            foreground="#888888"
+        ).pack(anchor="w", pady=(2, 0))
+
         bottom_frame = ttk.Frame(main_frame)
         bottom_frame.grid(row=1, column=0, columnspan=2, sticky="ew", pady=10)
         separator = ttk.Separator(bottom_frame, orient="horizontal")
@@ -400,7 +566,8 @@ class AdvancedPage(ttk.Frame):
         )
         reset_button.pack(side="right", padx=5)
 
-        for panel in [self.threshold_panel, self.accel_panel, self.advanced_detect_panel]:
+        for panel in [self.threshold_panel, self.accel_panel, self.advanced_detect_panel, self.memory_panel,
+                      self.result_image_panel, self.file_ops_panel, self.independent_panel]:
             panel.bind_toggle_callback(self._on_panel_toggle)
         self._configure_params_scrolling()
         self.master.after(100, lambda: self.params_canvas.yview_moveto(0.0))
@@ -674,6 +841,15 @@ class AdvancedPage(ttk.Frame):
         self.controller.use_fp16_var.set(self.controller.cuda_available)
         self.controller.use_augment_var.set(True)
         self.controller.use_agnostic_nms_var.set(True)
+        self.controller.memory_budget_var.set(4096)
+        self.controller.max_inflight_var.set(4)
+        self.controller.pin_affinity_var.set(False)
+        self.controller.result_max_dim_var.set(RESULT_IMAGE_DEFAULTS['max_dim'])
+        self.controller.result_quality_var.set(RESULT_IMAGE_DEFAULTS['quality'])
+        self.controller.result_skip_empty_var.set(RESULT_IMAGE_DEFAULTS['skip_empty'])
+        self.controller.result_lazy_var.set(RESULT_IMAGE_DEFAULTS['lazy'])
+        self.controller.file_link_mode_var.set(LINK_MODES[DEFAULT_LINK_MODE])
+        self.controller.independent_interval_var.set(INDEPENDENT_DETECTION_THRESHOLD // 60)
         # self.controller.status_bar.show_message("已重置所有参数到默认值", 3000)
 
     def _check_pytorch_status(self) -> None:
@@ -0,0 +1,118 @@
+"""
+后台任务模块 - 在工作线程中运行耗时任务，进度、剩余时间和取消按钮显示在信息栏，结果在界面线程中交付
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+from system.gui.ui_update_channel import UIUpdateChannel
+
+logger = logging.getLogger(__name__)
+
+
+def format_eta(seconds: float) -> str:
+    """将剩余秒数格式化为 时:分:秒 或 分:秒"""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+class BackgroundJob:
+    """在工作线程中运行的可取消任务
+
+    work 在工作线程中执行，通过 progress 报告进度，并应定期检查 stop_event；
+    进度经界面更新通道合并后显示在信息栏（百分比进度条和剩余时间），
+    任务结束后 on_done（或 on_error）在界面线程中以任务结果调用。
+    """
+
+    def __init__(self, master, status_bar, title: str, work: Callable[['BackgroundJob'], Any],
+                 on_done: Callable[[Any], None], on_error: Optional[Callable[[Exception], None]] = None):
+        """初始化后台任务
+
+        Args:
+            master: Tk 根窗口
+            status_bar: 信息栏（InfoBar）
+            title: 任务名称，显示在状态文本中
+            work: 任务函数，参数为任务本身，返回值交给 on_done
+            on_done: 任务完成（包括被取消）后在界面线程中调用，参数为 work 的返回值
+            on_error: work 抛出异常时在界面线程中调用
+        """
+        self.status_bar = status_bar
+        self.title = title
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.stop_event = threading.Event()
+        self._channel = UIUpdateChannel(master)
+        self._thread: Optional[threading.Thread] = None
+        self._stage = ""
+        self._stage_started = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.stop_event.is_set()
+
+    def start(self) -> None:
+        """开始任务，必须在界面线程中调用"""
+        self.status_bar.start_job(f"{self.title}...", self.cancel)
+        self._channel.start()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"job-{self.title}")
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """请求取消任务，任务在下一次检查 stop_event 时停止"""
+        if not self.stop_event.is_set():
+            self.stop_event.set()
+            self.status_bar.job_cancel_button.config(state="disabled")
+            self.status_bar.status_label.config(text=f"{self.title}: 正在取消...")
+
+    def progress(self, stage: str, done: int, total: Optional[int]) -> None:
+        """报告当前阶段的进度，可在工作线程中频繁调用
+
+        Args:
+            stage: 阶段名称，阶段变化时重新开始计算剩余时间
+            done: 已完成数量
+            total: 总数量，未知时为 None
+        """
+        now = time.monotonic()
+        if stage != self._stage:
+            self._stage = stage
+            self._stage_started = now
+        text = f"{self.title}: {stage}"
+        fraction = 0.0
+        if total:
+            fraction = done / total
+            text += f" {done}/{total}"
+            elapsed = now - self._stage_started
+            if 0 < done < total and elapsed > 1:
+                text += f"，剩余 {format_eta(elapsed / done * (total - done))}"
+        elif done:
+            text += f" {done}"
+        self._channel.post('progress', self.status_bar.update_job, text, fraction)
+
+    def _run(self) -> None:
+        try:
+            result = self.work(self)
+        except Exception as e:
+            logger.error(f"{self.title}失败: {e}")
+            self._channel.post('done', self._finish_error, e)
+        else:
+            self._channel.post('done', self._finish, result)
+        finally:
+            self._channel.stop()
+
+    def _finish(self, result: Any) -> None:
+        self.status_bar.end_job(f"{self.title}已取消" if self.cancelled else f"{self.title}完成")
+        self.on_done(result)
+
+    def _finish_error(self, error: Exception) -> None:
+        self.status_bar.end_job(f"{self.title}失败")
+        if self.on_error:
+            self.on_error(error)
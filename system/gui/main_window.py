@@ -11,17 +11,28 @@ from datetime import datetime
 import gc
 import sv_ttk
 import hashlib
-import shutil
 from PIL import Image, ImageTk
 import ctypes
 from ctypes import wintypes
 
-from system.config import APP_TITLE, APP_VERSION, SUPPORTED_IMAGE_EXTENSIONS
+from system.config import APP_TITLE, APP_VERSION, INDEPENDENT_DETECTION_THRESHOLD
 from system.utils import resource_path
 from system.image_processor import ImageProcessor
-from system.metadata_extractor import ImageMetadataExtractor
+from system.metadata_extractor import ImageMetadataExtractor, CAMERA_FIELD
 from system.data_processor import DataProcessor
 from system.settings_manager import SettingsManager
+from system.processing_manifest import ProcessingManifest
+from system.memory_governor import MemoryGovernor
+from system.result_encoder import ResultImageEncoder, RESULT_IMAGE_DEFAULTS
+from system.result_store import ResultStore
+from system.detection_arrays import DetectionArrays
+from system.folder_index import FolderIndex
+from system.cache_manager import CacheManager, DEFAULT_CACHE_LIMIT_MB, format_size
+from system.metadata_cache import MetadataCache, CACHE_FILE as METADATA_CACHE_FILE
+from system.taxonomy import Taxonomy
+from system.live_export import LiveExport, LIVE_EXPORT_FILENAME
+from system.file_ops import FileOpEngine, LINK_MODES, DEFAULT_LINK_MODE, link_mode_from_label
+from system.resource_governor import ResourceGovernor, preset_from_label, preset_label, DEFAULT_RESOURCE_PRESET
 from system.update_checker import check_for_updates, get_latest_version_info, compare_versions, start_download_thread, \
     _show_messagebox
 
@@ -32,6 +43,8 @@ from system.gui.preview_page import PreviewPage
 from system.gui.advanced_page import AdvancedPage
 from system.gui.about_page import AboutPage
 from system.gui.ui_components import InfoBar
+from system.gui.ui_update_channel import UIUpdateChannel
+from system.gui.preview_renderer import LivePreviewRenderer
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +67,18 @@ class ObjectDetectionGUI:
         self.is_processing = False
         self.processing_stop_flag = threading.Event()
         self.excel_data = []
+        self.processing_manifest = None
+        self.resource_governor = ResourceGovernor()
+        self.cache_manager = CacheManager(os.path.join(self.settings_manager.base_dir, "temp", "photo"),
+                                          before_delete=self._release_project_files)
+        threading.Thread(target=self.cache_manager.ensure_index, daemon=True).start()
+        # 元数据缓存不随图片缓存清除，文件大小或修改时间变化时自动失效
+        self.metadata_cache = MetadataCache.open(os.path.join(self.settings_manager.base_dir, "temp",
+                                                              METADATA_CACHE_FILE))
+        # 物种分类索引（翻译、按钮列表、鸟类名录）编译后缓存在临时目录，资源文件变化时重新编译
+        Taxonomy.load(os.path.join(self.settings_manager.base_dir, "temp"))
+        self.ui_channel = UIUpdateChannel(self.master)
+        self.preview_renderer = LivePreviewRenderer(self.ui_channel, self._show_live_result)
         self.current_page = "settings"
         self.update_channel_var = tk.StringVar(value="稳定版 (Release)")
         self.model_var = tk.StringVar()  # <<< 新增：用于跟踪所选模型的变量
@@ -446,17 +471,35 @@ class ObjectDetectionGUI:
         self.preview_page.show_detection_var.trace("w", self.preview_page.toggle_detection_preview)
         self.start_page.save_detect_image_var.trace("w", lambda *args: self._save_current_settings())
         self.start_page.copy_img_var.trace("w", lambda *args: self._save_current_settings())
+        self.start_page.live_export_var.trace("w", lambda *args: self._save_current_settings())
+        self.start_page.resource_preset_var.trace("w", lambda *args: self._on_resource_policy_changed())
+        self.advanced_page.controller.pin_affinity_var.trace("w", lambda *args: self._on_resource_policy_changed())
         self.advanced_page.controller.use_fp16_var.trace("w", lambda *args: self._save_current_settings())
         self.advanced_page.controller.iou_var.trace("w", lambda *args: self._save_current_settings())
         self.advanced_page.controller.conf_var.trace("w", lambda *args: self._save_current_settings())
         self.advanced_page.controller.use_augment_var.trace("w", lambda *args: self._save_current_settings())
         self.advanced_page.controller.use_agnostic_nms_var.trace("w", lambda *args: self._save_current_settings())
+        self.advanced_page.controller.memory_budget_var.trace("w", lambda *args: self._save_current_settings())
+        self.advanced_page.controller.max_inflight_var.trace("w", lambda *args: self._save_current_settings())
+        self.advanced_page.controller.result_max_dim_var.trace("w", lambda *args: self._save_current_settings())
+        self.advanced_page.controller.result_quality_var.trace("w", lambda *args: self._save_current_settings())
+        self.advanced_page.controller.result_skip_empty_var.trace("w", lambda *args: self._save_current_settings())
+        self.advanced_page.controller.result_lazy_var.trace("w", lambda *args: self._save_current_settings())
+        self.advanced_page.controller.file_link_mode_var.trace("w", lambda *args: self._save_current_settings())
+        self.advanced_page.controller.cache_limit_var.trace("w", lambda *args: self._on_cache_limit_changed())
+        self.advanced_page.controller.independent_interval_var.trace("w", lambda *args: self._save_current_settings())
         self.update_channel_var.trace("w", lambda *args: self._save_current_settings())
         self.preview_page.export_format_var.trace("w", lambda *args: self._save_current_settings())
 
         self.master.bind("<Up>", self._navigate_image_up)
         self.master.bind("<Down>", self._navigate_image_down)
 
+    def _on_resource_policy_changed(self):
+        """资源策略变化时通知调控器（处理过程中也可切换，下一帧生效）并保存设置。"""
+        self.resource_governor.request_preset(preset_from_label(self.start_page.resource_preset_var.get()),
+                                              self.advanced_page.controller.pin_affinity_var.get())
+        self._save_current_settings()
+
     def _save_current_settings(self):
         if not self.settings_manager: return
         settings = self._get_current_settings()
@@ -467,11 +510,22 @@ class ObjectDetectionGUI:
                     "save_path": self.start_page.save_path_entry.get(),
                     "save_detect_image": self.start_page.save_detect_image_var.get(),
                     "copy_img": self.start_page.copy_img_var.get(),
+                    "live_export": self.start_page.live_export_var.get(),
                     "use_fp16": self.advanced_page.controller.use_fp16_var.get(),
                     "iou": self.advanced_page.controller.iou_var.get(),
                     "conf": self.advanced_page.controller.conf_var.get(),
                     "use_augment": self.advanced_page.controller.use_augment_var.get(),
                     "use_agnostic_nms": self.advanced_page.controller.use_agnostic_nms_var.get(),
+                    "memory_budget_mb": self._get_int_var(self.advanced_page.controller.memory_budget_var, 4096),
+                    "max_inflight_frames": self._get_int_var(self.advanced_page.controller.max_inflight_var, 4),
+                    "resource_preset": preset_from_label(self.start_page.resource_preset_var.get()),
+                    "pin_affinity": self.advanced_page.controller.pin_affinity_var.get(),
+                    "result_image": self.get_result_image_settings(),
+                    "file_link_mode": self.get_file_link_mode(),
+                    "cache_limit_mb": self._get_int_var(self.advanced_page.controller.cache_limit_var,
+                                                        DEFAULT_CACHE_LIMIT_MB),
+                    "independent_interval_min": self._get_int_var(self.advanced_page.controller.independent_interval_var,
+                                                                  INDEPENDENT_DETECTION_THRESHOLD // 60),
                     "update_channel": self.update_channel_var.get(),
                     "theme": self.advanced_page.theme_var.get(),
                     "selected_model": self.model_var.get()}
@@ -481,6 +535,34 @@ class ObjectDetectionGUI:
 
         return settings
 
+    def get_result_image_settings(self):
+        """读取结果图片的输出设置"""
+        controller = self.advanced_page.controller
+        return {
+            'max_dim': self._get_int_var(controller.result_max_dim_var, RESULT_IMAGE_DEFAULTS['max_dim']),
+            'quality': self._get_int_var(controller.result_quality_var, RESULT_IMAGE_DEFAULTS['quality']),
+            'skip_empty': controller.result_skip_empty_var.get(),
+            'lazy': controller.result_lazy_var.get(),
+        }
+
+    def get_file_link_mode(self):
+        """读取按物种分类和导出错误照片时的文件放置方式"""
+        return link_mode_from_label(self.advanced_page.controller.file_link_mode_var.get())
+
+    def get_independent_threshold(self):
+        """读取独立探测的时间间隔（秒）"""
+        minutes = self._get_int_var(self.advanced_page.controller.independent_interval_var,
+                                    INDEPENDENT_DETECTION_THRESHOLD // 60)
+        return max(minutes, 1) * 60
+
+    @staticmethod
+    def _get_int_var(var, default):
+        """读取整数输入框变量，内容无效（如正在输入）时返回默认值。"""
+        try:
+            return int(var.get())
+        except (tk.TclError, ValueError):
+            return default
+
     def _load_settings_to_ui(self, settings: dict):
         if not settings:
             return
@@ -498,6 +580,7 @@ class ObjectDetectionGUI:
                 self.start_page.save_path_entry.insert(0, settings["save_path"])
             self.start_page.save_detect_image_var.set(settings.get("save_detect_image", True))
             self.start_page.copy_img_var.set(settings.get("copy_img", False))
+            self.start_page.live_export_var.set(settings.get("live_export", False))
             self.advanced_page.controller.use_fp16_var.set(settings.get("use_fp16", False))
             iou_value = settings.get("iou", 0.3)
             conf_value = settings.get("conf", 0.25)
@@ -507,6 +590,21 @@ class ObjectDetectionGUI:
             self.advanced_page._update_conf_label(conf_value)
             self.advanced_page.controller.use_augment_var.set(settings.get("use_augment", True))
             self.advanced_page.controller.use_agnostic_nms_var.set(settings.get("use_agnostic_nms", True))
+            self.advanced_page.controller.memory_budget_var.set(settings.get("memory_budget_mb", 4096))
+            self.advanced_page.controller.max_inflight_var.set(settings.get("max_inflight_frames", 4))
+            self.advanced_page.controller.pin_affinity_var.set(settings.get("pin_affinity", False))
+            result_image = {**RESULT_IMAGE_DEFAULTS, **settings.get("result_image", {})}
+            self.advanced_page.controller.result_max_dim_var.set(result_image['max_dim'])
+            self.advanced_page.controller.result_quality_var.set(result_image['quality'])
+            self.advanced_page.controller.result_skip_empty_var.set(result_image['skip_empty'])
+            self.advanced_page.controller.result_lazy_var.set(result_image['lazy'])
+            self.advanced_page.controller.file_link_mode_var.set(
+                LINK_MODES.get(settings.get("file_link_mode"), LINK_MODES[DEFAULT_LINK_MODE]))
+            self.advanced_page.controller.cache_limit_var.set(settings.get("cache_limit_mb", DEFAULT_CACHE_LIMIT_MB))
+            self.advanced_page.controller.independent_interval_var.set(
+                settings.get("independent_interval_min", INDEPENDENT_DETECTION_THRESHOLD // 60))
+            self.start_page.resource_preset_var.set(
+                preset_label(settings.get("resource_preset", DEFAULT_RESOURCE_PRESET)))
             self.advanced_page._update_iou_label(settings.get("iou", 0.3))
             self.advanced_page._update_conf_label(settings.get("conf", 0.25))
             self.update_channel_var.set(settings.get("update_channel", "稳定版 (Release)"))
@@ -543,6 +641,10 @@ class ObjectDetectionGUI:
             self.processing_stop_flag.set()
         if hasattr(self, 'preview_page'): self.preview_page._save_validation_data()
         self._save_current_settings()
+        if self.current_temp_photo_dir and os.path.isdir(self.current_temp_photo_dir):
+            self.cache_manager.update_project(self.current_temp_photo_dir)
+        ResultStore.close_all()
+        MetadataCache.close_all()
         self.master.destroy()
 
     def browse_file_path(self):
@@ -569,6 +671,7 @@ class ObjectDetectionGUI:
 
         if os.path.isdir(folder_selected):
             self.get_temp_photo_dir(update=True)
+            self.preview_page._load_validation_data()
             self.preview_page.update_file_list(folder_selected)
             file_count = self.preview_page.file_listbox.size()
             self.status_bar.status_label.config(text=f"文件路径已设置，找到 {file_count} 个图像文件。")
@@ -630,23 +733,75 @@ class ObjectDetectionGUI:
         path_hash = hashlib.md5(source_path.encode()).hexdigest()
         base_dir = self.settings_manager.base_dir
         temp_dir = os.path.join(base_dir, "temp", "photo", path_hash)
+        os.makedirs(temp_dir, exist_ok=True)
         if update:
+            previous_dir = self.current_temp_photo_dir
             self.current_temp_photo_dir = temp_dir
-        os.makedirs(temp_dir, exist_ok=True)
+            if previous_dir != temp_dir:
+                self._update_cache_index(temp_dir, source_path, previous_dir)
         return temp_dir
 
+    def _update_cache_index(self, project_dir, source_path=None, previous_dir=None):
+        """在后台重新统计项目的缓存大小，记录使用时间，并按上限淘汰最久未使用的项目"""
+        def index_thread():
+            try:
+                if previous_dir and previous_dir != project_dir and os.path.isdir(previous_dir):
+                    self.cache_manager.update_project(previous_dir)
+                if source_path:
+                    self.cache_manager.touch(project_dir, source_path)
+                else:
+                    self.cache_manager.update_project(project_dir)
+                self.cache_manager.enforce_limit(protect=[project_dir, self.current_temp_photo_dir])
+            except Exception as e:
+                logger.error(f"更新缓存索引失败: {e}")
+
+        threading.Thread(target=index_thread, daemon=True).start()
+
+    def _on_cache_limit_changed(self):
+        self.cache_manager.limit_mb = self._get_int_var(self.advanced_page.controller.cache_limit_var,
+                                                        DEFAULT_CACHE_LIMIT_MB)
+        self._save_current_settings()
+
+    def _release_project_files(self, project_dir):
+        """关闭项目打开的数据库和内存映射，以便删除项目文件夹"""
+        ResultStore.close_project(project_dir)
+        DetectionArrays.release()
+
+    def get_folder_index(self, directory=None):
+        """获取图像文件夹的索引，默认为当前所选文件夹"""
+        directory = directory or self.start_page.file_path_entry.get()
+        if not directory:
+            return None
+        return FolderIndex.open(directory, self.get_temp_photo_dir())
+
+    def get_result_store(self):
+        """获取当前所选文件夹的结果数据库，未选择文件夹时返回 None"""
+        temp_dir = self.get_temp_photo_dir()
+        if not temp_dir:
+            return None
+        try:
+            return ResultStore.open(temp_dir)
+        except Exception as e:
+            logger.error(f"打开结果数据库失败: {e}")
+            return None
+
     def clear_image_cache(self):
         cache_dir = os.path.join(self.settings_manager.base_dir, "temp", "photo")
         if messagebox.askyesno("确认清除缓存",
                                f"是否清空图片缓存？\n\n此操作将删除以下文件夹及其所有内容：\n{cache_dir}\n\n注意：这不会影响您的原始图片或已保存的结果。",
                                parent=self.master):
             if os.path.exists(cache_dir):
-                try:
-                    shutil.rmtree(cache_dir)
-                    os.makedirs(cache_dir, exist_ok=True)
-                    messagebox.showinfo("成功", "图片缓存已成功清除。", parent=self.master)
-                except Exception as e:
-                    messagebox.showerror("错误", f"清除缓存时发生错误：\n{e}", parent=self.master)
+                def on_cleared(freed):
+                    self.master.after(0, lambda: (
+                        self.preview_page._load_validation_data(),
+                        messagebox.showinfo("成功", f"图片缓存已成功清除，共释放 {format_size(freed)}。",
+                                            parent=self.master),
+                        self.advanced_page.update_cache_size()))
+
+                # 在后台逐个删除项目文件夹，删除前会先关闭数据库连接，否则 Windows 上无法删除数据库文件
+                self.preview_page._save_validation_data()
+                FolderIndex.forget_all()
+                self.cache_manager.clear_all(on_cleared)
             else:
                 messagebox.showinfo("提示", "缓存目录不存在，无需清除。", parent=self.master)
 
@@ -669,17 +824,18 @@ class ObjectDetectionGUI:
                     if messagebox.askyesno("发现未完成任务",
                                            f"检测到上次有未完成的任务，是否继续？\n已处理：{processed}/{total} at {file_path}"):
                         self._load_cache_data_from_file(cache_data)
-                        self.start_processing(resume_from=processed)
+                        self.start_processing(resume=True)
                         return
             except Exception as e:
                 logger.error(f"读取缓存文件失败: {e}")
         self.start_processing()
 
-    def start_processing(self, resume_from=0):
+    def start_processing(self, resume=False):
         file_path = self.start_page.file_path_entry.get()
         save_path = self.start_page.save_path_entry.get()
         save_detect_image = self.start_page.save_detect_image_var.get()
         copy_img = self.start_page.copy_img_var.get()
+        live_export = self.start_page.live_export_var.get()
         use_fp16 = self.advanced_page.controller.use_fp16_var.get()
 
         if not self._validate_inputs(file_path, save_path): return
@@ -693,13 +849,17 @@ class ObjectDetectionGUI:
 
         self._set_processing_state(True)
         self._show_page("preview")
-        if resume_from == 0:
+        if not resume:
             self.excel_data = []
+            self.processing_manifest = None
             self._clear_current_validation_file()
 
+        self.ui_channel.start()
+        self.preview_renderer.set_target_size(self.preview_page.image_label.winfo_width(),
+                                              self.preview_page.image_label.winfo_height())
         threading.Thread(
             target=self._process_images_thread,
-            args=(file_path, save_path, save_detect_image, copy_img, use_fp16, resume_from),
+            args=(file_path, save_path, save_detect_image, copy_img, use_fp16, resume, live_export),
             daemon=True
         ).start()
 
@@ -711,112 +871,239 @@ class ObjectDetectionGUI:
             messagebox.showinfo("信息", "处理继续进行。")
 
     def _process_images_thread(self, file_path, save_path, save_detect_image, copy_img, use_fp16,
-                               resume_from=0):
+                               resume=False, live_export=False):
         start_time = time.time()
-        excel_data = [] if resume_from == 0 else self.excel_data
-        processed_files = resume_from
+        excel_data = self.excel_data if resume else []
+        manifest = self.processing_manifest if resume and self.processing_manifest else ProcessingManifest(file_path)
         stopped_manually = False
         earliest_date = None
-        temp_photo_dir = self.get_temp_photo_dir()
+        result_store = self.get_result_store()
+        governor = MemoryGovernor(self._get_int_var(self.advanced_page.controller.memory_budget_var, 4096),
+                                  self._get_int_var(self.advanced_page.controller.max_inflight_var, 4))
+        processed_files = resumed_count = total_files = 0
+        self.resource_governor.begin_run()
+        # 结果图片在后台线程池中编码，按需生成模式下处理时只保存检测框
+        result_settings = self.get_result_image_settings()
+        result_encoder = None
+        if save_detect_image and not result_settings['lazy']:
+            result_encoder = ResultImageEncoder(max_workers=max(1, min(2, (os.cpu_count() or 2) // 2)),
+                                                max_dim=result_settings['max_dim'],
+                                                quality=result_settings['quality'],
+                                                skip_empty=result_settings['skip_empty'])
+        # 按物种分类的文件操作在后台线程池中执行，不阻塞推理
+        file_engine = FileOpEngine(self.get_file_link_mode(), max_workers=2) if copy_img else None
+        live_writer = None
 
         try:
             iou = self.advanced_page.controller.iou_var.get()
             conf = self.advanced_page.controller.conf_var.get()
             augment = self.advanced_page.controller.use_augment_var.get()
             agnostic_nms = self.advanced_page.controller.use_agnostic_nms_var.get()
-            image_files = sorted([f for f in os.listdir(file_path) if f.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS)])
+            image_files = self.get_folder_index(file_path).image_files()
             total_files = len(image_files)
-            if resume_from > 0:
-                image_files = image_files[resume_from:]
-                if excel_data:
-                    valid_dates = [item['拍摄日期对象'] for item in excel_data if item.get('拍摄日期对象')]
-                    if valid_dates:
-                        earliest_date = min(valid_dates)
+            # 推理开始前并行读取所有图片的拍摄时间，立即得到调查时间范围，处理时不再逐张读取
+            self.ui_channel.post('status', self._set_status_text, "正在读取拍摄时间...")
+            capture_times = ImageMetadataExtractor.prescan_capture_times(file_path, image_files,
+                                                                         stop_event=self.processing_stop_flag,
+                                                                         cache=self.metadata_cache)
+            earliest_date = capture_times.earliest
+            span = capture_times.span()
+            if span:
+                logger.info(f"拍摄时间范围: {span[0]} 至 {span[1]}（{(span[1] - span[0]).days + 1} 天），"
+                            f"共 {len(capture_times.sequences(self.get_independent_threshold()))} 个拍摄序列")
+            if resume:
+                # 按清单跳过已完成的文件；已删除或被修改的文件需要丢弃旧结果并重新处理
+                stale_files = set(manifest.stale_files())
+                for stale in stale_files:
+                    manifest.discard(stale)
+                image_files = manifest.pending(image_files)
+                pending_set = set(image_files)
+                excel_data = [item for item in excel_data
+                              if item.get('文件名') not in stale_files and item.get('文件名') not in pending_set]
+                # 旧版本的处理缓存没有记录相机
+                for item in excel_data:
+                    camera = capture_times.camera(item.get('文件名'))
+                    if camera:
+                        item[CAMERA_FIELD] = camera
+            processed_files = total_files - len(image_files)
+            resumed_count = processed_files
+            if live_export:
+                # 已完成的图片先写入表格，之后每处理完一张追加一行
+                live_writer = LiveExport(os.path.join(save_path, LIVE_EXPORT_FILENAME), self.confidence_settings,
+                                         earliest_date)
+                if not live_writer.start(excel_data):
+                    live_writer = None
 
             for idx, filename in enumerate(image_files):
                 if self.processing_stop_flag.is_set():
                     stopped_manually = True
                     break
 
-                if self.master.winfo_exists():
-                    self.master.after(0, lambda f=filename: self.status_bar.status_label.config(text=f"正在处理: {f}"))
-                try:
-                    listbox_idx = self.preview_page.file_listbox.get(0, "end").index(filename)
-                    if self.master.winfo_exists():
-                        self.master.after(0, lambda i=listbox_idx: (
-                            self.preview_page.file_listbox.selection_clear(0, "end"),
-                            self.preview_page.file_listbox.selection_set(i),
-                            self.preview_page.file_listbox.see(i)
-                        ))
-                except ValueError:
-                    pass
+                # 界面更新经由通道合并投递，处理速度再快也只按固定频率刷新界面
+                self.ui_channel.post('status', self._set_status_text, f"正在处理: {filename}")
+                self.ui_channel.post('selection', self._select_processing_file, filename)
 
                 elapsed_time = time.time() - start_time
-                speed = (processed_files - resume_from + 1) / elapsed_time if elapsed_time > 0 else 0
+                speed = (processed_files - resumed_count + 1) / elapsed_time if elapsed_time > 0 else 0
                 remaining_time = (total_files - (processed_files + 1)) / speed if speed > 0 else float('inf')
+                self.ui_channel.post('progress', self.start_page.progress_frame.update_progress,
+                                     processed_files + 1, total_files, speed, remaining_time)
 
-                if self.master.winfo_exists():
-                    self.master.after(0, lambda p=processed_files + 1, t=total_files, s=speed, r=remaining_time:
-                    self.start_page.progress_frame.update_progress(value=p, total=t, speed=s, remaining_time=r))
-
+                # 应用界面上切换的资源策略；超出内存预算或界面仍持有过多帧时，在解码下一帧前等待
+                self.resource_governor.apply_pending()
+                governor.acquire(self.processing_stop_flag)
+                frame_handed_to_ui = False
                 try:
                     img_path = os.path.join(file_path, filename)
-                    image_info, img = ImageMetadataExtractor.extract_metadata(img_path, filename)
+                    image_info = ImageMetadataExtractor.build_image_info(filename, capture_times.get(filename),
+                                                                         capture_times.source(filename),
+                                                                         capture_times.camera(filename))
                     species_info = self.image_processor.detect_species(img_path, bool(use_fp16), iou, conf, augment,
                                                                        agnostic_nms)
                     species_info['检测时间'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     detect_results = species_info.get('detect_results')
                     if detect_results:
-                        #self.image_processor.save_detection_temp(detect_results, filename, temp_photo_dir)
-                        self.image_processor.save_detection_info_json(detect_results, filename, species_info,
-                                                                      temp_photo_dir)
-                        if self.master.winfo_exists():
-                            self.master.after(0, lambda p=img_path, d=detect_results, info=species_info.copy(): (
-                                self.preview_page.update_image_preview(p, show_detection=True, detection_results=d),
-                                self.preview_page.update_image_info(p, os.path.basename(p)),
-                                self.preview_page._update_detection_info(info)
-                            ))
-                    if save_detect_image: self.image_processor.save_detection_result(detect_results, filename,
-                                                                                     save_path)
-                    if copy_img and img: self._copy_image_by_species(img_path, save_path,
-                                                                     species_info['物种名称'].split(','))
+                        detection_info = self.image_processor.build_detection_info(detect_results, species_info)
+                        result_store.put_detection(filename, detection_info, image_info)
+                        # 实时预览在后台线程中按显示尺寸渲染，界面跟不上时只渲染最新一帧
+                        live_info = {k: v for k, v in species_info.items() if k != 'detect_results'}
+                        self.preview_renderer.submit(img_path, detection_info['检测框'], dict(image_info),
+                                                     live_info, on_done=governor.release)
+                        frame_handed_to_ui = True
+                    if result_encoder and detect_results:
+                        result_encoder.submit(img_path, filename, detection_info['检测框'],
+                                              self.image_processor.get_first_detected_species(detect_results),
+                                              save_path)
+                    if copy_img: self._copy_image_by_species(img_path, save_path,
+                                                             species_info['物种名称'].split(','),
+                                                             file_engine)
                     if 'detect_results' in species_info: del species_info['detect_results']
                     image_info.update(species_info)
                     excel_data.append(image_info)
+                    if live_writer: live_writer.append(image_info)
+                    manifest.mark_done(filename)
                 except Exception as e:
                     logger.error(f"处理文件 {filename} 失败: {e}")
+                finally:
+                    if not frame_handed_to_ui:
+                        governor.release()
                 processed_files += 1
                 if processed_files % 10 == 0: self._save_processing_cache(excel_data, file_path, save_path,
                                                                           save_detect_image, True, copy_img,
-                                                                          use_fp16, processed_files, total_files,
-                                                                          iou, conf, augment, agnostic_nms)
+                                                                          use_fp16, manifest, total_files,
+                                                                          iou, conf, augment, agnostic_nms,
+                                                                          live_export)
                 try:
-                    del img_path, image_info, img, species_info, detect_results
+                    del img_path, image_info, species_info, detect_results, detection_info
                 except NameError:
                     pass
-                gc.collect()
+
+            if result_encoder:
+                if stopped_manually:
+                    # 手动停止时不再编码排队中的结果图片
+                    result_encoder.cancel()
+                else:
+                    self.ui_channel.post('status', self._set_status_text, "正在保存结果图片...")
+                result_encoder.close(wait=True)
+                # 结果图片被取消的图片下次继续处理时重新处理
+                for name in set(result_encoder.cancelled_files):
+                    manifest.discard(name)
+            if file_engine:
+                if stopped_manually:
+                    # 手动停止时不再执行排队中的文件操作
+                    file_engine.cancel()
+                else:
+                    self.ui_channel.post('status', self._set_status_text, "正在按物种分类图片...")
+                file_engine.close(wait=True)
+                # 分类被取消的图片下次继续处理时重新处理
+                for src in set(file_engine.cancelled_files):
+                    manifest.discard(os.path.basename(src))
 
             if not stopped_manually:
-                if self.master.winfo_exists():
-                    self.master.after(0, lambda: self.start_page.progress_frame.update_progress(value=total_files,
-                                                                                                total=total_files,
-                                                                                                speed=0,
-                                                                                                remaining_time="已完成"))
+                self.ui_channel.post('progress', self.start_page.progress_frame.update_progress,
+                                     total_files, total_files, 0, "已完成")
                 self.excel_data = excel_data
-                excel_data = DataProcessor.process_independent_detection(excel_data, self.confidence_settings)
+                excel_data = DataProcessor.process_independent_detection(excel_data, self.confidence_settings,
+                                                                         self.get_independent_threshold(),
+                                                                         partition_by=CAMERA_FIELD)
                 if earliest_date: excel_data = DataProcessor.calculate_working_days(excel_data, earliest_date)
+                done_message = f"图像处理完成！\n内存峰值: {governor.report()['peak_rss_mb']:.0f} MB"
+                if live_writer:
+                    self.ui_channel.post('status', self._set_status_text, "正在补全实时导出表格...")
+                    live_paths = live_writer.finalize(excel_data)
+                    if live_paths:
+                        done_message += f"\n检测信息已导出到 {live_paths[0]}"
                 #if excel_data and output_excel: self._export_and_open_excel(excel_data, save_path)
                 self._delete_processing_cache()
-                if self.master.winfo_exists(): self.status_bar.status_label.config(text="处理完成！")
-                messagebox.showinfo("成功", "图像处理完成！")
+                self.ui_channel.post('status', self._set_status_text, "处理完成！")
+                messagebox.showinfo("成功", done_message)
+            else:
+                # 停止时立即保存清单，下次可精确跳过已完成的文件
+                self._save_processing_cache(excel_data, file_path, save_path, save_detect_image, True, copy_img,
+                                            use_fp16, manifest, total_files, iou, conf, augment, agnostic_nms,
+                                            live_export)
         except Exception as e:
             logger.error(f"处理过程中发生错误: {e}")
             messagebox.showerror("错误", f"处理过程中发生错误: {e}")
         finally:
+            if live_writer:
+                live_writer.close()
+            run_reports = [governor, self.resource_governor]
+            for worker in (result_encoder, file_engine):
+                if worker:
+                    if self.processing_stop_flag.is_set():
+                        worker.cancel()
+                    worker.close(wait=True)
+                    run_reports.append(worker)
+            self._record_run_metrics(start_time, file_path, processed_files - resumed_count, total_files,
+                                     not stopped_manually, *run_reports)
+            if result_store:
+                self._update_cache_index(result_store.project_dir)
+            # 等待最后一帧预览渲染完成后再停止界面更新通道
+            self.preview_renderer.wait_idle(timeout=2.0)
+            self.ui_channel.stop()
             if self.master.winfo_exists():
                 self._set_processing_state(False)
             gc.collect()
 
+    def _set_status_text(self, text):
+        """在界面线程中更新状态栏文本"""
+        self.status_bar.status_label.config(text=text)
+
+    def _select_processing_file(self, filename):
+        """在界面线程中选中文件列表中正在处理的文件"""
+        listbox = self.preview_page.file_listbox
+        try:
+            listbox_idx = listbox.get(0, "end").index(filename)
+        except ValueError:
+            return
+        listbox.selection_clear(0, "end")
+        listbox.selection_set(listbox_idx)
+        listbox.see(listbox_idx)
+
+    def _show_live_result(self, image, frame):
+        """在界面线程中显示后台渲染好的实时结果，并记录预览区域尺寸供下一帧渲染使用。"""
+        self.preview_page.show_live_frame(image, frame)
+        self.preview_renderer.set_target_size(self.preview_page.image_label.winfo_width(),
+                                              self.preview_page.image_label.winfo_height())
+
+    def _record_run_metrics(self, start_time, file_path, processed_count, total_files, completed, *governors):
+        """记录本次批处理的运行统计（包括内存峰值和资源策略），用于调整批处理和队列参数。"""
+        elapsed = time.time() - start_time
+        metrics = {
+            'start_time': datetime.fromtimestamp(start_time).isoformat(timespec='seconds'),
+            'file_path': file_path,
+            'processed_files': processed_count,
+            'total_files': total_files,
+            'completed': completed,
+            'elapsed_seconds': round(elapsed, 1),
+            'images_per_second': round(processed_count / elapsed, 3) if elapsed > 0 else 0,
+        }
+        for governor in governors:
+            metrics.update(governor.report())
+        logger.info(f"批处理运行统计: {metrics}")
+        self.settings_manager.save_run_metrics(metrics)
+
     def _set_processing_state(self, is_processing: bool):
         self.is_processing = is_processing
         self.start_page.set_processing_state(is_processing)
@@ -839,13 +1126,10 @@ class ObjectDetectionGUI:
             return False
         return True
 
-    def _copy_image_by_species(self, img_path: str, save_path: str, species_names: list):
+    def _copy_image_by_species(self, img_path: str, save_path: str, species_names: list, file_engine):
         for name in species_names:
             if name:
-                to_path = os.path.join(save_path, name)
-                os.makedirs(to_path, exist_ok=True)
-                from shutil import copy
-                copy(img_path, to_path)
+                file_engine.submit(img_path, os.path.join(save_path, name))
 
     def _export_and_open_excel(self, excel_data, save_path):
         from system.config import DEFAULT_EXCEL_FILENAME
@@ -858,7 +1142,8 @@ class ObjectDetectionGUI:
                     messagebox.showerror("错误", f"无法打开文件: {e}")
 
     def _save_processing_cache(self, excel_data, file_path, save_path, save_detect_image, output_excel, copy_img,
-                               use_fp16, processed_files, total_files, iou, conf, use_augment, use_agnostic_nms):
+                               use_fp16, manifest, total_files, iou, conf, use_augment, use_agnostic_nms,
+                               live_export=False):
         def make_serializable(obj):
             if isinstance(obj, datetime): return obj.isoformat()
             if isinstance(obj, dict): return {k: make_serializable(v) for k, v in obj.items() if k != 'detect_results'}
@@ -868,8 +1153,10 @@ class ObjectDetectionGUI:
 
         serializable_excel_data = make_serializable(excel_data)
         cache_data = {'file_path': file_path, 'save_path': save_path, 'save_detect_image': save_detect_image,
-                      'output_excel': output_excel, 'copy_img': copy_img, 'use_fp16': use_fp16,
-                      'processed_files': processed_files, 'total_files': total_files,
+                      'output_excel': output_excel, 'copy_img': copy_img, 'live_export': live_export,
+                      'use_fp16': use_fp16,
+                      'processed_files': len(manifest), 'total_files': total_files,
+                      'manifest': manifest.to_dict(),
                       'excel_data': serializable_excel_data,
                       'iou': iou,
                       'conf': conf,
@@ -889,6 +1176,7 @@ class ObjectDetectionGUI:
     def _load_cache_data_from_file(self, cache_data):
         self._load_settings_to_ui(cache_data)
         self.excel_data = cache_data.get('excel_data', [])
+        self.processing_manifest = ProcessingManifest.from_cache(cache_data.get('file_path', ''), cache_data)
         for item in self.excel_data:
             if '拍摄日期对象' in item and isinstance(item['拍摄日期对象'], str):
                 try:
@@ -898,19 +1186,23 @@ class ObjectDetectionGUI:
 
     def _resume_processing(self):
         self._load_cache_data_from_file(self.cache_data)
-        self.start_processing(resume_from=self.cache_data.get('processed_files', 0))
+        self.start_processing(resume=True)
 
     def _clear_current_validation_file(self):
-        """删除当前所选文件夹的validation.json文件。"""
-        temp_photo_dir = self.get_temp_photo_dir()
-        if temp_photo_dir:
-            validation_file_path = os.path.join(temp_photo_dir, "validation.json")
-            if os.path.exists(validation_file_path):
-                try:
-                    os.remove(validation_file_path)
-                    logger.info(f"已清除旧的校验文件: {validation_file_path}")
-                except Exception as e:
-                    logger.error(f"清除旧的校验文件失败: {e}")
+        """清除当前所选文件夹的校验结果。"""
+        if hasattr(self, 'preview_page'):
+            self.preview_page._commit_pending_correction()
+        result_store = self.get_result_store()
+        if result_store:
+            try:
+                journal = getattr(self.preview_page, 'verdict_journal', None) if hasattr(self, 'preview_page') else None
+                if journal and journal.store is result_store:
+                    journal.clear()
+                else:
+                    result_store.clear_validation()
+                logger.info(f"已清除旧的校验结果: {result_store.db_path}")
+            except Exception as e:
+                logger.error(f"清除旧的校验结果失败: {e}")
         # 同时清除内存中的数据
         if hasattr(self, 'preview_page'):
             self.preview_page.validation_data.clear()
@@ -2,7 +2,6 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from PIL import Image, ImageTk
 import os
-import json
 import logging
 import cv2
 import threading
@@ -11,13 +10,20 @@ import numpy as np
 
 from datetime import datetime
 from collections import defaultdict
-from PIL import Image, ImageDraw, ImageFont
-from collections import Counter
+from PIL import Image
 
 from system.data_processor import DataProcessor
-from system.metadata_extractor import ImageMetadataExtractor
-from system.config import NORMAL_FONT, SUPPORTED_IMAGE_EXTENSIONS
-from system.utils import resource_path
+from system.arrow_tables import arrow_available
+from system.analytics import Analytics
+from system.independence_index import IndependenceIndex
+from system.taxonomy import Taxonomy
+from system.gui.background_job import BackgroundJob
+from system.metadata_extractor import ImageMetadataExtractor, CAMERA_FIELD
+from system.config import NORMAL_FONT
+from system.annotation_renderer import COLOR_PALETTE, draw_boxes, species_color
+from system.detection_arrays import DetectionArrays, summarize_boxes
+from system.verdict_journal import VerdictJournal
+from system.timestamp_parser import TIME_SOURCE_EXIF, TIME_SOURCE_LABELS
 
 logger = logging.getLogger(__name__)
 
@@ -144,6 +150,10 @@ class PreviewPage(ttk.Frame):
         super().__init__(parent, **kwargs)
         self.controller = controller
         self.validation_data = {}
+        self.verdict_journal = None
+        self._pending_correction = None
+        self.independence_index = None
+        self._export_job = None
         self.original_image = None
         self.validation_original_image = None
         self.species_validation_original_image = None
@@ -165,11 +175,7 @@ class PreviewPage(ttk.Frame):
         self._selected_species_button = None
         self._selected_quantity_button = None
 
-        self.color_palette = [
-            '#FF3838', '#FF9D97', '#FF701F', '#FFB21D', '#CFD231', '#48F90A', '#92CC17', '#3CD4F5',
-            '#0052FF', '#6541D1', '#A777F5', '#701F57', '#FDE8DC', '#FFEADD', '#FFDBAD', '#FCDB6D',
-            '#E4D884', '#B6EE93', '#ECF2C2', '#C4E4E8', '#ABCDFF', '#C8B0F4'
-        ]
+        self.color_palette = list(COLOR_PALETTE)
         self.species_color_map = {}
 
         global_conf = self.controller.confidence_settings.get("global", 0.25)
@@ -239,6 +245,8 @@ class PreviewPage(ttk.Frame):
         self.validation_info_text.config(state="disabled")
         self.validation_status_label.config(text="未校验")
         self.validation_progress_var.set("0/0")
+        # 路径可能已改变，先关闭原项目的校验日志
+        self._save_validation_data()
         self.validation_data.clear()
 
     def _create_image_preview_content(self, parent):
@@ -427,7 +435,7 @@ class PreviewPage(ttk.Frame):
         format_combo = ttk.Combobox(
             export_options_frame,
             textvariable=self.export_format_var,
-            values=["CSV", "Excel", "错误照片"],
+            values=["CSV", "Excel", "Parquet", "统计分析", "错误照片", "结果图片"],
             width=8,
             state="readonly",
             takefocus=False
@@ -532,8 +540,7 @@ class PreviewPage(ttk.Frame):
             return
 
         try:
-            image_files = [f for f in os.listdir(directory) if f.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS)]
-            image_files.sort()
+            image_files = self.controller.get_folder_index(directory).image_files()
             for file in image_files:
                 self.file_listbox.insert(tk.END, file)
         except Exception as e:
@@ -561,18 +568,14 @@ class PreviewPage(ttk.Frame):
         # Update text-based info
         self.update_image_info(file_path, file_name)
 
-        # Check if a JSON file with detection results exists
-        photo_path = self.controller.get_temp_photo_dir()
-        if not photo_path: return
-
-        base_name, _ = os.path.splitext(file_name)
-        json_path = os.path.join(photo_path, f"{base_name}.json")
+        # Check if detection results exist for this image
+        store = self.controller.get_result_store()
+        if not store: return
 
-        if os.path.exists(json_path):
+        if store.has_detection(file_name):
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    # Load the detection info
-                    self.current_preview_info = json.load(f)
+                # Load the detection info
+                self.current_preview_info = store.get_detection(file_name)
 
                 # Update the text part of the info display
                 self._update_detection_info(self.current_preview_info)
@@ -581,7 +584,7 @@ class PreviewPage(ttk.Frame):
                 # The trace on this var will trigger toggle_detection_preview, which will then call the redraw function
                 self.show_detection_var.set(True)
             except Exception as e:
-                logger.error(f"读取检测JSON失败: {e}")
+                logger.error(f"读取检测结果失败: {e}")
                 self.current_preview_info = {}
                 self._update_detection_info({}) # Clear text info as well
 
@@ -610,21 +613,62 @@ class PreviewPage(ttk.Frame):
             self.original_image = None
 
     def update_image_info(self, file_path: str, file_name: str):
-        from system.metadata_extractor import ImageMetadataExtractor
-        image_info, _ = ImageMetadataExtractor.extract_metadata(file_path, file_name)
+        # 元数据来自元数据缓存（批处理时已写入），未缓存时只读取文件头
+        try:
+            record = ImageMetadataExtractor.cached_header_metadata(file_path, file_name,
+                                                                   self.controller.metadata_cache)
+        except Exception as e:
+            logger.error(f"提取图像元数据失败 ({file_name}): {e}")
+            self._set_image_info_text(ImageMetadataExtractor.extract_metadata(file_path, file_name))
+            return
+        camera = ImageMetadataExtractor.camera_name(record)
+        image_info = ImageMetadataExtractor.build_image_info(file_name, record['capture_time'], record['time_source'],
+                                                             camera)
+        self._set_image_info_text(image_info, (record['width'], record['height']), record['file_size'], camera)
+
+    def _set_image_info_text(self, image_info: dict, image_size=None, file_size=None, camera=None):
+        """显示图像的基本信息
+
+        Args:
+            image_info: 图像元数据
+            image_size: 图像尺寸 (宽, 高)，未知时不显示
+            file_size: 文件大小（字节）
+            camera: 相机厂商和型号，未知时不显示
+        """
         self.info_text.config(state="normal")
         self.info_text.delete(1.0, tk.END)
         info1 = f"文件名: {image_info.get('文件名', '')}    格式: {image_info.get('格式', '')}"
+        if camera:
+            info1 += f"    相机: {camera}"
         info2 = f"拍摄日期: {image_info.get('拍摄日期', '未知')} {image_info.get('拍摄时间', '')}    "
-        try:
-            with Image.open(file_path) as img:
-                info2 += f"尺寸: {img.width}x{img.height}px    文件大小: {os.path.getsize(file_path) / 1024:.1f} KB"
-        except:
-            pass
+        time_source = image_info.get('时间来源')
+        if time_source and time_source != TIME_SOURCE_EXIF:
+            info2 = info2.rstrip() + f"（来自{TIME_SOURCE_LABELS.get(time_source, time_source)}）    "
+        if image_size and file_size is not None:
+            info2 += f"尺寸: {image_size[0]}x{image_size[1]}px    文件大小: {file_size / 1024:.1f} KB"
         self.info_text.insert(tk.END, info1 + "\n" + info2)
         # Keep the text box disabled for user interaction, but allow code to modify it.
         # self.info_text.config(state="disabled")
 
+    def show_live_frame(self, image, frame: dict):
+        """显示后台渲染好的批处理实时预览，并复用处理流程中已提取的元数据
+
+        Args:
+            image: 已按显示尺寸渲染好检测框的图像，渲染失败时为 None
+            frame: 帧信息，包含 file_path、image_info、species_info、image_size、file_size
+        """
+        if image is None:
+            self.image_label.config(image='', text="无法加载图像")
+            self.image_label.image = None
+            self.original_image = None
+        else:
+            self.original_image = image
+            photo = ImageTk.PhotoImage(image)
+            self.image_label.config(image=photo)
+            self.image_label.image = photo
+        self._set_image_info_text(frame.get('image_info', {}), frame.get('image_size'), frame.get('file_size'))
+        self._update_detection_info(frame.get('species_info', {}))
+
     def toggle_detection_preview(self, *args):
         if self.controller.is_processing:
             self.show_detection_var.set(True)
@@ -670,14 +714,10 @@ class PreviewPage(ttk.Frame):
             species_info['检测时间'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
             if self.current_detection_results:
-                temp_photo_dir = self.controller.get_temp_photo_dir()
-                # 保存JSON文件
-                json_path = self.controller.image_processor.save_detection_info_json(self.current_detection_results, filename, species_info,
-                                                                      temp_photo_dir)
-
-                # 从刚保存的JSON中读回数据以填充 self.current_preview_info
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    loaded_detection_info = json.load(f)
+                # 保存检测结果
+                loaded_detection_info = self.controller.image_processor.build_detection_info(
+                    self.current_detection_results, species_info)
+                self.controller.get_result_store().put_detection(filename, loaded_detection_info)
 
                 # 在主线程中更新UI
                 self.master.after(0, lambda: setattr(self, 'current_preview_info', loaded_detection_info))
@@ -728,33 +768,24 @@ class PreviewPage(ttk.Frame):
         pass
 
     def _load_processed_images(self):
-        photo_dir = self.controller.get_temp_photo_dir()
+        store = self.controller.get_result_store()
         source_dir = self.controller.start_page.file_path_entry.get()
 
-        if not photo_dir or not os.path.exists(photo_dir) or not source_dir:
+        if not store or not source_dir:
             self.validation_listbox.delete(0, tk.END) # 如果路径无效，则清空列表
             return
 
         self.validation_listbox.delete(0, tk.END)
 
-        # 获取temp目录下的所有json文件
+        # 从文件夹索引获取从基础文件名到完整文件名的映射
         try:
-            json_files = [f for f in os.listdir(photo_dir) if f.lower().endswith('.json')]
-        except FileNotFoundError:
-            logger.error(f"临时目录未找到: {photo_dir}")
-            return
-
-        # 获取源目录下的所有支持的图片文件，并创建一个从基础文件名到完整文件名的映射
-        try:
-            source_images = [f for f in os.listdir(source_dir) if f.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS)]
-            image_basename_map = {os.path.splitext(f)[0]: f for f in source_images}
+            image_basename_map = self.controller.get_folder_index(source_dir).basename_map()
         except FileNotFoundError:
             logger.error(f"源目录未找到: {source_dir}")
             return
 
         processed_images = []
-        for json_file in json_files:
-            base_name = os.path.splitext(json_file)[0]
+        for base_name in store.stems():
             image_filename = image_basename_map.get(base_name)
             if image_filename:
                 processed_images.append(image_filename)
@@ -767,6 +798,7 @@ class PreviewPage(ttk.Frame):
         self._update_validation_progress()
 
     def _on_validation_file_selected(self, event):
+        self._commit_pending_correction()
         self._species_validation_marked = None
         self._count_validation_marked = None
 
@@ -784,8 +816,8 @@ class PreviewPage(ttk.Frame):
 
         file_name = self.validation_listbox.get(selection[0])
         self.last_selected_validation_image = file_name
-        photo_dir = self.controller.get_temp_photo_dir()
-        if not photo_dir: return
+        store = self.controller.get_result_store()
+        if not store: return
 
         original_image_path = os.path.join(self.controller.start_page.file_path_entry.get(), file_name)
         try:
@@ -798,12 +830,11 @@ class PreviewPage(ttk.Frame):
                 self.validation_image_label.image = None
             return
 
-        json_path = os.path.join(photo_dir, f"{os.path.splitext(file_name)[0]}.json")
+        detection_info = store.get_detection(file_name)
 
-        if os.path.exists(json_path):
+        if detection_info is not None:
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    self.current_validation_info = json.load(f)
+                self.current_validation_info = detection_info
 
                 self._recalculate_and_update_info_label(
                     self.validation_status_label,
@@ -814,7 +845,7 @@ class PreviewPage(ttk.Frame):
                 self._redraw_validation_boxes_with_new_confidence(self.validation_conf_var.get())
 
             except Exception as e:
-                logger.error(f"加载JSON信息失败: {e}")
+                logger.error(f"加载检测信息失败: {e}")
                 self.validation_status_label.config(text="加载信息失败")
         else:
             self.validation_status_label.config(text="物种: - | 数量: - | 置信度: -")
@@ -832,20 +863,17 @@ class PreviewPage(ttk.Frame):
             # 如果用户点击了“确定”并输入了有效值
             if dialog.result:
                 correct_species_name, correct_species_count = dialog.result
-                self._update_json_file(file_name, correct_species_name, correct_species_count)
+                self._update_result_record(file_name, correct_species_name, correct_species_count)
                 # 即使修正了，也标记为错误，以便导出
-                self.validation_data[file_name] = False
-                # 刷新信息显示
-                self._on_validation_file_selected(None)
+                self._set_verdict(file_name, False)
             else:
                 # 如果用户取消或关闭了对话框，则不进行任何操作
                 return
         else:
-            self.validation_data[file_name] = True
+            self._set_verdict(file_name, True)
 
-        # 更新状态标签并保存
+        # 更新状态标签
         self.validation_status_label.config(text=f"已标记: {'正确 ✅' if self.validation_data.get(file_name) else '错误 ❌'}")
-        self._save_validation_data()
         self._update_validation_progress()
 
         # 自动选择下一张图片
@@ -857,66 +885,86 @@ class PreviewPage(ttk.Frame):
         validated = len(self.validation_data)
         self.validation_progress_var.set(f"{validated}/{total}")
 
+    def _set_verdict(self, file_name: str, verdict: bool):
+        """记录一张图片的校验结果，由校验日志在后台写入磁盘"""
+        self.validation_data[file_name] = verdict
+        if self.verdict_journal:
+            self.verdict_journal.record(file_name, verdict)
+
     def _save_validation_data(self):
-        temp_dir = self.controller.get_temp_photo_dir()
-        if not temp_dir: return
-        with open(os.path.join(temp_dir, "validation.json"), 'w', encoding='utf-8') as f:
-            json.dump(self.validation_data, f, indent=2)
+        """关闭校验日志：写入剩余记录并合并到结果数据库"""
+        self._commit_pending_correction()
+        journal, self.verdict_journal = self.verdict_journal, None
+        if not journal: return
+        try:
+            journal.close()
+        except Exception as e:
+            logger.error(f"Failed to save validation data: {e}")
 
     def _load_validation_data(self):
-        temp_dir = self.controller.get_temp_photo_dir()
-        if not temp_dir: return
-        path = os.path.join(temp_dir, "validation.json")
-        if os.path.exists(path):
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    self.validation_data = json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
-                logger.error(f"Failed to load validation data: {e}")
-                self.validation_data = {}
-        else:
+        """为当前项目打开校验日志并读取校验结果（切换项目时先关闭原项目的日志）"""
+        self._save_validation_data()
+        self.validation_data = {}
+        store = self.controller.get_result_store()
+        if not store: return
+        try:
+            self.verdict_journal = VerdictJournal(store)
+            self.validation_data = self.verdict_journal.load()
+        except Exception as e:
+            logger.error(f"Failed to load validation data: {e}")
             self.validation_data = {}
 
-    def _update_json_file(self, file_name: str, new_species: str = None, new_count: str = None, new_remark: str = None):
-        """根据弹窗输入更新JSON文件"""
-        photo_dir = self.controller.get_temp_photo_dir()
-        if not photo_dir: return
+    def _update_result_record(self, file_name: str, new_species: str = None, new_count: str = None, new_remark: str = None):
+        """根据弹窗输入更新检测结果记录
 
-        base_name, _ = os.path.splitext(file_name)
-        json_path = os.path.join(photo_dir, f"{base_name}.json")
-
-        if os.path.exists(json_path):
+        修改先合并到当前图片的修正事务中并立即显示，离开该图片时一次写入数据库。
+        """
+        fields = {}
+        if new_species is not None:
+            fields['物种名称'] = new_species
+        if new_count is not None:
+            fields['物种数量'] = str(new_count)
+        if new_remark is not None:
+            fields['备注'] = new_remark
+
+        # 只要有手动修改，就更新置信度和时间
+        fields['最低置信度'] = '人工校验'
+        fields['检测时间'] = f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}(人工校验)"
+
+        transaction = self._pending_correction
+        if transaction is None or transaction.file_name != file_name:
+            self._commit_pending_correction()
+            store = self.controller.get_result_store()
+            if not store: return
             try:
-                with open(json_path, 'r+', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                    if new_species is not None:
-                        data['物种名称'] = new_species
-                    if new_count is not None:
-                        data['物种数量'] = str(new_count)
-                    if new_remark is not None:
-                        data['备注'] = new_remark
-
-
-                    # 只要有手动修改，就更新置信度和时间
-                    data['最低置信度'] = '人工校验'
-                    data['检测时间'] = f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}(人工校验)"
-                    if new_species or new_count == "空":
-                        data['检测框'] = []  # 清空检测框
-
-                    f.seek(0)
-                    json.dump(data, f, ensure_ascii=False, indent=4)
-                    f.truncate()
-
-                    self.current_species_info = data
-                    self._update_species_info_label()
-
+                transaction = store.begin_correction(file_name)
             except Exception as e:
-                logger.error(f"更新JSON文件失败 ({file_name}): {e}")
-                messagebox.showerror("错误", f"更新JSON文件失败: {e}", parent=self)
-
-        # 立即刷新右侧信息显示
-        self._on_validation_file_selected(None)
+                logger.error(f"读取检测结果失败 ({file_name}): {e}")
+                transaction = None
+            if transaction is None: return
+            self._pending_correction = transaction
+
+        info = transaction.set(fields, clear_boxes=bool(new_species or new_count == "空"))
+        self._show_corrected_info(file_name, info)
+
+    def _commit_pending_correction(self):
+        """将当前图片合并后的修改写入数据库"""
+        transaction, self._pending_correction = self._pending_correction, None
+        if not transaction: return
+        try:
+            transaction.commit()
+        except Exception as e:
+            logger.error(f"更新检测结果失败 ({transaction.file_name}): {e}")
+            messagebox.showerror("错误", f"更新检测结果失败: {e}", parent=self)
+
+    def _show_corrected_info(self, file_name: str, info: dict):
+        """用修正后的信息刷新两个校验页面的显示，沿用已加载的图像，不重新读取文件"""
+        self.current_species_info = info
+        self._update_species_info_label()
+        if file_name == self.last_selected_validation_image and self.validation_original_image is not None:
+            self.current_validation_info = info
+            self._recalculate_and_update_info_label(self.validation_status_label, info, self.validation_conf_var.get())
+            self._redraw_validation_boxes_with_new_confidence(self.validation_conf_var.get())
 
     def _update_species_info_label(self):
         """辅助函数，用于从 self.current_species_info 更新物种信息标签"""
@@ -927,6 +975,10 @@ class PreviewPage(ttk.Frame):
             self.species_info_label.config(text=info_text)
 
     def _export_error_images(self):
+        if self._export_job is not None and self._export_job.running:
+            messagebox.showinfo("提示", "正在导出，请等待完成或先取消。", parent=self)
+            return
+        self._commit_pending_correction()
         error_files = [f for f, v in self.validation_data.items() if v is False]
         if not error_files:
             messagebox.showinfo("提示", "没有标记为错误的图片。", parent=self)
@@ -940,33 +992,24 @@ class PreviewPage(ttk.Frame):
 
         error_folder = os.path.join(save_dir, "error")
         os.makedirs(error_folder, exist_ok=True)
-        from shutil import copy
 
-        temp_photo_dir = self.controller.get_temp_photo_dir()
-        copied_count = 0
+        store = self.controller.get_result_store()
+        tasks = []
         failed_files = []
 
         for file in error_files:
             try:
-                json_path = os.path.join(temp_photo_dir, f"{os.path.splitext(file)[0]}.json")
+                data = store.get_detection(file) if store else None
                 corrected_species_name = "未分类错误" # 默认文件夹
 
                 # 如果是人工校验过的，按修正后的物种名分类
-                if os.path.exists(json_path):
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+                if data is not None:
                     if data.get('最低置信度') == '人工校验':
                         corrected_species_name = data.get('物种名称', corrected_species_name)
 
-                # 创建物种分类子文件夹
-                species_folder = os.path.join(error_folder, corrected_species_name)
-                os.makedirs(species_folder, exist_ok=True)
-
-                # 复制原图
                 source_image_path = os.path.join(source_dir, file)
                 if os.path.exists(source_image_path):
-                    copy(source_image_path, species_folder)
-                    copied_count += 1
+                    tasks.append((source_image_path, os.path.join(error_folder, corrected_species_name)))
                 else:
                     logger.warning(f"源图片未找到，无法复制: {source_image_path}")
                     failed_files.append(file)
@@ -975,25 +1018,117 @@ class PreviewPage(ttk.Frame):
                 logger.error(f"导出错误图片失败 ({file}): {e}")
                 failed_files.append(file)
 
-        message = f"成功导出 {copied_count} 张错误图片到以下文件夹:\n{error_folder}"
-        if failed_files:
-            message += f"\n\n有 {len(failed_files)} 个文件导出失败，请检查日志获取详细信息。"
-            messagebox.showwarning("导出完成", message, parent=self)
-        else:
-            messagebox.showinfo("成功", message, parent=self)
+        # 复制或链接原图在后台线程池中进行，取消后尚未开始的文件不再处理
+        def work(job):
+            from system.file_ops import FileOpEngine
+
+            def progress(done, total):
+                if job.cancelled:
+                    engine.cancel()
+                job.progress("复制图片", done, len(tasks))
+
+            engine = FileOpEngine(self.controller.get_file_link_mode(), progress_callback=progress)
+            for source_image_path, species_folder in tasks:
+                if job.cancelled:
+                    engine.cancel()
+                    break
+                engine.submit(source_image_path, species_folder)
+            report = engine.close(wait=True)
+            if job.cancelled:
+                return None
+            failed = failed_files + [os.path.basename(f) for f in engine.failed_files]
+            exported = sum(report['file_ops_placed'].values()) + report['file_ops_skipped']
+            return exported, failed
+
+        def on_done(result):
+            if result is None:
+                return
+            exported, failed = result
+            message = f"成功导出 {exported} 张错误图片到以下文件夹:\n{error_folder}"
+            if failed:
+                message += f"\n\n有 {len(failed)} 个文件导出失败，请检查日志获取详细信息。"
+                messagebox.showwarning("导出完成", message, parent=self)
+            else:
+                messagebox.showinfo("成功", message, parent=self)
+
+        def on_error(error):
+            messagebox.showerror("导出失败", f"导出错误图片失败: {error}", parent=self)
+
+        self._export_job = BackgroundJob(self.master, self.controller.status_bar, "导出错误图片", work, on_done,
+                                         on_error)
+        self._export_job.start()
+
+    def _export_result_images(self):
+        """根据已保存的检测框在后台生成带检测框的结果图片"""
+        if self._export_job is not None and self._export_job.running:
+            messagebox.showinfo("提示", "正在导出，请等待完成或先取消。", parent=self)
+            return
+        if self.controller.is_processing:
+            messagebox.showinfo("提示", "请等待图像处理完成后再导出结果图片。", parent=self)
+            return
+        self._commit_pending_correction()
+
+        source_dir = self.controller.start_page.file_path_entry.get()
+        save_dir = self.controller.start_page.save_path_entry.get()
+        if not all([source_dir, save_dir]):
+            messagebox.showerror("错误", "请先在“开始”页面设置源路径和保存路径。", parent=self)
+            return
+
+        image_names = list(self.file_listbox.get(0, tk.END))
+        if not image_names:
+            messagebox.showinfo("提示", "没有可导出的图片。", parent=self)
+            return
+
+        store = self.controller.get_result_store()
+        settings = self.controller.get_result_image_settings()
+
+        # 绘制和编码在后台线程池中进行，进度按编码完成的图片计算，取消后尚未开始编码的图片不再编码
+        def work(job):
+            from system.result_encoder import export_result_images
+            report = export_result_images(source_dir, store.get_detection, save_dir, image_names,
+                                          name_resolver=self.controller.image_processor.get_original_species_name,
+                                          progress_callback=lambda done, total: job.progress(
+                                              "生成结果图片", done, total),
+                                          stop_event=job.stop_event,
+                                          max_dim=settings['max_dim'], quality=settings['quality'],
+                                          skip_empty=settings['skip_empty'])
+            if job.cancelled:
+                return None
+            return report
+
+        def on_done(report):
+            if report is None:
+                return
+            message = f"成功生成 {report['result_images_encoded']} 张结果图片到以下文件夹:\n" \
+                      f"{os.path.join(save_dir, 'result')}"
+            if report['result_images_missing']:
+                message += f"\n\n有 {report['result_images_missing']} 张图片尚未检测，已跳过。"
+            if report['result_images_failed']:
+                message += f"\n有 {report['result_images_failed']} 张图片生成失败，请检查日志获取详细信息。"
+            messagebox.showinfo("导出完成", message, parent=self)
+
+        def on_error(error):
+            messagebox.showerror("错误", f"导出结果图片失败: {error}", parent=self)
+
+        self._export_job = BackgroundJob(self.master, self.controller.status_bar, "导出结果图片", work, on_done,
+                                         on_error)
+        self._export_job.start()
 
     def _export_validation_data(self):
-        """从校验页面的数据导出为表格文件（Excel或CSV）"""
-        temp_dir = self.controller.get_temp_photo_dir()
+        """从校验页面的数据导出为表格文件（Excel、CSV或Parquet）"""
+        if self._export_job is not None and self._export_job.running:
+            messagebox.showinfo("提示", "表格正在导出，请等待完成或先取消。", parent=self)
+            return
+        self._commit_pending_correction()
+        store = self.controller.get_result_store()
         source_dir = self.controller.start_page.file_path_entry.get()
 
-        if not temp_dir or not os.path.exists(temp_dir) or not source_dir:
+        if not store or not source_dir:
             messagebox.showerror("错误", "无法找到临时文件或源文件路径，请确保已进行批处理并且路径设置正确。",
                                  parent=self)
             return
 
-        json_files = [f for f in os.listdir(temp_dir) if f.lower().endswith('.json')]
-        if not json_files:
+        if not store.image_count():
             messagebox.showinfo("提示", "没有找到任何处理后的数据，无法导出。", parent=self)
             return
 
@@ -1007,6 +1142,17 @@ class PreviewPage(ttk.Frame):
             file_types = [("CSV 文件", "*.csv"), ("所有文件", "*.*")]
             default_extension = ".csv"
             initial_file = "校验结果.csv"
+        elif file_format == 'parquet':
+            if not arrow_available():
+                messagebox.showerror("错误", "导出 Parquet 需要安装 pyarrow。", parent=self)
+                return
+            file_types = [("Parquet 文件", "*.parquet"), ("所有文件", "*.*")]
+            default_extension = ".parquet"
+            initial_file = "校验结果.parquet"
+        elif file_format == '统计分析':
+            file_types = [("Excel 文件", "*.xlsx"), ("CSV 文件", "*.csv"), ("所有文件", "*.*")]
+            default_extension = ".xlsx"
+            initial_file = "统计分析.xlsx"
         else:
             return  # 如果格式未知则不执行操作
 
@@ -1028,59 +1174,132 @@ class PreviewPage(ttk.Frame):
         if not confidence_settings:
             confidence_settings = {}
 
-        all_image_data = []
-        earliest_date = None
+        threshold = self.controller.get_independent_threshold()
+        metadata_cache = self.controller.metadata_cache
+        folder_index = self.controller.get_folder_index(source_dir)
 
-        for json_file in json_files:
-            json_path = os.path.join(temp_dir, json_file)
-            image_filename = os.path.splitext(json_file)[0] + ".jpg"
-            image_path = os.path.join(source_dir, image_filename)
+        # 读取图片信息、计算独立探测和写入表格都在后台进行，界面线程只接收进度和最终结果
+        def work(job):
+            image_files = folder_index.image_files()
 
-            if not os.path.exists(image_path):
-                found_image = False
-                for ext in SUPPORTED_IMAGE_EXTENSIONS:
-                    temp_path = os.path.join(source_dir, os.path.splitext(json_file)[0] + ext)
-                    if os.path.exists(temp_path):
-                        image_path = temp_path
-                        found_image = True
-                        break
-                if not found_image:
-                    logger.warning(f"找不到原始图片: {image_filename}")
-                    continue
+            # 上次导出后只做了人工修正时沿用已有的索引，只重新计算受修正影响的图片
+            index = self.independence_index
+            if index is not None and index.matches(store, source_dir, image_files, confidence_settings, threshold):
+                index.refresh()
+            else:
+                cursor, _ = store.corrections_since()
+                export_rows = self._collect_export_rows(store, source_dir, folder_index, metadata_cache,
+                                                        progress_callback=lambda done, total: job.progress(
+                                                            "读取图片信息", done, total),
+                                                        stop_event=job.stop_event)
+                if job.cancelled:
+                    return None
+                if not export_rows:
+                    return {'success': False, 'error': "未能成功处理任何数据，无法导出。"}
+                job.progress("计算独立探测", 0, None)
+                # 独立探测按相机分别计算，不同相机同时拍到的同一物种各算一次
+                index = IndependenceIndex(store, source_dir, image_files, export_rows, confidence_settings,
+                                          threshold, partition_by=CAMERA_FIELD, cursor=cursor)
+                self.independence_index = index
+
+            processed_data = index.rows()
+            if file_format == '统计分析':
+                # 统计由已刷新的索引按数组一次算出，校验过程中可随时重新导出
+                job.progress("计算统计", 0, None)
+                report_format = 'csv' if output_path.lower().endswith('.csv') else 'excel'
+                analytics = Analytics(processed_data, confidence_settings, threshold, camera_by=CAMERA_FIELD,
+                                      default_camera=os.path.basename(os.path.normpath(source_dir)))
+                if job.cancelled:
+                    return None
+                paths = analytics.write(output_path, report_format)
+                if job.cancelled:
+                    return None
+                return {'success': True, 'error': None, 'path': paths[0]}
+            if file_format == 'parquet':
+                # 图片表和检测表一次写入，检测数组的数值列不经转换直接写入
+                job.progress("写入 Parquet", 0, None)
+                success = DataProcessor.export_to_parquet(processed_data, output_path, confidence_settings)
+                if job.cancelled:
+                    return None
+                return {'success': success, 'error': None}
+            success = DataProcessor.export_to_excel(processed_data, output_path, confidence_settings,
+                                                    file_format=file_format,
+                                                    progress_callback=lambda done, total: job.progress(
+                                                        "写入表格", done, total),
+                                                    stop_event=job.stop_event)
+            if job.cancelled:
+                return None
+            return {'success': success, 'error': None}
+
+        def on_done(result):
+            if result is None:
+                return
+            if result['error']:
+                messagebox.showerror("错误", result['error'], parent=self)
+            elif result['success']:
+                opened_path = result.get('path', output_path)
+                if messagebox.askyesno("成功", f"数据已成功导出到:\n{opened_path}\n\n是否立即打开文件？", parent=self):
+                    try:
+                        os.startfile(opened_path)
+                    except Exception as e:
+                        messagebox.showerror("错误", f"无法打开文件: {e}", parent=self)
+            else:
+                messagebox.showerror("导出失败", "导出文件时发生错误，请查看日志文件获取详情。", parent=self)
 
-            try:
-                metadata, _ = ImageMetadataExtractor.extract_metadata(image_path, os.path.basename(image_path))
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    json_data = json.load(f)
-                metadata.update(json_data)
-                all_image_data.append(metadata)
-                date_taken = metadata.get('拍摄日期对象')
-                if date_taken:
-                    if earliest_date is None or date_taken < earliest_date:
-                        earliest_date = date_taken
-            except Exception as e:
-                logger.error(f"处理文件 {json_file} 时出错: {e}")
+        def on_error(error):
+            if isinstance(error, FileNotFoundError):
+                messagebox.showerror("错误", f"源目录未找到: {source_dir}", parent=self)
+            else:
+                messagebox.showerror("导出失败", f"导出表格失败: {error}", parent=self)
 
-        if not all_image_data:
-            messagebox.showerror("错误", "未能成功处理任何数据，无法导出。", parent=self)
-            return
+        self._export_job = BackgroundJob(self.master, self.controller.status_bar, "导出表格", work, on_done, on_error)
+        self._export_job.start()
 
-        processed_data = DataProcessor.process_independent_detection(all_image_data, confidence_settings)
-        if earliest_date:
-            processed_data = DataProcessor.calculate_working_days(processed_data, earliest_date)
+    def _collect_export_rows(self, store, source_dir, folder_index, metadata_cache=None, progress_callback=None,
+                             stop_event=None):
+        """读取所有图片的元数据和检测结果，返回 {不含扩展名的文件名: 图像信息}，跳过找不到原图的图片
 
-        # 传递选择的文件格式
-        success = DataProcessor.export_to_excel(processed_data, output_path, confidence_settings,
-                                                file_format=file_format)
+        可在工作线程中调用，stop_event 被设置时提前返回已读取的部分。
+        """
+        export_rows = {}
+        image_basename_map = folder_index.basename_map()
+        detections = dict(store.iter_detections())
+        records = store.image_records()
+        for done, record in enumerate(records, 1):
+            if stop_event is not None and stop_event.is_set():
+                break
+            if progress_callback and (done % 200 == 0 or done == len(records)):
+                progress_callback(done, len(records))
+            stem = record['stem']
+            image_filename = record['file_name'] or stem + ".jpg"
+
+            # 通过文件夹索引确认原图存在，找不到时按同名的其他扩展名查找
+            if folder_index.signature(image_filename) is None:
+                if stem not in image_basename_map:
+                    logger.warning(f"找不到原始图片: {image_filename}")
+                    continue
+                image_filename = image_basename_map[stem]
+            image_path = os.path.join(source_dir, image_filename)
 
-        if success:
-            if messagebox.askyesno("成功", f"数据已成功导出到:\n{output_path}\n\n是否立即打开文件？", parent=self):
-                try:
-                    os.startfile(output_path)
-                except Exception as e:
-                    messagebox.showerror("错误", f"无法打开文件: {e}", parent=self)
-        else:
-            messagebox.showerror("导出失败", "导出文件时发生错误，请查看日志文件获取详情。", parent=self)
+            try:
+                # 处理时已记录拍摄时间的图片不再重新读取EXIF
+                if record['format'] is not None:
+                    camera = record['camera']
+                    if camera is None:
+                        # 旧版本结果库未记录相机，从元数据缓存（或文件头）读取
+                        camera = ImageMetadataExtractor.camera_name(ImageMetadataExtractor.cached_header_metadata(
+                            image_path, os.path.basename(image_path), metadata_cache))
+                    metadata = ImageMetadataExtractor.build_image_info(os.path.basename(image_path),
+                                                                       record['capture_time'],
+                                                                       record['time_source'], camera)
+                else:
+                    metadata = ImageMetadataExtractor.extract_metadata(image_path, os.path.basename(image_path),
+                                                                       metadata_cache)
+                metadata.update(detections.get(stem, {}))
+                export_rows[stem] = metadata
+            except Exception as e:
+                logger.error(f"处理文件 {image_filename} 时出错: {e}")
+        return export_rows
 
     def _on_resize(self, event):
         # 确定是哪个标签触发了事件
@@ -1112,6 +1331,7 @@ class PreviewPage(ttk.Frame):
             label_widget.image = photo
 
     def _on_species_photo_selected(self, event):
+        self._commit_pending_correction()
         self._count_marked = None
 
         if self._selected_species_button and self._selected_species_button.winfo_exists():
@@ -1128,8 +1348,8 @@ class PreviewPage(ttk.Frame):
 
         file_name = self.species_photo_listbox.get(selection[0])
         self.last_selected_species_image = file_name
-        photo_dir = self.controller.get_temp_photo_dir()
-        if not photo_dir:
+        store = self.controller.get_result_store()
+        if not store:
             return
 
         original_image_path = os.path.join(self.controller.start_page.file_path_entry.get(), file_name)
@@ -1143,12 +1363,11 @@ class PreviewPage(ttk.Frame):
                 self.species_image_label.image = None
             return
 
-        json_path = os.path.join(photo_dir, f"{os.path.splitext(file_name)[0]}.json")
+        detection_info = store.get_detection(file_name)
 
-        if os.path.exists(json_path):
+        if detection_info is not None:
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    self.current_species_info = json.load(f)
+                self.current_species_info = detection_info
 
                 self._recalculate_and_update_info_label(
                     self.species_info_label,
@@ -1159,7 +1378,7 @@ class PreviewPage(ttk.Frame):
                 self._redraw_boxes_with_new_confidence(self.species_conf_var.get())
 
             except Exception as e:
-                logger.error(f"加载JSON信息失败: {e}")
+                logger.error(f"加载检测信息失败: {e}")
                 self.species_info_label.config(text="加载信息失败")
         else:
             self.species_info_label.config(text="物种: - | 数量: - | 置信度: -")
@@ -1299,7 +1518,7 @@ class PreviewPage(ttk.Frame):
         format_combo = ttk.Combobox(
             export_options_frame,
             textvariable=self.export_format_var,
-            values=["CSV", "Excel", "错误照片"],
+            values=["CSV", "Excel", "Parquet", "统计分析", "错误照片", "结果图片"],
             width=8,
             state="readonly",
             takefocus=False
@@ -1312,10 +1531,11 @@ class PreviewPage(ttk.Frame):
         export_button.pack(side="left", padx=(0, 5), pady=5)
 
     def _load_species_data(self):
-        photo_dir = self.controller.get_temp_photo_dir()
+        self._commit_pending_correction()
+        store = self.controller.get_result_store()
         source_dir = self.controller.start_page.file_path_entry.get()
 
-        if not photo_dir or not os.path.exists(photo_dir) or not source_dir:
+        if not store or not source_dir:
             return
 
         self.species_listbox.delete(0, tk.END)
@@ -1324,55 +1544,42 @@ class PreviewPage(ttk.Frame):
         confidence_settings = self.controller.confidence_settings
 
         try:
-            json_files = [f for f in os.listdir(photo_dir) if f.lower().endswith('.json') and f != 'validation.json']
-        except FileNotFoundError:
-            logger.error(f"临时目录未找到: {photo_dir}")
-            return
-
-        try:
-            source_images = [f for f in os.listdir(source_dir) if f.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS)]
-            image_basename_map = {os.path.splitext(f)[0]: f for f in source_images}
+            image_basename_map = self.controller.get_folder_index(source_dir).basename_map()
         except FileNotFoundError:
             logger.error(f"源目录未找到: {source_dir}")
             return
 
         all_species_keys = set()
 
-        for json_file in json_files:
-            base_name = os.path.splitext(json_file)[0]
+        # 所有图片的检测按物种阈值向量一次性过滤
+        try:
+            filtered = DetectionArrays.from_store(store).filter(confidence_settings)
+            manual_species = store.manual_species()
+        except Exception as e:
+            logger.error(f"加载物种数据失败: {e}")
+            return
+
+        for base_name in store.stems():
             image_filename = image_basename_map.get(base_name)
 
             if not image_filename:
                 continue
 
-            json_path = os.path.join(photo_dir, json_file)
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
                 # 存储这张图片对应的有效物种名称
                 final_species_for_image = set()
 
                 # 如果是人工校验过的，直接使用其物种名称
-                if data.get('最低置信度') == '人工校验':
-                    species_names_list = data.get("物种名称", "").split(',')
+                if base_name in manual_species:
+                    species_names_list = manual_species[base_name].split(',')
                     # 清理并去重
                     final_species_for_image = {s.strip() for s in species_names_list if s.strip() and s.strip() != '空'}
 
                 # 如果不是人工校验，则根据置信度阈值过滤
                 else:
-                    confidences = data.get('all_confidences', [])
-                    classes = data.get('all_classes', [])
-                    names_map = data.get('names_map', {})
-
-                    if confidences and classes and names_map:
-                        for cls, conf in zip(classes, confidences):
-                            species_name = names_map.get(str(int(cls)))
-                            if species_name:
-                                threshold = confidence_settings.get(species_name,
-                                                                    confidence_settings.get("global", 0.25))
-                                if conf >= threshold:
-                                    final_species_for_image.add(species_name)
+                    summary = filtered.get(base_name)
+                    if summary is not None:
+                        final_species_for_image = set(summary.species)
 
                 # 根据过滤或解析后的物种列表，生成唯一的key并分类
                 if not final_species_for_image:
@@ -1386,7 +1593,7 @@ class PreviewPage(ttk.Frame):
                 self.species_image_map[species_key].append(image_filename)
 
             except Exception as e:
-                logger.error(f"加载物种数据失败 ({json_file}): {e}")
+                logger.error(f"加载物种数据失败 ({image_filename}): {e}")
 
         # 将物种列表排序，并确保“标记为空”在列表末尾
         sorted_species = sorted(list(all_species_keys), key=lambda x: (x == "标记为空", x))
@@ -1437,24 +1644,21 @@ class PreviewPage(ttk.Frame):
             self.species_photo_listbox.event_generate("<<ListboxSelect>>")
 
     def _load_species_buttons(self):
-        """从/res/model.json加载物种按钮"""
+        """从/res/model.json加载物种按钮（使用物种分类索引中的按钮列表）"""
         for widget in self.species_buttons_frame.winfo_children():
             widget.destroy()
 
         try:
-            model_json_path = resource_path("res/model.json")
-            if os.path.exists(model_json_path):
-                with open(model_json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    species_list = data.get("species", [])
-                    for species_name in species_list:
-                        # 使用lambda来捕获按钮实例
-                        def create_command(s, b):
-                            return lambda: self._on_species_button_press(s, b)
-
-                        btn = ttk.Button(self.species_buttons_frame, text=species_name)
-                        btn['command'] = create_command(species_name, btn)
-                        btn.pack(fill="x", pady=2)
+            species_list = Taxonomy.load().species_buttons
+            if species_list is not None:
+                for species_name in species_list:
+                    # 使用lambda来捕获按钮实例
+                    def create_command(s, b):
+                        return lambda: self._on_species_button_press(s, b)
+
+                    btn = ttk.Button(self.species_buttons_frame, text=species_name)
+                    btn['command'] = create_command(species_name, btn)
+                    btn.pack(fill="x", pady=2)
             else:
                 ttk.Label(self.species_buttons_frame, text="未找到model.json").pack()
         except Exception as e:
@@ -1483,7 +1687,7 @@ class PreviewPage(ttk.Frame):
 
         # 如果数量已经标记，则更新JSON并跳转
         if self._count_marked is not None:
-            self._update_json_file(file_name, new_species=self._species_marked, new_count=str(self._count_marked))
+            self._update_result_record(file_name, new_species=self._species_marked, new_count=str(self._count_marked))
             self._move_to_next_image()
         else:
             # 如果只点击了物种，且原始识别包含多个物种，则将数量设置为总和
@@ -1494,13 +1698,13 @@ class PreviewPage(ttk.Frame):
                 try:
                     species_counts_original = [int(c.strip()) for c in species_counts_original_str]
                     new_count = sum(species_counts_original)
-                    self._update_json_file(file_name, new_species=self._species_marked, new_count=str(new_count))
+                    self._update_result_record(file_name, new_species=self._species_marked, new_count=str(new_count))
                 except (ValueError, IndexError):
                     # 如果转换失败，则仅更新物种名称
-                    self._update_json_file(file_name, new_species=self._species_marked)
+                    self._update_result_record(file_name, new_species=self._species_marked)
             else:
                 # 如果原始识别只有一个物种，或为空，则仅更新物种名称 (数量维持原样)
-                self._update_json_file(file_name, new_species=self._species_marked)
+                self._update_result_record(file_name, new_species=self._species_marked)
 
     def _mark_and_move_to_next(self, is_correct=None, species_name=None, count=None):
         """
@@ -1514,16 +1718,14 @@ class PreviewPage(ttk.Frame):
 
         # 处理“正确”按钮
         if is_correct is True:
-            self.validation_data[file_name] = True
-            self._save_validation_data()
+            self._set_verdict(file_name, True)
             self._move_to_next_image()
             return
 
         # 处理“空”按钮
         if species_name == "空" and count == "空":
-            self._update_json_file(file_name, new_species="空", new_count="空")
-            self.validation_data[file_name] = False  # 标记为 False
-            self._save_validation_data()
+            self._update_result_record(file_name, new_species="空", new_count="空")
+            self._set_verdict(file_name, False)
             self._move_to_next_image()
             return
 
@@ -1532,17 +1734,15 @@ class PreviewPage(ttk.Frame):
             self._species_marked = species_name
             # 如果数量已经标记，则更新并跳转
             if self._count_marked is not None:
-                self._update_json_file(file_name, new_species=self._species_marked, new_count=str(self._count_marked))
-                self.validation_data[file_name] = False  # 标记为 False
-                self._save_validation_data()
+                self._update_result_record(file_name, new_species=self._species_marked, new_count=str(self._count_marked))
+                self._set_verdict(file_name, False)
                 self._move_to_next_image()
             else:
                 # 否则，只更新物种名称
-                self._update_json_file(file_name, new_species=self._species_marked)
+                self._update_result_record(file_name, new_species=self._species_marked)
         # 如果这是一个由数量按钮触发的跳转
         elif self._species_marked and self._count_marked is not None:
-            self.validation_data[file_name] = False  # 标记为 False
-            self._save_validation_data()
+            self._set_verdict(file_name, False)
             self._move_to_next_image()
 
     def _on_quantity_button_press(self, count, btn_widget):
@@ -1576,11 +1776,11 @@ class PreviewPage(ttk.Frame):
 
         # 如果物种已经标记，则更新JSON并跳转
         if self._species_marked:
-            self._update_json_file(file_name, new_species=self._species_marked, new_count=str(self._count_marked))
+            self._update_result_record(file_name, new_species=self._species_marked, new_count=str(self._count_marked))
             self._move_to_next_image()
         else:
             # 否则，只更新JSON中的数量
-            self._update_json_file(file_name, new_count=str(final_count))
+            self._update_result_record(file_name, new_count=str(final_count))
 
     def _mark_other_species(self):
         """处理“其他”按钮的逻辑，弹出对话框"""
@@ -1593,7 +1793,7 @@ class PreviewPage(ttk.Frame):
         dialog = CorrectionDialog(self, title="输入其他物种信息", original_info=self.current_species_info)
         if dialog.result:
             species_name, species_count, remark = dialog.result
-            self._update_json_file(file_name, new_species=species_name, new_count=species_count, new_remark=remark)
+            self._update_result_record(file_name, new_species=species_name, new_count=species_count, new_remark=remark)
             # 标记为错误并跳转
             self._mark_as_error_and_save(file_name)
             self._move_to_next_image()
@@ -1684,18 +1884,15 @@ class PreviewPage(ttk.Frame):
             widget.destroy()
 
         try:
-            model_json_path = resource_path("res/model.json")
-            if os.path.exists(model_json_path):
-                with open(model_json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    species_list = data.get("species", [])
-                    for species_name in species_list:
-                        def create_command(s, b):
-                            return lambda: self._on_validation_species_button_press(s, b)
-
-                        btn = ttk.Button(self.validation_species_buttons_frame, text=species_name)
-                        btn['command'] = create_command(species_name, btn)
-                        btn.pack(fill="x", pady=2)
+            species_list = Taxonomy.load().species_buttons
+            if species_list is not None:
+                for species_name in species_list:
+                    def create_command(s, b):
+                        return lambda: self._on_validation_species_button_press(s, b)
+
+                    btn = ttk.Button(self.validation_species_buttons_frame, text=species_name)
+                    btn['command'] = create_command(species_name, btn)
+                    btn.pack(fill="x", pady=2)
             else:
                 ttk.Label(self.validation_species_buttons_frame, text="未找到model.json").pack()
         except Exception as e:
@@ -1720,7 +1917,7 @@ class PreviewPage(ttk.Frame):
         self._mark_as_error_and_save(file_name)
 
         if self._count_validation_marked is not None:
-            self._update_json_file(file_name, new_species=self._species_validation_marked,
+            self._update_result_record(file_name, new_species=self._species_validation_marked,
                                    new_count=str(self._count_validation_marked))
             self._move_to_next_validation_image()
         else:
@@ -1732,14 +1929,14 @@ class PreviewPage(ttk.Frame):
                 try:
                     species_counts_original = [int(c.strip()) for c in species_counts_original_str]
                     new_count = sum(species_counts_original)
-                    self._update_json_file(file_name, new_species=self._species_validation_marked,
+                    self._update_result_record(file_name, new_species=self._species_validation_marked,
                                            new_count=str(new_count))
                 except (ValueError, IndexError):
                     # 如果转换失败，则仅更新物种名称
-                    self._update_json_file(file_name, new_species=self._species_validation_marked)
+                    self._update_result_record(file_name, new_species=self._species_validation_marked)
             else:
                 # 如果原始识别只有一个物种，或为空，则仅更新物种名称 (数量维持原样)
-                self._update_json_file(file_name, new_species=self._species_validation_marked)
+                self._update_result_record(file_name, new_species=self._species_validation_marked)
 
     def _on_validation_quantity_button_press(self, count, btn_widget):
         """处理时间校验页的数量按钮点击事件"""
@@ -1768,11 +1965,11 @@ class PreviewPage(ttk.Frame):
         self._mark_as_error_and_save(file_name)
 
         if self._species_validation_marked:
-            self._update_json_file(file_name, new_species=self._species_validation_marked,
+            self._update_result_record(file_name, new_species=self._species_validation_marked,
                                    new_count=str(self._count_validation_marked))
             self._move_to_next_validation_image()
         else:
-            self._update_json_file(file_name, new_count=str(final_count))
+            self._update_result_record(file_name, new_count=str(final_count))
 
     def _mark_validation_other_species(self):
         selection = self.validation_listbox.curselection()
@@ -1791,13 +1988,12 @@ class PreviewPage(ttk.Frame):
         file_name = self.validation_listbox.get(selection[0])
 
         if is_correct is True:
-            self.validation_data[file_name] = True
+            self._set_verdict(file_name, True)
         else:
-            self.validation_data[file_name] = False
+            self._set_verdict(file_name, False)
             if species_name or count or remark:
-                self._update_json_file(file_name, new_species=species_name, new_count=count, new_remark=remark)
+                self._update_result_record(file_name, new_species=species_name, new_count=count, new_remark=remark)
 
-        self._save_validation_data()
         self._move_to_next_validation_image()
 
     def _move_to_next_validation_image(self):
@@ -1844,7 +2040,9 @@ class PreviewPage(ttk.Frame):
         export_type = self.export_format_var.get()
         if export_type == "错误照片":
             self._export_error_images()
-        elif export_type in ["Excel", "CSV"]:
+        elif export_type == "结果图片":
+            self._export_result_images()
+        elif export_type in ["Excel", "CSV", "Parquet", "统计分析"]:
             self._export_validation_data()
         else:
             messagebox.showwarning("提示", "未知的导出类型。", parent=self)
@@ -1885,47 +2083,9 @@ class PreviewPage(ttk.Frame):
         except (ValueError, TypeError):
             return
 
-        # --- 字体加载 ---
-        try:
-            font_path = resource_path("res/AlibabaPuHuiTi-3-65-Medium.ttf")
-            font_size = int(0.03 * original_image.height)
-            font = ImageFont.truetype(font_path, font_size)
-        except IOError:
-            logger.warning("中文字体文件 res/AlibabaPuHuiTi-3-65-Medium.ttf 未找到。")
-            font = ImageFont.load_default()
-
         # --- 绘制逻辑 ---
-        img_to_draw = original_image.copy()
-        draw = ImageDraw.Draw(img_to_draw)
-        boxes_info = detection_info.get("检测框", [])
-
-        for box in boxes_info:
-            confidence = box.get("置信度", 0)
-            if confidence >= conf_threshold:
-                bbox = box.get("边界框")
-                species_name = box.get("物种")
-                label = f"{species_name} {confidence:.2f}"
-                color = self._get_color_for_species(species_name)
-
-                # 转换十六进制颜色为RGB元组
-                hex_color = color.lstrip('#')
-                r, g, b = tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
-
-                # 计算亮度 (YIQ a formula)
-                brightness = ((r * 299) + (g * 587) + (b * 114)) / 1000
-
-                # 根据亮度选择字体颜色
-                text_color = "#FFFFFF" if brightness < 128 else "#000000"
-
-                p1, p2 = (int(bbox[0]), int(bbox[1])), (int(bbox[2]), int(bbox[3]))
-                draw.rectangle([p1, p2], outline=color, width=7)
-
-                try:
-                    text_bbox = draw.textbbox((p1[0], p1[1] - font_size - 3), label, font=font)
-                    draw.rectangle(text_bbox, fill=color)
-                    draw.text((p1[0], p1[1] - font_size - 3), label, fill=text_color, font=font)
-                except AttributeError:
-                    draw.text((p1[0], p1[1] - 15), label, fill=color, font=font)
+        img_to_draw = draw_boxes(original_image.copy(), detection_info.get("检测框", []),
+                                 conf_threshold=conf_threshold, color_for=self._get_color_for_species)
 
         # --- 更新UI ---
         resized_img = self._resize_image_to_fit(img_to_draw, image_label.winfo_width(), image_label.winfo_height())
@@ -1963,9 +2123,8 @@ class PreviewPage(ttk.Frame):
     def _get_color_for_species(self, species_name):
         """为物种分配一个固定的颜色"""
         if species_name not in self.species_color_map:
-            # 使用hash确保同一物种总能得到相同的颜色索引
-            color_index = hash(species_name) % len(self.color_palette)
-            self.species_color_map[species_name] = self.color_palette[color_index]
+            # 与实时预览使用相同的分配规则，确保同一物种总能得到相同的颜色
+            self.species_color_map[species_name] = species_color(species_name)
         return self.species_color_map[species_name]
 
     def on_image_double_click(self, event):
@@ -2020,8 +2179,7 @@ class PreviewPage(ttk.Frame):
     def _mark_as_error_and_save(self, file_name):
         """将当前文件标记为不正确并保存验证数据。"""
         if file_name:
-            self.validation_data[file_name] = False
-            self._save_validation_data()
+            self._set_verdict(file_name, False)
             self._update_validation_progress()
 
     def navigate_listbox(self, direction: str):
@@ -2085,27 +2243,17 @@ class PreviewPage(ttk.Frame):
             label_widget.config(text=info_text)
             return
 
-        boxes_info = detection_info.get("检测框", [])
-        filtered_species_counts = Counter()
-        valid_confidences = []
-
-        for box in boxes_info:
-            confidence = box.get("置信度", 0)
-            if confidence >= conf_threshold:
-                species_name = box.get("物种")
-                if species_name:
-                    filtered_species_counts[species_name] += 1
-                    valid_confidences.append(confidence)
+        summary = summarize_boxes(detection_info.get("检测框", []), conf_threshold)
 
         min_conf_text = ''
-        if not filtered_species_counts:
+        if not summary.species:
             species_text = "空"
             count_text = "空"
         else:
-            species_text = ",".join(filtered_species_counts.keys())
-            count_text = ",".join(map(str, filtered_species_counts.values()))
-            if valid_confidences:
-                min_conf_text = f"{min(valid_confidences):.3f}"
+            species_text = ",".join(summary.species)
+            count_text = ",".join(map(str, summary.counts))
+            if summary.min_conf is not None:
+                min_conf_text = f"{summary.min_conf:.3f}"
 
         info_text = (f"物种: {species_text} | "
                      f"数量: {count_text} | "
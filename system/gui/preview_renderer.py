@@ -0,0 +1,120 @@
+"""
+实时预览渲染模块 - 在后台线程中按显示尺寸渲染批处理的实时预览
+"""
+
+import os
+import logging
+import threading
+
+from system.annotation_renderer import render_annotated
+
+logger = logging.getLogger(__name__)
+
+
+class LivePreviewRenderer:
+    """批处理实时预览的后台渲染器
+
+    只保留一个待渲染槽位：界面跟不上时，新提交的帧直接替换尚未渲染的旧帧。
+    渲染在后台线程中以显示尺寸解码并绘制检测框，再通过界面更新通道交给界面线程直接显示。
+    """
+
+    def __init__(self, ui_channel, on_ready):
+        """初始化渲染器
+
+        Args:
+            ui_channel: 界面更新通道 (UIUpdateChannel)
+            on_ready: 在界面线程中调用的显示函数，参数为 (渲染好的图像, 帧信息字典)
+        """
+        self.ui_channel = ui_channel
+        self.on_ready = on_ready
+        self._condition = threading.Condition()
+        self._pending = None
+        self._target_size = (400, 300)
+        self._thread = None
+        self._rendering = False
+
+    def set_target_size(self, width: int, height: int) -> None:
+        """设置预览区域的显示尺寸（在界面线程中读取控件尺寸后调用）"""
+        if width > 1 and height > 1:
+            self._target_size = (width, height)
+
+    def submit(self, file_path: str, boxes, image_info: dict, species_info: dict, on_done=None) -> None:
+        """提交一帧待渲染的预览，可在任意线程中调用
+
+        Args:
+            file_path: 图像路径
+            boxes: 检测框列表（原图坐标）
+            image_info: 处理流程中已提取的图像元数据
+            species_info: 物种检测信息
+            on_done: 该帧显示完成或被丢弃后调用，用于释放内存配额
+        """
+        frame = {
+            'file_path': file_path,
+            'boxes': boxes,
+            'image_info': image_info,
+            'species_info': species_info,
+            'on_done': on_done,
+        }
+        with self._condition:
+            superseded = self._pending
+            self._pending = frame
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._render_loop, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        if superseded:
+            self._finish(superseded)
+
+    @staticmethod
+    def _finish(frame) -> None:
+        """调用帧的完成回调"""
+        on_done = frame.get('on_done')
+        if on_done:
+            try:
+                on_done()
+            except Exception as e:
+                logger.error(f"释放预览帧失败: {e}")
+
+    def _render_loop(self) -> None:
+        """后台渲染线程，空闲一段时间后自动退出"""
+        while True:
+            with self._condition:
+                if self._pending is None:
+                    self._condition.wait(timeout=5.0)
+                    if self._pending is None:
+                        self._thread = None
+                        return
+                frame = self._pending
+                self._pending = None
+                self._rendering = True
+
+            image = None
+            try:
+                width, height = self._target_size
+                image, original_size = render_annotated(frame['file_path'], frame['boxes'], width, height)
+                frame['image_size'] = original_size
+                frame['file_size'] = os.path.getsize(frame['file_path'])
+            except Exception as e:
+                logger.error(f"渲染实时预览失败: {e}")
+
+            self.ui_channel.post('preview', self._deliver, image, frame,
+                                 on_drop=lambda f=frame: self._finish(f))
+            with self._condition:
+                self._rendering = False
+                self._condition.notify_all()
+
+    def wait_idle(self, timeout: float = 2.0) -> bool:
+        """等待所有已提交的帧渲染完成并交给界面更新通道
+
+        Returns:
+            在超时前完成时返回 True
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._rendering, timeout)
+
+    def _deliver(self, image, frame) -> None:
+        """在界面线程中显示渲染好的预览"""
+        try:
+            self.on_ready(image, frame)
+        finally:
+            self._finish(frame)
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk
 
 from system.gui.ui_components import SpeedProgressBar, RoundedButton
+from system.resource_governor import RESOURCE_PRESETS, DEFAULT_RESOURCE_PRESET
 
 
 class StartPage(ttk.Frame):
@@ -52,6 +53,7 @@ class StartPage(ttk.Frame):
         options_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=10)
         self.save_detect_image_var = tk.BooleanVar(value=True)
         self.copy_img_var = tk.BooleanVar(value=False)
+        self.live_export_var = tk.BooleanVar(value=False)
         options_container = ttk.Frame(options_frame)
         options_container.pack(fill="x", padx=10, pady=10)
 
@@ -63,6 +65,24 @@ class StartPage(ttk.Frame):
             options_container, text="按物种分类图片", variable=self.copy_img_var
         ).grid(row=1, column=0, sticky="w", pady=5, padx=10)
 
+        # 处理过程中逐行写入CSV表格，处理完成后补全工作天数和独立探测首只
+        ttk.Checkbutton(
+            options_container, text="处理时实时导出表格(CSV)", variable=self.live_export_var
+        ).grid(row=2, column=0, sticky="w", pady=5, padx=10)
+
+        # 资源策略在处理过程中也可以切换
+        self.resource_preset_var = tk.StringVar(value=RESOURCE_PRESETS[DEFAULT_RESOURCE_PRESET]['label'])
+        preset_frame = ttk.Frame(options_container)
+        preset_frame.grid(row=3, column=0, sticky="w", pady=5, padx=10)
+        ttk.Label(preset_frame, text="资源策略:").pack(side="left")
+        ttk.Combobox(
+            preset_frame,
+            textvariable=self.resource_preset_var,
+            values=[preset['label'] for preset in RESOURCE_PRESETS.values()],
+            width=10,
+            state="readonly"
+        ).pack(side="left", padx=(5, 0))
+
         ttk.Frame(self).grid(row=3, column=0, sticky="nsew")
 
         bottom_frame = ttk.Frame(self)
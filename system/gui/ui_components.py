@@ -308,6 +308,30 @@ class InfoBar(ttk.Frame):
         self.status_label = ttk.Label(self, text="就绪", padding=(10, 5))
         self.status_label.pack(side="left")
 
+        # 后台任务的进度条和取消按钮，只在任务运行时显示
+        self.job_frame = ttk.Frame(self)
+        self.job_cancel_button = ttk.Button(self.job_frame, text="取消", width=6)
+        self.job_cancel_button.pack(side="right", padx=(5, 10))
+        self.job_progress = ttk.Progressbar(self.job_frame, mode="determinate", length=200, maximum=1.0)
+        self.job_progress.pack(side="right", pady=5)
+
+    def start_job(self, text: str, on_cancel) -> None:
+        """显示后台任务的进度条和取消按钮"""
+        self.status_label.config(text=text)
+        self.job_progress.config(value=0)
+        self.job_cancel_button.config(command=on_cancel, state="normal")
+        self.job_frame.pack(side="right")
+
+    def update_job(self, text: str, fraction: float) -> None:
+        """更新后台任务的状态文本和进度（0-1）"""
+        self.status_label.config(text=text)
+        self.job_progress.config(value=max(0.0, min(fraction, 1.0)))
+
+    def end_job(self, text: str) -> None:
+        """隐藏进度条和取消按钮，显示任务结果"""
+        self.job_frame.pack_forget()
+        self.status_label.config(text=text)
+
 
 class SpeedProgressBar(ttk.Frame):
     def __init__(self, parent, accent_color="#2ecc71"):
@@ -417,7 +441,6 @@ class SpeedProgressBar(ttk.Frame):
                 self.time_text = f"剩余: {remaining_time}"
 
         self._draw_progressbar()
-        self.update_idletasks()
     # ^ ^ ^ ^ ^ ^ ^ ^ ^ ^ ^ ^ ^ ^ ^ ^ ^ ^ ^ ^
 
 
@@ -0,0 +1,95 @@
+"""
+界面更新通道模块 - 合并并限速工作线程发往界面的更新
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class UIUpdateChannel:
+    """工作线程到界面线程的合并更新通道
+
+    工作线程通过 post 投递界面更新，同一个键只保留最新的一次（例如进度、状态文本、预览帧），
+    界面线程以固定频率轮询并执行，因此界面开销与处理速度无关。
+    """
+
+    def __init__(self, master, interval_ms: int = 100):
+        """初始化更新通道
+
+        Args:
+            master: Tk 根窗口
+            interval_ms: 轮询间隔（毫秒），默认约 10 Hz
+        """
+        self.master = master
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()
+        self._running = False
+        self._stopping = False
+        self._after_id = None
+
+    def start(self) -> None:
+        """开始轮询，必须在界面线程中调用"""
+        with self._lock:
+            self._stopping = False
+            if self._running:
+                return
+            self._running = True
+        self._schedule()
+
+    def stop(self) -> None:
+        """请求停止轮询，可在任意线程中调用；剩余的更新会在最后一次轮询中执行"""
+        with self._lock:
+            self._stopping = True
+
+    def post(self, key: str, callback, *args, on_drop=None) -> None:
+        """投递一次界面更新，可在任意线程中调用
+
+        Args:
+            key: 更新的键，相同键的旧更新尚未执行时会被新的更新替换
+            callback: 在界面线程中执行的函数
+            *args: 传给 callback 的参数
+            on_drop: 该更新被替换而未执行时调用（在投递线程中），用于释放其持有的资源
+        """
+        with self._lock:
+            superseded = self._pending.pop(key, None)
+            self._pending[key] = (callback, args, on_drop)
+        if superseded and superseded[2]:
+            try:
+                superseded[2]()
+            except Exception as e:
+                logger.error(f"释放被替换的界面更新失败: {e}")
+
+    def _schedule(self) -> None:
+        try:
+            self._after_id = self.master.after(self.interval_ms, self._poll)
+        except Exception:
+            # 窗口已销毁
+            with self._lock:
+                self._running = False
+
+    def _poll(self) -> None:
+        """在界面线程中执行积累的更新"""
+        with self._lock:
+            pending = self._pending
+            self._pending = OrderedDict()
+            stopping = self._stopping
+
+        for callback, args, _ in pending.values():
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"执行界面更新失败: {e}")
+
+        if stopping:
+            with self._lock:
+                # 停止请求之后又有新的更新投递，则再轮询一次
+                if self._pending:
+                    stopping = False
+                else:
+                    self._running = False
+        if not stopping:
+            self._schedule()
@@ -7,7 +7,7 @@ from typing import Dict, Any, Optional, List
 from collections import Counter
 from ultralytics import YOLO
 import json
-from system.utils import resource_path
+from system.taxonomy import Taxonomy
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +17,8 @@ class ImageProcessor:
     def __init__(self, model_path: str):
         """初始化图像处理器"""
         self.model = self._load_model(model_path)
-        self.translation_dict = self._load_translation_file()
+        self.taxonomy = Taxonomy.load()
+        self.translation_dict = self.taxonomy.translations
 
     def _load_model(self, model_path: str) -> Optional[YOLO]:
         """加载YOLO模型"""
@@ -28,20 +29,6 @@ class ImageProcessor:
             logger.error(f"加载模型失败: {e}")
             return None
 
-    def _load_translation_file(self) -> Dict[str, str]:
-        """加载翻译文件"""
-        try:
-            translate_file_path = resource_path("res/translate.json")
-            if os.path.exists(translate_file_path):
-                with open(translate_file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            else:
-                logger.warning("翻译文件 res/translate.json 未找到，将使用原始英文名称。")
-                return {}
-        except Exception as e:
-            logger.error(f"加载或解析翻译文件失败: {e}")
-            return {}
-
     def detect_species(self, img_path: str, use_fp16: bool = False, iou: float = 0.3,
                        conf: float = 0.25, augment: bool = True,
                        agnostic_nms: bool = True, timeout: float = 10.0) -> Dict[str, Any]:
@@ -150,14 +137,18 @@ class ImageProcessor:
             result_path = os.path.join(save_path, "result")
             os.makedirs(result_path, exist_ok=True)
 
+            species_name = self.get_first_detected_species(results)
             for c, h in enumerate(results):
-                species_name = self._get_first_detected_species(results)
                 result_file = os.path.join(result_path, f"{image_name}_result_{species_name}.jpg")
                 h.save(filename=result_file)
         except Exception as e:
             logger.error(f"保存检测结果图片失败: {e}")
 
-    def _get_first_detected_species(self, results: Any) -> str:
+    def get_original_species_name(self, translated_name: str) -> str:
+        """将翻译后的物种名称还原为模型中的原始名称"""
+        return self.taxonomy.original_name(translated_name)
+
+    def get_first_detected_species(self, results: Any) -> str:
         """从检测结果中获取第一个物种的名称"""
         try:
             for r in results:
@@ -192,55 +183,64 @@ class ImageProcessor:
         """保存探测结果信息到指定的临时目录"""
         if not results or not temp_photo_dir:
             return ""
+        return self.write_detection_info_json(self.build_detection_info(results, species_info), image_name,
+                                              temp_photo_dir)
+
+    def build_detection_info(self, results, species_info: dict) -> Dict[str, Any]:
+        """从检测结果中提取可序列化的检测信息（物种、置信度和原图坐标的检测框）"""
+        detection_info = {
+            "物种名称": species_info.get('物种名称', ''),
+            "物种数量": species_info.get('物种数量', ''),
+            "最低置信度": species_info.get('最低置信度', ''),
+            "检测时间": species_info.get('检测时间', '')
+        }
+        boxes_info = []
+        all_confidences = []
+        all_classes = []
+        names_map = {}
+
+        if results:
+            for r in results:
+                original_names_map = r.names
+                translated_names_map = {
+                    class_id: self.translation_dict.get(english_name, english_name)
+                    for class_id, english_name in original_names_map.items()
+                }
+                names_map = translated_names_map
+                if r.boxes is not None:
+                    for i, box in enumerate(r.boxes):
+                        cls_id = int(box.cls.item())
+                        species_name = r.names[cls_id]
+
+                        translated_name = self.translation_dict.get(species_name, species_name)
+
+                        confidence = float(box.conf.item())
+                        bbox = [float(x) for x in box.xyxy.tolist()[0]]
+
+                        box_info = {"物种": translated_name, "置信度": confidence, "边界框": bbox}
+
+                        boxes_info.append(box_info)
+                    all_confidences = r.boxes.conf.tolist()
+                    all_classes = r.boxes.cls.tolist()
+
+        detection_info["检测框"] = boxes_info
+        detection_info["all_confidences"] = all_confidences
+        detection_info["all_classes"] = all_classes
+        detection_info["names_map"] = names_map
+        return detection_info
+
+    def write_detection_info_json(self, detection_info: Dict[str, Any], image_name: str, temp_photo_dir: str) -> str:
+        """将检测信息写入临时目录下与图像同名的JSON文件"""
+        if not detection_info or not temp_photo_dir:
+            return ""
 
         try:
-            import json
             os.makedirs(temp_photo_dir, exist_ok=True)
-            data_to_save = {
-                "物种名称": species_info.get('物种名称', ''),
-                "物种数量": species_info.get('物种数量', ''),
-                "最低置信度": species_info.get('最低置信度', ''),
-                "检测时间": species_info.get('检测时间', '')
-            }
-            boxes_info = []
-            all_confidences = []
-            all_classes = []
-            names_map = {}
-
-            if results:
-                for r in results:
-                    original_names_map = r.names
-                    translated_names_map = {
-                        class_id: self.translation_dict.get(english_name, english_name)
-                        for class_id, english_name in original_names_map.items()
-                    }
-                    names_map = translated_names_map
-                    if r.boxes is not None:
-                        for i, box in enumerate(r.boxes):
-                            cls_id = int(box.cls.item())
-                            species_name = r.names[cls_id]
-
-                            translated_name = self.translation_dict.get(species_name, species_name)
-
-                            confidence = float(box.conf.item())
-                            bbox = [float(x) for x in box.xyxy.tolist()[0]]
-
-                            box_info = {"物种": translated_name, "置信度": confidence, "边界框": bbox}
-
-                            boxes_info.append(box_info)
-                        all_confidences = r.boxes.conf.tolist()
-                        all_classes = r.boxes.cls.tolist()
-
-            data_to_save["检测框"] = boxes_info
-            data_to_save["all_confidences"] = all_confidences
-            data_to_save["all_classes"] = all_classes
-            data_to_save["names_map"] = names_map
-
             base_name, _ = os.path.splitext(image_name)
             json_path = os.path.join(temp_photo_dir, f"{base_name}.json")
 
             with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, ensure_ascii=False, indent=4)
+                json.dump(detection_info, f, ensure_ascii=False, indent=4)
 
             return json_path
         except Exception as e:
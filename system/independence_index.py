@@ -0,0 +1,176 @@
+"""
+独立探测索引模块 - 按物种保存按时间排列的探测序列，人工修正后只重新计算受影响的相邻图片
+"""
+
+import bisect
+import logging
+from typing import Dict, Any, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from system.data_processor import DataProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class IndependenceIndex:
+    """导出表格所用的图片信息及其独立探测标记
+
+    每个 分区+物种 保存一条按 (拍摄时间, 图片序号) 排列的序列。一张图片是否为独立探测只取决于
+    它在各序列中的前一张图片，因此修正一张图片的物种时，只需在受影响的序列中删除或插入该图片，
+    并重新计算它本身和它在这些序列中的后一张图片。拍摄时间不会因修正而改变，工作天数保持不变。
+
+    索引对应一个结果数据库的版本号、一次文件夹内容、一组置信度设置和时间间隔，
+    其中任一项变化时需要重新构建。
+    """
+
+    def __init__(self, store, source_dir: str, files: Sequence[str], rows: Dict[str, Dict[str, Any]],
+                 confidence_settings: Dict[str, float], threshold_seconds: float,
+                 partition_by: Union[str, Sequence[str], None] = None, cursor: int = 0):
+        """构建索引并计算全部图片的独立探测标记和工作天数
+
+        Args:
+            store: 项目的结果数据库（ResultStore）
+            source_dir: 图像文件夹
+            files: 构建时文件夹中的图像文件名
+            rows: {不含扩展名的文件名: 图像信息}，按导出顺序排列
+            confidence_settings: 物种置信度阈值设置
+            threshold_seconds: 独立探测的时间间隔（秒）
+            partition_by: 分区字段名，见 DataProcessor.process_independent_detection
+            cursor: 读取 rows 之前最后一条修正记录的ID，之后的修正在 refresh 时应用
+        """
+        self.store = store
+        self.revision = store.revision()
+        self.source_dir = source_dir
+        self.files = list(files)
+        self.confidence_settings = dict(confidence_settings)
+        self.threshold = threshold_seconds
+        self.partition_fields = [partition_by] if isinstance(partition_by, str) else list(partition_by or [])
+        self._cursor = cursor
+
+        self._stems = list(rows)
+        self._rows = list(rows.values())
+        self._seq = {stem: i for i, stem in enumerate(self._stems)}
+        self._times: List[Optional[int]] = [None] * len(self._rows)
+        self._groups: List[Set[Tuple]] = [set() for _ in self._rows]
+        self._timelines: Dict[Tuple, List[Tuple[int, int]]] = {}
+
+        DataProcessor.process_independent_detection(self._rows, self.confidence_settings, self.threshold,
+                                                    partition_by)
+        dates = [row['拍摄日期对象'] for row in self._rows if row.get('拍摄日期对象')]
+        if dates:
+            DataProcessor.calculate_working_days(self._rows, min(dates))
+        self._build()
+
+    def _build(self) -> None:
+        dated = [i for i, row in enumerate(self._rows) if row.get('拍摄日期对象')]
+        if not dated:
+            return
+        times = np.array([self._rows[i]['拍摄日期对象'] for i in dated],
+                         dtype='datetime64[us]').astype(np.int64).tolist()
+        for i, t in zip(dated, times):
+            self._times[i] = t
+
+        row_image, row_species, species_names = DataProcessor.species_rows([self._rows[i] for i in dated],
+                                                                           self.confidence_settings)
+        for pos, code in zip(row_image.tolist(), row_species.tolist()):
+            i = dated[pos]
+            group = (self._partition(i), species_names[code])
+            if group not in self._groups[i]:
+                self._groups[i].add(group)
+                self._timelines.setdefault(group, []).append((self._times[i], i))
+        for timeline in self._timelines.values():
+            timeline.sort()
+
+    def _partition(self, i: int) -> tuple:
+        return tuple(self._rows[i].get(field) for field in self.partition_fields)
+
+    def _species_groups(self, i: int) -> Set[Tuple]:
+        """按与 DataProcessor.species_rows 相同的规则确定一张图片参与计算的 分区+物种"""
+        _, row_species, species_names = DataProcessor.species_rows([self._rows[i]], self.confidence_settings)
+        partition = self._partition(i)
+        return {(partition, species_names[code]) for code in row_species.tolist()}
+
+    def _is_independent(self, i: int) -> bool:
+        """图片在任一序列中为第一张，或与前一张的时间差超过阈值"""
+        t = self._times[i]
+        for group in self._groups[i]:
+            timeline = self._timelines[group]
+            pos = bisect.bisect_left(timeline, (t, i))
+            if pos == 0 or (t - timeline[pos - 1][0]) / 1e6 > self.threshold:
+                return True
+        return False
+
+    def matches(self, store, source_dir: str, files: Sequence[str], confidence_settings: Dict[str, float],
+                threshold_seconds: float) -> bool:
+        """索引是否仍对应当前的数据库、文件夹和设置"""
+        return (store is self.store and store.revision() == self.revision and source_dir == self.source_dir
+                and list(files) == self.files and dict(confidence_settings) == self.confidence_settings
+                and threshold_seconds == self.threshold)
+
+    def update(self, stem: str, detection_info: Dict[str, Any]) -> int:
+        """应用一张图片修正后的检测信息
+
+        Args:
+            stem: 不含扩展名的文件名
+            detection_info: 修正后的检测信息（ResultStore.get_detection 的结果）
+
+        Returns:
+            独立探测标记被重新计算的图片数
+        """
+        i = self._seq.get(stem)
+        if i is None:
+            return 0
+        row = self._rows[i]
+        row.update(detection_info)
+        t = self._times[i]
+        if t is None:
+            return 0
+
+        old_groups = self._groups[i]
+        new_groups = self._species_groups(i)
+        affected = {i}
+        for group in old_groups - new_groups:
+            timeline = self._timelines[group]
+            pos = bisect.bisect_left(timeline, (t, i))
+            del timeline[pos]
+            # 后一张图片的前一张变了
+            if pos < len(timeline):
+                affected.add(timeline[pos][1])
+            if not timeline:
+                del self._timelines[group]
+        for group in new_groups - old_groups:
+            timeline = self._timelines.setdefault(group, [])
+            pos = bisect.bisect_left(timeline, (t, i))
+            timeline.insert(pos, (t, i))
+            if pos + 1 < len(timeline):
+                affected.add(timeline[pos + 1][1])
+        self._groups[i] = new_groups
+
+        for j in affected:
+            self._rows[j]['独立探测首只'] = '是' if self._is_independent(j) else ''
+        return len(affected)
+
+    def refresh(self) -> int:
+        """应用构建或上次刷新之后数据库中的人工修正
+
+        Returns:
+            应用修正的图片数
+        """
+        self._cursor, stems = self.store.corrections_since(self._cursor)
+        applied = 0
+        for stem in stems:
+            i = self._seq.get(stem)
+            if i is None:
+                continue
+            info = self.store.get_detection(self._rows[i]['文件名'])
+            if info is not None:
+                self.update(stem, info)
+                applied += 1
+        if applied:
+            logger.info(f"独立探测索引已应用 {applied} 张图片的修正")
+        return applied
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """返回用于导出的图像信息（浅拷贝，导出时的修改不影响索引）"""
+        return [dict(row) for row in self._rows]
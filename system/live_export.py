@@ -0,0 +1,152 @@
+"""
+实时导出模块 - 处理过程中将每张完成的图片逐行追加到CSV表格，处理完成后补全工作天数和独立探测首只
+"""
+
+import os
+import csv
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from system.data_processor import DataProcessor, EXPORT_COLUMNS
+from system.table_writer import write_table
+from system.taxonomy import Taxonomy
+
+logger = logging.getLogger(__name__)
+
+# 实时导出的文件名
+LIVE_EXPORT_FILENAME = "物种检测信息.csv"
+
+
+class LiveExport:
+    """处理过程中逐行追加的CSV表格
+
+    行按处理完成的顺序追加，每 flush_rows 行刷新到磁盘，处理中途即可打开文件查看已有结果。
+    工作天数在拍摄时间预扫描后即可确定，随行写入；独立探测首只取决于全部图片，处理时留空，
+    由 finalize 在处理完成后一次性补全，并写入临时文件后替换原文件。
+    """
+
+    def __init__(self, output_path: str, confidence_settings: Dict[str, float],
+                 earliest_date: Optional[datetime] = None, flush_rows: int = 20):
+        """初始化实时导出
+
+        Args:
+            output_path: CSV文件路径
+            confidence_settings: 物种置信度阈值设置
+            earliest_date: 最早的拍摄日期，用于计算工作天数
+            flush_rows: 每追加多少行刷新一次文件
+        """
+        self.output_path = output_path
+        self.confidence_settings = dict(confidence_settings)
+        self.earliest_date = earliest_date
+        self.flush_rows = max(int(flush_rows), 1)
+        self.rows_written = 0
+        self._taxonomy = Taxonomy.load()
+        self._file = None
+        self._writer = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self._file is not None
+
+    def start(self, existing_rows: Iterable[Dict[str, Any]] = ()) -> bool:
+        """创建文件并写入表头
+
+        继续上次的处理时传入已完成图片的信息，文件以这些行重新生成，上次文件中已失效（图片被删除或修改）的行被丢弃。
+
+        Returns:
+            是否成功创建文件
+        """
+        try:
+            os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+            # 使用 utf-8-sig 以便 Excel 正确显示中文
+            self._file = open(self.output_path, 'w', newline='', encoding='utf-8-sig')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(EXPORT_COLUMNS)
+            for info in existing_rows:
+                self._writer.writerow(self._row(info))
+                self.rows_written += 1
+            self._file.flush()
+            logger.info(f"实时导出已开始: {self.output_path}")
+            return True
+        except Exception as e:
+            logger.error(f"创建实时导出文件失败: {e}")
+            self.close()
+            return False
+
+    def _row(self, info: Dict[str, Any]) -> List[Any]:
+        info = dict(info)
+        # 处理完成前独立探测首只尚未确定
+        info.pop('独立探测首只', None)
+        if self.earliest_date and info.get('拍摄日期对象'):
+            DataProcessor.calculate_working_days([info], self.earliest_date)
+        return DataProcessor.export_row(info, self.confidence_settings, self._taxonomy)
+
+    def append(self, info: Dict[str, Any]) -> None:
+        """追加一张处理完成的图片，写入失败时停止实时导出，不影响图像处理"""
+        if self._file is None:
+            return
+        with self._lock:
+            try:
+                self._writer.writerow(self._row(info))
+                self.rows_written += 1
+                self._pending += 1
+                if self._pending >= self.flush_rows:
+                    self._file.flush()
+                    self._pending = 0
+            except Exception as e:
+                logger.error(f"写入实时导出文件失败，已停止实时导出: {e}")
+                self.close()
+
+    def close(self) -> None:
+        """刷新并关闭文件，已写入的行保留在文件中"""
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.close()
+            except OSError as e:
+                logger.warning(f"关闭实时导出文件失败: {e}")
+            self._file = None
+            self._writer = None
+            self._pending = 0
+
+    def finalize(self, image_info_list: List[Dict[str, Any]],
+                 progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+                 stop_event: Optional[threading.Event] = None) -> List[str]:
+        """以补全了工作天数和独立探测首只的图像信息重写文件
+
+        行数超出Excel行数上限时与普通导出一样分为多个文件。
+
+        Args:
+            image_info_list: 已计算独立探测和工作天数的图像信息，顺序与追加顺序一致
+            progress_callback: 进度回调 (已写入行数, 总行数)
+            stop_event: 设置后停止重写，保留处理过程中写入的文件
+
+        Returns:
+            写入的文件路径，失败或被停止时为空列表
+        """
+        self.close()
+        base, ext = os.path.splitext(self.output_path)
+        tmp_base = f"{base}.tmp"
+        try:
+            # 导出时会按置信度修改物种信息，使用浅拷贝
+            rows = DataProcessor.iter_export_rows([dict(info) for info in image_info_list],
+                                                  self.confidence_settings)
+            tmp_paths = write_table(rows, tmp_base + ext, EXPORT_COLUMNS, file_format='csv',
+                                    total=len(image_info_list), progress_callback=progress_callback,
+                                    stop_event=stop_event)
+            paths = []
+            for tmp_path in tmp_paths:
+                path = base + tmp_path[len(tmp_base):]
+                os.replace(tmp_path, path)
+                paths.append(path)
+            if paths:
+                logger.info(f"实时导出已完成: {', '.join(paths)}")
+            return paths
+        except Exception as e:
+            logger.error(f"补全实时导出文件失败: {e}")
+            return []
@@ -0,0 +1,168 @@
+"""
+内存调控模块 - 在长时间批处理中限制内存峰值
+"""
+
+import os
+import gc
+import sys
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def get_process_rss() -> int:
+    """获取当前进程的常驻内存 (RSS)，单位为字节，无法获取时返回0"""
+    try:
+        if psutil is not None:
+            return psutil.Process(os.getpid()).memory_info().rss
+
+        if sys.platform.startswith('linux'):
+            with open('/proc/self/statm', 'r') as f:
+                resident_pages = int(f.read().split()[1])
+            return resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD),
+                            ('PageFaultCount', wintypes.DWORD),
+                            ('PeakWorkingSetSize', ctypes.c_size_t),
+                            ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t),
+                            ('PeakPagefileUsage', ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return 0
+
+        # 其他平台（如未安装 psutil 的 macOS）无法取得当前RSS；ru_maxrss 是历史峰值，一旦超出预算便不再回落，
+        # 因此不按内存预算调控，只限制在途帧数
+        return 0
+    except Exception as e:
+        logger.debug(f"获取进程内存失败: {e}")
+        return 0
+
+
+class MemoryGovernor:
+    """内存调控器
+
+    跟踪进程RSS和正在处理中的帧数（包括仍被界面回调持有的检测结果）。
+    超出内存预算或在途帧数上限时阻塞解码阶段，只有在超出预算时才执行垃圾回收，
+    并记录每次运行的内存峰值。
+    """
+
+    def __init__(self, budget_mb: int = 4096, max_inflight: int = 4, max_wait: float = 30.0):
+        """初始化内存调控器
+
+        Args:
+            budget_mb: 内存预算，单位MB
+            max_inflight: 允许同时在途的最大帧数
+            max_wait: 单次背压等待的最长时间（秒），超时后放行以避免死锁
+        """
+        self.budget_bytes = max(256, int(budget_mb)) * 1024 * 1024
+        self.max_inflight = max(1, int(max_inflight))
+        self.max_wait = max_wait
+        self._condition = threading.Condition()
+        self._inflight = 0
+        self._peak_rss = 0
+        self._peak_inflight = 0
+        self._gc_runs = 0
+        self._backpressure_waits = 0
+        self._backpressure_seconds = 0.0
+        self._last_gc_time = 0.0
+
+    def _over_budget(self) -> bool:
+        """采样RSS、更新峰值并判断是否超出预算"""
+        rss = get_process_rss()
+        if rss > self._peak_rss:
+            self._peak_rss = rss
+        return rss > self.budget_bytes
+
+    def _collect(self) -> None:
+        """执行一次垃圾回收（限制频率，避免在持续超预算时反复回收）"""
+        now = time.monotonic()
+        if now - self._last_gc_time < 1.0:
+            return
+        self._last_gc_time = now
+        gc.collect()
+        self._gc_runs += 1
+
+    def acquire(self, stop_event: Optional[threading.Event] = None) -> None:
+        """在解码下一帧前调用，必要时阻塞直至内存或在途帧数回落
+
+        Args:
+            stop_event: 停止事件，被设置时立即返回
+        """
+        start = time.monotonic()
+        waited = False
+        with self._condition:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                over_budget = self._over_budget()
+                if over_budget:
+                    self._collect()
+                    over_budget = self._over_budget()
+                if not over_budget and self._inflight < self.max_inflight:
+                    break
+                # 内存超预算但没有在途帧可以释放时，继续等待也无济于事
+                if over_budget and self._inflight == 0:
+                    break
+                if time.monotonic() - start >= self.max_wait:
+                    logger.warning("内存背压等待超时，继续处理下一帧")
+                    break
+                waited = True
+                self._condition.wait(timeout=0.2)
+
+            self._inflight += 1
+            self._peak_inflight = max(self._peak_inflight, self._inflight)
+
+        if waited:
+            self._backpressure_waits += 1
+            self._backpressure_seconds += time.monotonic() - start
+
+    def release(self) -> None:
+        """一帧的全部引用（包括界面回调）释放后调用"""
+        with self._condition:
+            self._inflight = max(0, self._inflight - 1)
+            self._condition.notify_all()
+
+    @property
+    def inflight(self) -> int:
+        """当前在途帧数"""
+        with self._condition:
+            return self._inflight
+
+    def report(self) -> Dict[str, Any]:
+        """生成本次运行的内存统计
+
+        Returns:
+            包含峰值内存、预算、垃圾回收次数和背压统计的字典
+        """
+        self._over_budget()
+        return {
+            'peak_rss_mb': round(self._peak_rss / 1024 ** 2, 1),
+            'memory_budget_mb': round(self.budget_bytes / 1024 ** 2),
+            'max_inflight_frames': self.max_inflight,
+            'peak_inflight_frames': self._peak_inflight,
+            'gc_runs': self._gc_runs,
+            'backpressure_waits': self._backpressure_waits,
+            'backpressure_seconds': round(self._backpressure_seconds, 2),
+        }
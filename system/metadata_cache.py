@@ -0,0 +1,158 @@
+"""
+元数据缓存模块 - 以 (路径, 大小, 修改时间) 为键持久化保存图像的拍摄时间、尺寸和相机信息
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = "metadata_cache.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    capture_time TEXT,
+    time_source TEXT,
+    width INTEGER,
+    height INTEGER,
+    format TEXT,
+    make TEXT,
+    model TEXT
+);
+"""
+
+# 缓存记录的字段，capture_time 为 datetime 或 None，time_source 为拍摄时间来源
+RECORD_FIELDS = ('capture_time', 'time_source', 'width', 'height', 'file_size', 'format', 'make', 'model')
+
+
+def _key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def file_signature(path: str) -> Tuple[int, int]:
+    """返回文件的 (大小, 修改时间纳秒)，文件不存在时抛出 OSError"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class MetadataCache:
+    """图像元数据缓存
+
+    所有文件夹共用一个 SQLite 数据库（temp/metadata_cache.db）。记录以文件路径为主键，
+    读取时比对文件的大小和修改时间，不一致即视为未缓存，因此文件被替换后会自动重新读取。
+    """
+
+    _instances: Dict[str, 'MetadataCache'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_path: str):
+        """打开缓存数据库（一般通过 MetadataCache.open 获取共享实例）
+
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(metadata)")}
+        if 'time_source' not in columns:
+            self._conn.execute("ALTER TABLE metadata ADD COLUMN time_source TEXT")
+
+    @classmethod
+    def open(cls, db_path: str) -> 'MetadataCache':
+        """获取缓存数据库的共享实例"""
+        key = os.path.normcase(os.path.abspath(db_path))
+        with cls._instances_lock:
+            cache = cls._instances.get(key)
+            if cache is None:
+                cache = cls(db_path)
+                cls._instances[key] = cache
+            return cache
+
+    @classmethod
+    def close_all(cls) -> None:
+        """关闭所有缓存数据库"""
+        with cls._instances_lock:
+            for cache in cls._instances.values():
+                cache.close()
+            cls._instances.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"关闭元数据缓存失败: {e}")
+
+    def get(self, path: str, signature: Optional[Tuple[int, int]] = None) -> Optional[Dict[str, Any]]:
+        """读取一张图片的缓存记录
+
+        Args:
+            path: 图像文件路径
+            signature: 文件的 (大小, 修改时间纳秒)，为 None 时读取文件状态
+
+        Returns:
+            缓存记录，未缓存或文件已变化时返回 None
+        """
+        try:
+            size, mtime_ns = signature or file_signature(path)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT capture_time, time_source, width, height, format, make, model FROM metadata "
+                "WHERE path = ? AND size = ? AND mtime_ns = ?", (_key(path), size, mtime_ns)).fetchone()
+        # 没有记录拍摄时间来源的旧记录需要重新读取（无法获得拍摄时间的记录来源为空字符串）
+        if row is None or row[1] is None:
+            return None
+        capture_time, time_source, width, height, fmt, make, model = row
+        return {
+            'capture_time': datetime.fromisoformat(capture_time) if capture_time else None,
+            'time_source': time_source or None,
+            'width': width,
+            'height': height,
+            'file_size': size,
+            'format': fmt,
+            'make': make,
+            'model': model,
+        }
+
+    def put_many(self, entries: List[Tuple[str, Tuple[int, int], Dict[str, Any]]]) -> None:
+        """在一个事务中写入多条记录
+
+        Args:
+            entries: [(图像文件路径, (大小, 修改时间纳秒), 记录)]
+        """
+        if not entries:
+            return
+        rows = []
+        for path, (size, mtime_ns), record in entries:
+            capture_time = record.get('capture_time')
+            rows.append((_key(path), size, mtime_ns, capture_time.isoformat() if capture_time else None,
+                         record.get('time_source') or '', record.get('width'), record.get('height'),
+                         record.get('format'), record.get('make'), record.get('model')))
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO metadata (path, size, mtime_ns, capture_time, time_source, width, height, "
+                    "format, make, model) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                self._conn.execute("ROLLBACK")
+                logger.error(f"写入元数据缓存失败: {e}")
+
+    def put(self, path: str, signature: Tuple[int, int], record: Dict[str, Any]) -> None:
+        """写入一张图片的记录"""
+        self.put_many([(path, signature, record)])
@@ -4,85 +4,300 @@
 
 import os
 import logging
-from typing import Dict, Any, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple, List, Callable
 from datetime import datetime
 from PIL import Image
 
-from system.config import DATE_FORMATS
+from system.config import INDEPENDENT_DETECTION_THRESHOLD
+from system.exif_reader import (read_image_header, TAG_EXIF_IFD, TAG_DATETIME_ORIGINAL, TAG_DATETIME,
+                                TAG_MAKE, TAG_MODEL)
+from system.metadata_cache import MetadataCache, file_signature
+from system.timestamp_parser import TimestampParser, resolve_timestamp
 
 logger = logging.getLogger(__name__)
 
+# 文件头中需要读取的EXIF标签
+_HEADER_TAGS = (TAG_DATETIME_ORIGINAL, TAG_DATETIME, TAG_MAKE, TAG_MODEL)
+# 图像信息中区分相机的字段，独立探测和统计按此字段分别计算
+CAMERA_FIELD = '相机'
+
+
+class CaptureTimeTable:
+    """文件夹的拍摄时间表，在推理开始前即可按时间排序、划分连拍序列和估计调查时长"""
+
+    def __init__(self, times: Dict[str, Optional[datetime]], sources: Optional[Dict[str, Optional[str]]] = None,
+                 cameras: Optional[Dict[str, Optional[str]]] = None):
+        """初始化
+
+        Args:
+            times: {文件名: 拍摄时间}，没有拍摄时间的图片为 None
+            sources: {文件名: 拍摄时间来源}（exif、filename 或 mtime）
+            cameras: {文件名: 相机厂商和型号}，没有相机信息的图片为 None
+        """
+        self.times = times
+        self.sources = sources or {}
+        self.cameras = cameras or {}
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def get(self, filename: str) -> Optional[datetime]:
+        return self.times.get(filename)
+
+    def source(self, filename: str) -> Optional[str]:
+        return self.sources.get(filename)
+
+    def camera(self, filename: str) -> Optional[str]:
+        return self.cameras.get(filename)
+
+    def sorted_files(self) -> List[str]:
+        """按拍摄时间排序的文件名，没有拍摄时间的图片按文件名排在最后"""
+        timed = sorted((t, name) for name, t in self.times.items() if t)
+        untimed = sorted(name for name, t in self.times.items() if not t)
+        return [name for _, name in timed] + untimed
+
+    @property
+    def earliest(self) -> Optional[datetime]:
+        span = self.span()
+        return span[0] if span else None
+
+    def span(self) -> Optional[Tuple[datetime, datetime]]:
+        """最早和最晚的拍摄时间，没有任何拍摄时间时返回 None"""
+        times = [t for t in self.times.values() if t]
+        return (min(times), max(times)) if times else None
+
+    def sequences(self, gap_seconds: float = INDEPENDENT_DETECTION_THRESHOLD) -> List[List[str]]:
+        """将相邻拍摄时间间隔不超过 gap_seconds 的图片划为同一序列（不含没有拍摄时间的图片）"""
+        groups: List[List[str]] = []
+        last_time = None
+        for name in self.sorted_files():
+            current = self.times[name]
+            if not current:
+                break
+            if last_time is None or (current - last_time).total_seconds() > gap_seconds:
+                groups.append([])
+            groups[-1].append(name)
+            last_time = current
+        return groups
+
+
 class ImageMetadataExtractor:
     """图像元数据提取器，用于获取图像的EXIF信息"""
 
+    # 所有图片共用的时间解析器，按 文件夹+相机厂商+型号 学习时间格式
+    timestamp_parser = TimestampParser()
+
     @staticmethod
-    def extract_metadata(img_path: str, filename: str) -> Tuple[Dict[str, Any], Optional[Image.Image]]:
-        """提取图像元数据
+    def build_image_info(filename: str, date_taken: Optional[datetime] = None,
+                         time_source: Optional[str] = None, camera: Optional[str] = None) -> Dict[str, Any]:
+        """根据文件名和拍摄时间构建元数据字典
 
         Args:
-            img_path: 图像文件路径
             filename: 图像文件名
+            date_taken: 拍摄时间
+            time_source: 拍摄时间来源（exif、filename 或 mtime）
+            camera: 相机厂商和型号（见 camera_name），记录在 CAMERA_FIELD 字段中
 
         Returns:
-            包含元数据的字典和PIL图像对象
+            与 extract_metadata 结构相同的元数据字典
         """
+        image_info = {
+            '文件名': filename,
+            '格式': filename.split('.')[-1].lower(),
+            '拍摄日期': None,
+            '拍摄时间': None,
+            '拍摄日期对象': None,
+            '工作天数': None,
+            '物种名称': '',
+            '物种数量': '',
+            'detect_results': None,
+            '最低置信度': None,
+            '独立探测首只': '',
+        }
+        if date_taken:
+            image_info['拍摄日期'] = date_taken.strftime('%Y-%m-%d')
+            image_info['拍摄时间'] = date_taken.strftime('%H:%M')
+            image_info['拍摄日期对象'] = date_taken
+            if time_source:
+                image_info['时间来源'] = time_source
+        if camera:
+            image_info[CAMERA_FIELD] = camera
+        return image_info
+
+    @staticmethod
+    def camera_name(record: Dict[str, Any]) -> Optional[str]:
+        """由文件头元数据得到 "厂商 型号" 形式的相机名称，没有相机信息时返回 None"""
+        return " ".join(v for v in (record.get('make'), record.get('model')) if v) or None
+
+    @staticmethod
+    def _read_header(img_path: str, filename: str) -> Dict[str, Any]:
+        """读取文件头，拍摄时间保留为EXIF原始字符串（exif_time）"""
         try:
-            img = Image.open(img_path)
-            file_type = filename.split('.')[-1].lower()
+            header = read_image_header(img_path, _HEADER_TAGS)
+        except ValueError as e:
+            logger.debug(f"快速读取文件头失败，改用PIL读取 ({filename}): {e}")
+            header = None
+        if header is not None and header.size is not None:
+            tags, size, fmt = header
+        else:
+            with Image.open(img_path) as img:
+                pil_exif = img.getexif()
+                tags = dict(pil_exif)
+                tags.update(pil_exif.get_ifd(TAG_EXIF_IFD))
+                size, fmt = img.size, img.format
 
-            image_info = {
-                '文件名': filename,
-                '格式': file_type,
-                '拍摄日期': None,
-                '拍摄时间': None,
-                '拍摄日期对象': None,
-                '工作天数': None,
-                '物种名称': '',
-                '物种数量': '',
-                'detect_results': None,
-                '最低置信度': None,
-                '独立探测首只': '',
-            }
+        def text(tag):
+            value = tags.get(tag)
+            return (value.strip('\x00 ') or None) if isinstance(value, str) else None
 
-            # 提取EXIF数据
-            exif = img._getexif()
-            if exif:
-                date_taken = ImageMetadataExtractor._get_date_from_exif(exif, filename)
-                if date_taken:
-                    image_info['拍摄日期'] = date_taken.strftime('%Y-%m-%d')
-                    image_info['拍摄时间'] = date_taken.strftime('%H:%M')
-                    image_info['拍摄日期对象'] = date_taken
+        return {
+            'exif_time': text(TAG_DATETIME_ORIGINAL) or text(TAG_DATETIME),
+            'width': size[0],
+            'height': size[1],
+            'format': fmt,
+            'make': text(TAG_MAKE),
+            'model': text(TAG_MODEL),
+        }
 
-            return image_info, img
-        except Exception as e:
-            logger.error(f"提取图像元数据失败 ({filename}): {e}")
-            return {
-                '文件名': filename,
-                '格式': filename.split('.')[-1].lower(),
-            }, None
+    @staticmethod
+    def _camera_key(img_path: str, record: Dict[str, Any]) -> Tuple:
+        """时间格式按 文件夹+相机厂商+型号 学习"""
+        return os.path.dirname(os.path.abspath(img_path)), record.get('make'), record.get('model')
+
+    @staticmethod
+    def _resolve_capture_time(record: Dict[str, Any], img_path: str,
+                              mtime_ns: Optional[int] = None) -> Dict[str, Any]:
+        """将EXIF原始时间解析为 capture_time，没有可用的EXIF时间时从文件名或修改时间推断并记录来源"""
+        exif_time = record.pop('exif_time', None)
+        record['capture_time'], record['time_source'] = resolve_timestamp(
+            exif_time, img_path, ImageMetadataExtractor.timestamp_parser,
+            ImageMetadataExtractor._camera_key(img_path, record), mtime_ns)
+        return record
 
     @staticmethod
-    def _get_date_from_exif(exif: Dict, filename: str) -> Optional[datetime]:
-        """从EXIF数据中提取拍摄日期
+    def read_header_metadata(img_path: str, filename: str) -> Dict[str, Any]:
+        """读取文件头中的拍摄时间、尺寸、格式和相机信息
+
+        JPEG 和 TIFF 只读取文件头中的EXIF段和帧头，其他格式由 PIL 读取文件头（均不解码图像）。
 
         Args:
-            exif: EXIF数据字典
-            filename: 文件名（用于日志记录）
+            img_path: 图像文件路径
+            filename: 图像文件名（用于日志记录）
 
         Returns:
-            日期时间对象或None
+            包含 capture_time、time_source、width、height、format、make、model 的字典
         """
-        # 尝试从两个可能的EXIF标签中获取日期
-        date_str = exif.get(36867) or exif.get(306)
-        if not date_str:
-            return None
+        record = ImageMetadataExtractor._read_header(img_path, filename)
+        return ImageMetadataExtractor._resolve_capture_time(record, img_path)
+
+    @staticmethod
+    def cached_header_metadata(img_path: str, filename: str, cache: Optional[MetadataCache] = None) -> Dict[str, Any]:
+        """读取图像的文件头元数据，优先使用元数据缓存，未缓存时读取文件头并写入缓存
 
-        # 尝试不同的日期格式
-        for fmt in DATE_FORMATS:
+        Returns:
+            read_header_metadata 的结果，另含 file_size
+        """
+        signature = file_signature(img_path)
+        record = cache.get(img_path, signature) if cache else None
+        if record is None:
+            record = ImageMetadataExtractor._read_header(img_path, filename)
+            ImageMetadataExtractor._resolve_capture_time(record, img_path, signature[1])
+            record['file_size'] = signature[0]
+            if cache:
+                cache.put(img_path, signature, record)
+        return record
+
+    @staticmethod
+    def read_date_taken(img_path: str, filename: str, cache: Optional[MetadataCache] = None) -> Optional[datetime]:
+        """读取图像的拍摄时间（见 cached_header_metadata）"""
+        return ImageMetadataExtractor.cached_header_metadata(img_path, filename, cache)['capture_time']
+
+    @staticmethod
+    def prescan_capture_times(directory: str, filenames: List[str], max_workers: Optional[int] = None,
+                              stop_event: Optional[threading.Event] = None,
+                              progress_callback: Optional[Callable[[int, int], None]] = None,
+                              cache: Optional[MetadataCache] = None) -> CaptureTimeTable:
+        """用线程池并行读取整个文件夹的拍摄时间
+
+        Args:
+            directory: 图像文件夹
+            filenames: 图像文件名列表
+            max_workers: 线程数，默认按CPU核心数确定
+            stop_event: 设置后尽快停止，未读取的图片记为 None
+            progress_callback: 进度回调 (已完成数, 总数)
+            cache: 元数据缓存，已缓存的图片不再读取文件，新读取的结果在扫描结束后一次写入
+
+        Returns:
+            拍摄时间表
+
+        新读取的图片先并行读取文件头，再按相机汇总全部EXIF时间确定格式后统一解析。
+        """
+        def read_one(filename: str):
+            if stop_event is not None and stop_event.is_set():
+                return None, None
+            img_path = os.path.join(directory, filename)
             try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
+                signature = file_signature(img_path)
+                record = cache.get(img_path, signature) if cache else None
+                if record is not None:
+                    return record, None
+                record = ImageMetadataExtractor._read_header(img_path, filename)
+                record['file_size'] = signature[0]
+                return record, (img_path, signature)
+            except Exception as e:
+                logger.warning(f"读取拍摄时间失败 ({filename}): {e}")
+                return None, None
+
+        workers = max_workers or min(8, (os.cpu_count() or 2) * 2)
+        records: Dict[str, Optional[Dict[str, Any]]] = {}
+        new_entries = []
+        total = len(filenames)
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="exif-scan") as executor:
+            for done, (filename, (record, entry)) in enumerate(zip(filenames, executor.map(read_one, filenames)), 1):
+                records[filename] = record
+                if entry:
+                    new_entries.append((*entry, record))
+                if progress_callback and (done % 500 == 0 or done == total):
+                    progress_callback(done, total)
+
+        samples: Dict[Tuple, List[str]] = {}
+        for img_path, _, record in new_entries:
+            if record.get('exif_time'):
+                samples.setdefault(ImageMetadataExtractor._camera_key(img_path, record), []).append(record['exif_time'])
+        for key, values in samples.items():
+            ImageMetadataExtractor.timestamp_parser.learn(key, values)
+        for img_path, signature, record in new_entries:
+            ImageMetadataExtractor._resolve_capture_time(record, img_path, signature[1])
+        if cache:
+            cache.put_many(new_entries)
 
-        logger.warning(f"无法解析图片 '{filename}' 的日期格式: '{date_str}'")
-        return None
\ No newline at end of file
+        times = {name: record['capture_time'] if record else None for name, record in records.items()}
+        sources = {name: record.get('time_source') if record else None for name, record in records.items()}
+        cameras = {name: ImageMetadataExtractor.camera_name(record) if record else None
+                   for name, record in records.items()}
+        return CaptureTimeTable(times, sources, cameras)
+
+    @staticmethod
+    def extract_metadata(img_path: str, filename: str, cache: Optional[MetadataCache] = None) -> Dict[str, Any]:
+        """提取图像元数据（不解码图像，只读取文件头中的拍摄时间）
+
+        Args:
+            img_path: 图像文件路径
+            filename: 图像文件名
+            cache: 元数据缓存
+
+        Returns:
+            包含元数据的字典
+        """
+        try:
+            record = ImageMetadataExtractor.cached_header_metadata(img_path, filename, cache)
+            return ImageMetadataExtractor.build_image_info(filename, record['capture_time'], record['time_source'],
+                                                           ImageMetadataExtractor.camera_name(record))
+        except Exception as e:
+            logger.error(f"提取图像元数据失败 ({filename}): {e}")
+            return {
+                '文件名': filename,
+                '格式': filename.split('.')[-1].lower(),
+            }
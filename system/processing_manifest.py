@@ -0,0 +1,111 @@
+"""
+处理清单模块 - 记录已完成处理的文件，用于断点续处理
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessingManifest:
+    """已完成文件清单
+
+    以 (相对路径, 文件大小, 修改时间) 作为文件标识。续处理时只跳过标识完全一致的文件，
+    因此文件增删、重命名或被替换后都不会跳过或重复处理错误的图像，也不依赖处理顺序。
+    """
+
+    def __init__(self, root_dir: str, entries: Optional[Dict[str, Any]] = None):
+        """初始化处理清单
+
+        Args:
+            root_dir: 图像所在的根目录
+            entries: 已有的清单条目，格式为 {相对路径: {'size': 大小, 'mtime': 修改时间}}
+        """
+        self.root_dir = root_dir
+        self._entries: Dict[str, Dict[str, Any]] = dict(entries or {})
+        self._lock = threading.Lock()
+
+    def _relative_path(self, filename: str) -> str:
+        """获取相对于根目录的规范化路径"""
+        full_path = os.path.join(self.root_dir, filename)
+        return os.path.relpath(full_path, self.root_dir).replace(os.sep, '/')
+
+    def _file_signature(self, filename: str) -> Optional[Tuple[int, float]]:
+        """获取文件的 (大小, 修改时间) 签名，文件不存在时返回None"""
+        try:
+            stat = os.stat(os.path.join(self.root_dir, filename))
+            return stat.st_size, round(stat.st_mtime, 3)
+        except OSError:
+            return None
+
+    def is_done(self, filename: str) -> bool:
+        """判断文件是否已处理且自处理后未被修改"""
+        with self._lock:
+            entry = self._entries.get(self._relative_path(filename))
+        if not entry:
+            return False
+        signature = self._file_signature(filename)
+        return signature is not None and (entry.get('size'), entry.get('mtime')) == signature
+
+    def mark_done(self, filename: str) -> None:
+        """将文件标记为已完成，可在任意线程中按任意顺序调用"""
+        signature = self._file_signature(filename)
+        if signature is None:
+            return
+        size, mtime = signature
+        with self._lock:
+            self._entries[self._relative_path(filename)] = {'size': size, 'mtime': mtime}
+
+    def pending(self, filenames: Iterable[str]) -> List[str]:
+        """从给定文件列表中筛选出尚未完成（或已被修改）的文件，保持原有顺序"""
+        return [f for f in filenames if not self.is_done(f)]
+
+    def stale_files(self) -> List[str]:
+        """返回清单中已被删除或修改的文件（相对路径）"""
+        with self._lock:
+            keys = list(self._entries.keys())
+        return [key for key in keys if not self.is_done(key)]
+
+    def discard(self, filename: str) -> None:
+        """从清单中移除文件"""
+        with self._lock:
+            self._entries.pop(self._relative_path(filename), None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """导出为可JSON序列化的字典"""
+        with self._lock:
+            return {key: dict(value) for key, value in self._entries.items()}
+
+    @classmethod
+    def from_cache(cls, root_dir: str, cache_data: Dict[str, Any]) -> 'ProcessingManifest':
+        """从处理缓存中恢复清单
+
+        旧版本缓存只记录了位置索引 processed_files，此时根据缓存中已有结果的文件名
+        重建清单（以当前文件状态为准）。
+
+        Args:
+            root_dir: 图像所在的根目录
+            cache_data: 处理缓存字典
+
+        Returns:
+            处理清单对象
+        """
+        entries = (cache_data or {}).get('manifest')
+        if isinstance(entries, dict):
+            return cls(root_dir, entries)
+
+        manifest = cls(root_dir)
+        for item in (cache_data or {}).get('excel_data', []):
+            filename = item.get('文件名') if isinstance(item, dict) else None
+            if filename:
+                manifest.mark_done(filename)
+        if len(manifest):
+            logger.info(f"已从旧版缓存重建处理清单，共 {len(manifest)} 个文件")
+        return manifest
@@ -0,0 +1,193 @@
+"""
+资源调控模块 - 控制批处理的CPU线程数、优先级和核心绑定，保证界面流畅
+"""
+
+import os
+import sys
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 资源策略预设
+# thread_ratio: torch 计算线程数占CPU核心数的比例
+# interop_threads: torch 算子间并行线程数，None 表示使用默认值
+# low_priority: 是否降低处理线程的优先级（只作用于处理线程，不影响 torch 的计算线程）
+RESOURCE_PRESETS = {
+    'interactive': {'label': '交互优先', 'thread_ratio': 0.5, 'interop_threads': 1, 'low_priority': True},
+    'throughput': {'label': '最大吞吐', 'thread_ratio': 1.0, 'interop_threads': None, 'low_priority': False},
+}
+DEFAULT_RESOURCE_PRESET = 'interactive'
+
+
+def preset_from_label(label: str) -> str:
+    """根据界面显示的名称获取预设键名"""
+    for key, preset in RESOURCE_PRESETS.items():
+        if preset['label'] == label:
+            return key
+    return DEFAULT_RESOURCE_PRESET
+
+
+def preset_label(key: str) -> str:
+    """获取预设在界面上显示的名称"""
+    return RESOURCE_PRESETS.get(key, RESOURCE_PRESETS[DEFAULT_RESOURCE_PRESET])['label']
+
+
+class ResourceGovernor:
+    """资源调控器
+
+    界面线程通过 request_preset 随时切换策略，处理线程在每帧开始前调用 apply_pending，
+    在自身线程内应用 torch 线程数、线程优先级和CPU核心绑定。
+
+    优先级和核心绑定只作用于处理线程本身：torch 的计算线程池在首次推理时创建，不随之改变，
+    其CPU占用只由 torch 线程数控制。
+    """
+
+    def __init__(self, preset: str = DEFAULT_RESOURCE_PRESET, pin_affinity: bool = False):
+        """初始化资源调控器
+
+        Args:
+            preset: 初始策略键名
+            pin_affinity: 是否将处理线程绑定到除第一个核心以外的核心（第一个核心留给界面）
+        """
+        self._lock = threading.Lock()
+        self._requested = preset if preset in RESOURCE_PRESETS else DEFAULT_RESOURCE_PRESET
+        self._pin_affinity = pin_affinity
+        self._applied: Optional[tuple] = None
+        self._interop_configured = False
+        self._presets_used: List[str] = []
+        self._torch_threads = None
+        self._low_priority = False
+        self._priority_notice_logged = False
+        if hasattr(os, 'sched_getaffinity'):
+            self._allowed_cpus = sorted(os.sched_getaffinity(0))
+        else:
+            self._allowed_cpus = list(range(os.cpu_count() or 1))
+
+    def request_preset(self, preset: str, pin_affinity: Optional[bool] = None) -> None:
+        """请求切换资源策略，将在处理线程的下一帧生效"""
+        with self._lock:
+            if preset in RESOURCE_PRESETS:
+                self._requested = preset
+            if pin_affinity is not None:
+                self._pin_affinity = pin_affinity
+
+    def begin_run(self) -> None:
+        """在新一次批处理开始时重置统计，并强制重新应用策略"""
+        with self._lock:
+            self._presets_used = []
+            self._applied = None
+        # 每次批处理在新线程中进行，新线程的优先级为正常优先级
+        self._low_priority = False
+
+    def apply_pending(self) -> None:
+        """在处理线程中调用，若策略有变化则应用到当前线程"""
+        with self._lock:
+            target = (self._requested, self._pin_affinity)
+        if target == self._applied:
+            return
+
+        preset_key, pin_affinity = target
+        preset = RESOURCE_PRESETS[preset_key]
+        cpu_count = len(self._allowed_cpus)
+
+        self._apply_torch_threads(max(1, int(cpu_count * preset['thread_ratio'])), preset['interop_threads'])
+        self._apply_thread_priority(preset['low_priority'])
+        reserve_ui_core = pin_affinity and preset['low_priority'] and cpu_count > 1
+        self._apply_thread_affinity(self._allowed_cpus[1:] if reserve_ui_core else self._allowed_cpus)
+
+        self._applied = target
+        if not self._presets_used or self._presets_used[-1] != preset_key:
+            self._presets_used.append(preset_key)
+        logger.info(f"已应用资源策略: {preset['label']} (torch线程数: {self._torch_threads}, "
+                    f"低优先级: {self._low_priority}, 核心绑定: {reserve_ui_core})")
+
+    def _apply_torch_threads(self, num_threads: int, interop_threads: Optional[int]) -> None:
+        """设置 torch 的计算线程数和算子间线程数"""
+        try:
+            import torch
+        except ImportError:
+            return
+        try:
+            torch.set_num_threads(num_threads)
+            self._torch_threads = torch.get_num_threads()
+        except Exception as e:
+            logger.warning(f"设置torch线程数失败: {e}")
+        # 算子间线程数只能在首次并行计算前设置一次
+        if interop_threads and not self._interop_configured:
+            self._interop_configured = True
+            try:
+                torch.set_num_interop_threads(interop_threads)
+            except RuntimeError as e:
+                logger.debug(f"无法设置torch算子间线程数: {e}")
+
+    @staticmethod
+    def _can_restore_priority() -> bool:
+        """当前用户能否将 Linux 线程的 nice 值从 10 恢复为 0（需要 root 或 RLIMIT_NICE 不低于 20）"""
+        if os.geteuid() == 0:
+            return True
+        try:
+            import resource
+            soft, _ = resource.getrlimit(resource.RLIMIT_NICE)
+        except (ImportError, AttributeError, OSError):
+            return False
+        return soft == resource.RLIM_INFINITY or soft >= 20
+
+    def _apply_thread_priority(self, low_priority: bool) -> None:
+        """调整当前线程的优先级
+
+        Linux 下 nice 值按线程生效，普通用户调低优先级后无法再调回；此时不降低优先级，
+        以免切换回"最大吞吐"后处理线程仍停留在低优先级。
+        """
+        try:
+            if sys.platform == 'win32':
+                import ctypes
+                THREAD_PRIORITY_BELOW_NORMAL = -1
+                THREAD_PRIORITY_NORMAL = 0
+                priority = THREAD_PRIORITY_BELOW_NORMAL if low_priority else THREAD_PRIORITY_NORMAL
+                if not ctypes.windll.kernel32.SetThreadPriority(ctypes.windll.kernel32.GetCurrentThread(), priority):
+                    raise ctypes.WinError()
+            elif sys.platform.startswith('linux'):
+                if low_priority and not self._can_restore_priority():
+                    if not self._priority_notice_logged:
+                        self._priority_notice_logged = True
+                        logger.warning("当前用户降低线程优先级后无法恢复，交互优先策略不降低处理线程的优先级")
+                    low_priority = False
+                if low_priority != self._low_priority:
+                    os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10 if low_priority else 0)
+            else:
+                return
+            self._low_priority = low_priority
+        except (OSError, AttributeError) as e:
+            logger.warning(f"调整处理线程优先级失败: {e}")
+
+    @staticmethod
+    def _apply_thread_affinity(cpus: List[int]) -> None:
+        """将当前线程绑定到指定的CPU核心"""
+        if not cpus:
+            return
+        try:
+            if hasattr(os, 'sched_setaffinity'):
+                os.sched_setaffinity(0, cpus)
+            elif sys.platform == 'win32':
+                import ctypes
+                mask = 0
+                for cpu in cpus:
+                    mask |= 1 << cpu
+                ctypes.windll.kernel32.SetThreadAffinityMask(ctypes.windll.kernel32.GetCurrentThread(),
+                                                             ctypes.c_size_t(mask))
+        except (OSError, AttributeError) as e:
+            logger.debug(f"设置CPU核心绑定失败: {e}")
+
+    def report(self) -> Dict[str, Any]:
+        """生成本次运行的资源策略记录"""
+        with self._lock:
+            presets_used = list(self._presets_used)
+            current = self._requested
+        return {
+            'resource_preset': current,
+            'resource_presets_used': presets_used,
+            'torch_threads': self._torch_threads,
+            'low_thread_priority': self._low_priority,
+        }
@@ -0,0 +1,249 @@
+"""
+结果图片编码模块 - 在后台线程池中绘制并编码带检测框的结果图片
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable
+
+from PIL import Image
+
+from system.annotation_renderer import load_display_image, draw_boxes
+
+logger = logging.getLogger(__name__)
+
+# 结果图片的默认输出设置
+# max_dim: 最大边长（像素），0 表示保持原始尺寸
+# quality: JPEG 质量
+# skip_empty: 是否跳过未检测到物种的图片
+# lazy: 处理时只保存检测框，需要时再按需生成结果图片
+RESULT_IMAGE_DEFAULTS = {'max_dim': 0, 'quality': 95, 'skip_empty': False, 'lazy': False}
+
+
+def result_image_filename(image_name: str, species_name: str) -> str:
+    """结果图片的文件名"""
+    return f"{image_name}_result_{species_name}.jpg"
+
+
+def render_result_image(src_path: str, boxes: List[Dict[str, Any]], dst_path: str,
+                        max_dim: int = 0, quality: int = 95) -> None:
+    """绘制检测框并保存为JPEG结果图片
+
+    Args:
+        src_path: 原图路径
+        boxes: 检测框列表（原图坐标）
+        dst_path: 结果图片保存路径
+        max_dim: 最大边长，0 表示保持原始尺寸
+        quality: JPEG 质量
+    """
+    if max_dim and max_dim > 0:
+        img, original_size = load_display_image(src_path, max_dim, max_dim)
+    else:
+        with Image.open(src_path) as src:
+            img = src.convert('RGB')
+        original_size = img.size
+    scale = img.width / original_size[0] if original_size[0] else 1.0
+    draw_boxes(img, boxes, scale)
+    img.save(dst_path, 'JPEG', quality=int(quality))
+
+
+class ResultImageEncoder:
+    """结果图片编码线程池
+
+    推理循环只提交检测框，绘制和JPEG编码在后台线程中完成；
+    待处理任务数达到上限时 submit 会短暂阻塞，避免积压的任务占用过多内存。
+    cancel 后尚未开始编码的图片不再编码。
+    """
+
+    def __init__(self, max_workers: int = 2, max_dim: int = 0, quality: int = 95, skip_empty: bool = False,
+                 max_pending: int = 16, progress_callback: Optional[Callable[[int, int], None]] = None):
+        """初始化编码线程池
+
+        Args:
+            max_workers: 编码线程数
+            max_dim: 最大边长，0 表示保持原始尺寸
+            quality: JPEG 质量
+            skip_empty: 是否跳过未检测到物种的图片
+            max_pending: 允许积压的最大任务数
+            progress_callback: 每张图片编码完成（或失败、取消）后调用，参数为 (已完成数, 已提交数)
+        """
+        self.max_dim = max(0, int(max_dim))
+        self.quality = min(100, max(1, int(quality)))
+        self.skip_empty = skip_empty
+        self.progress_callback = progress_callback
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="result-encoder")
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._done = 0
+        self._encoded = 0
+        self._skipped = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._cancelled_files = []
+
+    def submit(self, src_path: str, image_name: str, boxes: List[Dict[str, Any]], species_name: str,
+               save_path: str) -> bool:
+        """提交一张结果图片
+
+        Args:
+            src_path: 原图路径
+            image_name: 原图文件名
+            boxes: 检测框列表（原图坐标）
+            species_name: 用于命名的物种名称
+            save_path: 结果保存路径（图片保存在其 result 子目录中）
+
+        Returns:
+            已提交返回 True，被跳过返回 False
+        """
+        if self.skip_empty and not boxes:
+            with self._lock:
+                self._skipped += 1
+            return False
+
+        result_path = os.path.join(save_path, "result")
+        os.makedirs(result_path, exist_ok=True)
+        dst_path = os.path.join(result_path, result_image_filename(image_name, species_name))
+
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._encode, src_path, image_name, list(boxes), dst_path)
+        except RuntimeError:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._submitted += 1
+        return True
+
+    def _encode(self, src_path: str, image_name: str, boxes: List[Dict[str, Any]], dst_path: str) -> None:
+        try:
+            if self._cancel_event.is_set():
+                with self._lock:
+                    self._cancelled += 1
+                    self._cancelled_files.append(image_name)
+                return
+            render_result_image(src_path, boxes, dst_path, self.max_dim, self.quality)
+            with self._lock:
+                self._encoded += 1
+        except Exception as e:
+            logger.error(f"保存检测结果图片失败 ({os.path.basename(src_path)}): {e}")
+            with self._lock:
+                self._failed += 1
+        finally:
+            self._slots.release()
+            with self._lock:
+                self._done += 1
+                done, submitted = self._done, self._submitted
+            if self.progress_callback:
+                try:
+                    self.progress_callback(done, submitted)
+                except Exception as e:
+                    logger.debug(f"结果图片进度回调失败: {e}")
+
+    def cancel(self) -> None:
+        """取消尚未开始编码的图片"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已取消"""
+        return self._cancel_event.is_set()
+
+    @property
+    def cancelled_files(self) -> List[str]:
+        """因取消而未编码的原图文件名列表"""
+        with self._lock:
+            return list(self._cancelled_files)
+
+    def close(self, wait: bool = True) -> Dict[str, Any]:
+        """关闭线程池
+
+        Args:
+            wait: 是否等待已提交的图片全部编码完成
+
+        Returns:
+            编码统计
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        """生成本次运行的结果图片统计"""
+        with self._lock:
+            return {
+                'result_images_encoded': self._encoded,
+                'result_images_skipped': self._skipped,
+                'result_images_failed': self._failed,
+                'result_images_cancelled': self._cancelled,
+            }
+
+
+def export_result_images(source_dir: str, detection_loader: Callable[[str], Optional[Dict[str, Any]]],
+                         save_path: str, image_names: List[str],
+                         name_resolver: Optional[Callable[[str], str]] = None,
+                         progress_callback: Optional[Callable[[int, int], None]] = None,
+                         stop_event: Optional[threading.Event] = None, **settings) -> Dict[str, Any]:
+    """根据已保存的检测框按需生成结果图片
+
+    Args:
+        source_dir: 原图目录
+        detection_loader: 根据原图文件名读取检测结果的函数，无结果时返回 None
+        save_path: 结果保存路径
+        image_names: 要生成结果图片的原图文件名列表
+        name_resolver: 将检测框中的物种名称转换为文件名中使用的名称
+        progress_callback: 进度回调，参数为 (已完成数, 总数)，每张图片编码完成或被跳过后调用
+        stop_event: 停止事件，被设置时不再提交新的图片，已提交但尚未开始编码的图片也不再编码
+        **settings: max_dim、quality、skip_empty 等输出设置
+
+    Returns:
+        编码统计
+    """
+    options = {**RESULT_IMAGE_DEFAULTS, **settings}
+    total = len(image_names)
+    lock = threading.Lock()
+    finished = 0
+
+    def advance(*_):
+        nonlocal finished
+        if stop_event is not None and stop_event.is_set():
+            encoder.cancel()
+        with lock:
+            finished += 1
+            done = finished
+        if progress_callback:
+            progress_callback(done, total)
+
+    encoder = ResultImageEncoder(max_workers=max(1, min(4, (os.cpu_count() or 2) - 1)),
+                                 max_dim=options['max_dim'], quality=options['quality'],
+                                 skip_empty=options['skip_empty'], progress_callback=advance)
+    missing = 0
+    try:
+        for image_name in image_names:
+            if stop_event is not None and stop_event.is_set():
+                break
+            src_path = os.path.join(source_dir, image_name)
+            try:
+                detection_info = detection_loader(image_name)
+            except Exception as e:
+                logger.error(f"读取检测结果失败 ({image_name}): {e}")
+                detection_info = None
+            if detection_info is None or not os.path.exists(src_path):
+                missing += 1
+                advance()
+                continue
+            boxes = detection_info.get('检测框', [])
+
+            species_name = boxes[0].get('物种', 'unknown') if boxes else 'unknown'
+            if name_resolver and boxes:
+                species_name = name_resolver(species_name)
+            if not encoder.submit(src_path, image_name, boxes, species_name, save_path):
+                advance()
+    finally:
+        if stop_event is not None and stop_event.is_set():
+            encoder.cancel()
+        report = encoder.close(wait=True)
+    report['result_images_missing'] = missing
+    return report
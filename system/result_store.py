@@ -0,0 +1,600 @@
+"""
+结果存储模块 - 以每个项目一个SQLite数据库的方式保存检测结果、校验结果和人工修正记录
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+
+from system.sidecar_codec import ClassTables, list_sidecars, read_sidecar, TABLE_FILE
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = "results.db"
+VALIDATION_FILE = "validation.json"
+SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS class_tables (
+    id INTEGER PRIMARY KEY,
+    names_map TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS images (
+    stem TEXT PRIMARY KEY,
+    file_name TEXT,
+    format TEXT,
+    capture_time TEXT,
+    time_source TEXT,
+    camera TEXT,
+    species TEXT,
+    counts TEXT,
+    min_conf TEXT,
+    detect_time TEXT,
+    remark TEXT,
+    class_table INTEGER REFERENCES class_tables(id),
+    boxes_cleared INTEGER NOT NULL DEFAULT 0,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS detections (
+    stem TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    class_id INTEGER,
+    species TEXT,
+    confidence REAL,
+    x1 REAL, y1 REAL, x2 REAL, y2 REAL,
+    PRIMARY KEY (stem, idx)
+);
+CREATE TABLE IF NOT EXISTS validation (
+    file_name TEXT PRIMARY KEY,
+    verdict INTEGER NOT NULL,
+    updated TEXT
+);
+CREATE TABLE IF NOT EXISTS corrections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stem TEXT NOT NULL,
+    field TEXT NOT NULL,
+    old_value TEXT,
+    new_value TEXT,
+    corrected_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_images_species ON images(species);
+CREATE INDEX IF NOT EXISTS idx_images_capture_time ON images(capture_time);
+CREATE INDEX IF NOT EXISTS idx_detections_species ON detections(species);
+CREATE INDEX IF NOT EXISTS idx_detections_confidence ON detections(confidence);
+CREATE INDEX IF NOT EXISTS idx_corrections_stem ON corrections(stem);
+"""
+
+# 检测结果中直接映射到 images 表列的字段
+_FIELD_COLUMNS = {
+    '物种名称': 'species',
+    '物种数量': 'counts',
+    '最低置信度': 'min_conf',
+    '检测时间': 'detect_time',
+    '备注': 'remark',
+}
+# 由其他表重建、不保存在 extra 中的字段
+_DERIVED_FIELDS = {'检测框', 'all_confidences', 'all_classes', 'names_map'}
+
+
+def _stem(file_name: str) -> str:
+    """检测结果以不含扩展名的文件名为键，与原先的JSON文件命名一致"""
+    return os.path.splitext(file_name)[0]
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+class ResultStore:
+    """项目结果存储
+
+    每个项目（temp/photo/<md5>/）一个 WAL 模式的 SQLite 数据库，包含图像、检测框、
+    校验结果和人工修正四张表。首次打开时自动迁移旧的JSON文件。
+    读取接口返回与原JSON文件相同结构的字典，便于各页面直接使用。
+    """
+
+    _instances: Dict[str, 'ResultStore'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, project_dir: str):
+        """打开项目数据库（一般通过 ResultStore.open 获取共享实例）
+
+        Args:
+            project_dir: 项目临时目录
+        """
+        self.project_dir = project_dir
+        self.db_path = os.path.join(project_dir, DB_NAME)
+        self._lock = threading.RLock()
+        os.makedirs(project_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._upgrade_schema()
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                           (str(SCHEMA_VERSION),))
+        self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', '0')")
+        self._class_table_ids: Dict[str, int] = {}
+        self._class_tables: Dict[int, Dict[str, str]] = {}
+        self.migrate_legacy_files()
+
+    def _upgrade_schema(self) -> None:
+        """为旧版本数据库补充新增的列"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(images)")}
+        if 'time_source' not in columns:
+            # 版本 2：记录拍摄时间的来源（exif、filename 或 mtime）
+            self._conn.execute("ALTER TABLE images ADD COLUMN time_source TEXT")
+        if 'camera' not in columns:
+            # 版本 3：记录相机厂商和型号，用于按相机计算独立探测（空字符串表示图片没有相机信息）
+            self._conn.execute("ALTER TABLE images ADD COLUMN camera TEXT")
+
+    @classmethod
+    def open(cls, project_dir: str) -> 'ResultStore':
+        """获取项目目录对应的共享存储实例"""
+        key = os.path.normcase(os.path.abspath(project_dir))
+        with cls._instances_lock:
+            store = cls._instances.get(key)
+            if store is None:
+                store = cls(project_dir)
+                cls._instances[key] = store
+            return store
+
+    @classmethod
+    def close_all(cls) -> None:
+        """关闭所有已打开的存储（删除缓存目录或退出程序前调用）"""
+        with cls._instances_lock:
+            stores = list(cls._instances.values())
+            cls._instances.clear()
+        for store in stores:
+            store.close()
+
+    @classmethod
+    def close_project(cls, project_dir: str) -> None:
+        """关闭指定项目目录的共享存储（删除该项目目录前调用）"""
+        key = os.path.normcase(os.path.abspath(project_dir))
+        with cls._instances_lock:
+            store = cls._instances.pop(key, None)
+        if store is not None:
+            store.close()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error as e:
+                logger.error(f"关闭结果数据库失败: {e}")
+
+    def revision(self) -> int:
+        """检测框数据的版本号，每次写入检测结果后递增，用于判断派生缓存是否过期"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+            return int(row[0]) if row else 0
+
+    def _bump_revision(self) -> None:
+        """在当前事务中递增版本号"""
+        self._conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'revision'")
+
+    # ------------------------------------------------------------------
+    # 检测结果
+    # ------------------------------------------------------------------
+    def _class_table_id(self, names_map: Dict) -> Optional[int]:
+        """获取类别表的ID，相同的类别表只保存一次"""
+        if not names_map:
+            return None
+        key = json.dumps({str(k): v for k, v in names_map.items()}, ensure_ascii=False, sort_keys=True)
+        table_id = self._class_table_ids.get(key)
+        if table_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO class_tables (names_map) VALUES (?)", (key,))
+            table_id = self._conn.execute("SELECT id FROM class_tables WHERE names_map = ?", (key,)).fetchone()[0]
+            self._class_table_ids[key] = table_id
+        return table_id
+
+    def _names_map(self, table_id: Optional[int]) -> Dict[str, str]:
+        if table_id is None:
+            return {}
+        names_map = self._class_tables.get(table_id)
+        if names_map is None:
+            row = self._conn.execute("SELECT names_map FROM class_tables WHERE id = ?", (table_id,)).fetchone()
+            names_map = json.loads(row[0]) if row else {}
+            self._class_tables[table_id] = names_map
+        return names_map
+
+    def _write_detection(self, stem: str, info: Dict[str, Any], file_name: Optional[str] = None,
+                         image_info: Optional[Dict[str, Any]] = None) -> None:
+        """在当前事务中写入一张图片的检测结果"""
+        boxes = info.get('检测框') or []
+        all_confidences = info.get('all_confidences') or []
+        all_classes = info.get('all_classes') or []
+        extra = {k: v for k, v in info.items()
+                 if k not in _FIELD_COLUMNS and k not in _DERIVED_FIELDS and k not in ('拍摄日期对象',)}
+
+        capture_time = fmt = time_source = camera = None
+        if image_info is not None:
+            fmt = image_info.get('格式', '')
+            date_taken = image_info.get('拍摄日期对象')
+            capture_time = date_taken.isoformat() if date_taken else None
+            time_source = image_info.get('时间来源') if date_taken else None
+            camera = image_info.get('相机') or ''
+            file_name = file_name or image_info.get('文件名')
+
+        existing = self._conn.execute("SELECT file_name, format, capture_time, time_source, camera FROM images "
+                                      "WHERE stem = ?", (stem,)).fetchone()
+        if existing and image_info is None:
+            # 重新检测单张图片时保留已记录的拍摄信息
+            file_name = file_name or existing[0]
+            fmt, capture_time, time_source, camera = existing[1], existing[2], existing[3], existing[4]
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO images (stem, file_name, format, capture_time, time_source, camera, species, "
+            "counts, min_conf, detect_time, remark, class_table, boxes_cleared, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (stem, file_name, fmt, capture_time, time_source, camera,
+             info.get('物种名称', ''), _text(info.get('物种数量', '')), _text(info.get('最低置信度', '')),
+             info.get('检测时间', ''), info.get('备注'),
+             self._class_table_id(info.get('names_map') or {}),
+             1 if all_classes and not boxes else 0,
+             json.dumps(extra, ensure_ascii=False) if extra else None))
+
+        self._conn.execute("DELETE FROM detections WHERE stem = ?", (stem,))
+        rows = []
+        for idx in range(max(len(boxes), len(all_classes))):
+            box = boxes[idx] if idx < len(boxes) else {}
+            bbox = box.get('边界框') or [None] * 4
+            class_id = int(all_classes[idx]) if idx < len(all_classes) else None
+            confidence = box.get('置信度', all_confidences[idx] if idx < len(all_confidences) else None)
+            rows.append((stem, idx, class_id, box.get('物种'), confidence, *bbox[:4]))
+        if rows:
+            self._conn.executemany(
+                "INSERT INTO detections (stem, idx, class_id, species, confidence, x1, y1, x2, y2) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def put_detection(self, file_name: str, info: Dict[str, Any],
+                      image_info: Optional[Dict[str, Any]] = None) -> None:
+        """保存一张图片的检测结果
+
+        Args:
+            file_name: 图片文件名
+            info: 检测信息（与原JSON文件结构相同）
+            image_info: 图像元数据（文件名、格式、拍摄日期对象、时间来源、相机），用于导出时免去重新读取EXIF
+        """
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                self._write_detection(_stem(file_name), info, file_name, image_info)
+                self._bump_revision()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _fetch_detections(self, stem: str) -> List[Tuple]:
+        return self._conn.execute(
+            "SELECT class_id, species, confidence, x1, y1, x2, y2 FROM detections WHERE stem = ? ORDER BY idx",
+            (stem,)).fetchall()
+
+    def _row_to_info(self, row: Tuple, detections: Optional[List[Tuple]] = None) -> Dict[str, Any]:
+        """将 images 表的一行及其检测框还原为原JSON文件的结构"""
+        (stem, species, counts, min_conf, detect_time, remark, class_table, boxes_cleared, extra) = row
+        info: Dict[str, Any] = {
+            '物种名称': species or '',
+            '物种数量': counts or '',
+            '最低置信度': min_conf,
+            '检测时间': detect_time or '',
+        }
+        if remark is not None:
+            info['备注'] = remark
+        if detections is None:
+            detections = self._fetch_detections(stem)
+        info['检测框'] = [] if boxes_cleared else [
+            {"物种": d[1], "置信度": d[2], "边界框": [d[3], d[4], d[5], d[6]]}
+            for d in detections if d[3] is not None
+        ]
+        info['all_confidences'] = [d[2] for d in detections if d[0] is not None]
+        info['all_classes'] = [float(d[0]) for d in detections if d[0] is not None]
+        info['names_map'] = self._names_map(class_table)
+        if extra:
+            info.update(json.loads(extra))
+        return info
+
+    _INFO_COLUMNS = "stem, species, counts, min_conf, detect_time, remark, class_table, boxes_cleared, extra"
+
+    def get_detection(self, file_name: str) -> Optional[Dict[str, Any]]:
+        """读取一张图片的检测结果，不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {self._INFO_COLUMNS} FROM images WHERE stem = ?",
+                                     (_stem(file_name),)).fetchone()
+            return self._row_to_info(row) if row else None
+
+    def has_detection(self, file_name: str) -> bool:
+        """图片是否已有检测结果"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM images WHERE stem = ?",
+                                      (_stem(file_name),)).fetchone() is not None
+
+    def stems(self) -> List[str]:
+        """所有已有检测结果的图片（不含扩展名）"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT stem FROM images ORDER BY stem")]
+
+    def image_count(self) -> int:
+        """已有检测结果的图片数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def iter_detections(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """遍历所有检测结果，返回 (不含扩展名的文件名, 检测信息)"""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {self._INFO_COLUMNS} FROM images ORDER BY stem").fetchall()
+            # 一次查询取出全部检测框，按图片分组
+            grouped: Dict[str, List[Tuple]] = {}
+            for det in self._conn.execute("SELECT stem, class_id, species, confidence, x1, y1, x2, y2 "
+                                          "FROM detections ORDER BY stem, idx"):
+                grouped.setdefault(det[0], []).append(det[1:])
+            results = [(row[0], self._row_to_info(row, grouped.get(row[0], []))) for row in rows]
+        return iter(results)
+
+    def detection_columns(self) -> List[Tuple]:
+        """按图片顺序读取全部模型原始检测，用于打包为列式数组
+
+        Returns:
+            每项为 (stem, class_table, class_id, confidence, x1, y1, x2, y2)，只包含有类别表的图片
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT i.stem, i.class_table, d.class_id, d.confidence, d.x1, d.y1, d.x2, d.y2 "
+                "FROM detections d JOIN images i ON i.stem = d.stem "
+                "WHERE d.class_id IS NOT NULL AND i.class_table IS NOT NULL "
+                "ORDER BY i.stem, d.idx").fetchall()
+
+    def class_tables(self) -> Dict[int, Dict[str, str]]:
+        """读取所有类别表 {类别表ID: names_map}"""
+        with self._lock:
+            return {row[0]: json.loads(row[1])
+                    for row in self._conn.execute("SELECT id, names_map FROM class_tables")}
+
+    def manual_species(self) -> Dict[str, str]:
+        """读取所有人工校验过的图片的物种名称 {不含扩展名的文件名: 物种名称}"""
+        with self._lock:
+            return {row[0]: row[1] or '' for row in
+                    self._conn.execute("SELECT stem, species FROM images WHERE min_conf = '人工校验'")}
+
+    def image_records(self) -> List[Dict[str, Any]]:
+        """读取所有图片记录的文件名、格式、拍摄时间及其来源和相机
+
+        Returns:
+            每项包含 stem、file_name、format、capture_time（datetime 或 None）、time_source、camera；
+            format 为 None 表示处理时未记录元数据，camera 为 None 表示处理时未记录相机（空字符串为没有相机信息）
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT stem, file_name, format, capture_time, time_source, camera FROM images "
+                                      "ORDER BY stem")
+            records = []
+            for stem, file_name, fmt, capture_time, time_source, camera in rows:
+                records.append({
+                    'stem': stem,
+                    'file_name': file_name,
+                    'format': fmt,
+                    'capture_time': datetime.fromisoformat(capture_time) if capture_time else None,
+                    'time_source': time_source,
+                    'camera': camera,
+                })
+            return records
+
+    def update_fields(self, file_name: str, fields: Dict[str, Any], clear_boxes: bool = False) -> Optional[Dict[str, Any]]:
+        """人工修正检测结果的字段，并在修正记录表中记录修改前后的值
+
+        Args:
+            file_name: 图片文件名
+            fields: 要修改的字段（物种名称、物种数量、最低置信度、检测时间、备注）
+            clear_boxes: 是否清空检测框
+
+        Returns:
+            修改后的检测信息，图片不存在时返回 None
+        """
+        stem = _stem(file_name)
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            row = self._conn.execute(f"SELECT {self._INFO_COLUMNS} FROM images WHERE stem = ?", (stem,)).fetchone()
+            if not row:
+                return None
+            old_info = self._row_to_info(row)
+            columns = {_FIELD_COLUMNS[f]: v for f, v in fields.items() if f in _FIELD_COLUMNS}
+            changes = [(stem, f, None if old_info.get(f) is None else str(old_info.get(f)), v, now)
+                       for f, v in fields.items() if f in _FIELD_COLUMNS and old_info.get(f) != v]
+            if clear_boxes and old_info.get('检测框'):
+                columns['boxes_cleared'] = 1
+                changes.append((stem, '检测框', json.dumps(old_info['检测框'], ensure_ascii=False), '[]', now))
+            if not columns:
+                return old_info
+            try:
+                self._conn.execute("BEGIN")
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                self._conn.execute(f"UPDATE images SET {assignments} WHERE stem = ?", (*columns.values(), stem))
+                self._conn.executemany(
+                    "INSERT INTO corrections (stem, field, old_value, new_value, corrected_at) VALUES (?, ?, ?, ?, ?)",
+                    changes)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            row = self._conn.execute(f"SELECT {self._INFO_COLUMNS} FROM images WHERE stem = ?", (stem,)).fetchone()
+            return self._row_to_info(row)
+
+    def begin_correction(self, file_name: str) -> Optional['CorrectionTransaction']:
+        """开始一张图片的人工修正事务，图片不存在时返回 None"""
+        info = self.get_detection(file_name)
+        return CorrectionTransaction(self, file_name, info) if info is not None else None
+
+    def corrections(self, file_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """读取人工修正记录
+
+        Args:
+            file_name: 只读取该图片的记录，为 None 时读取全部
+        """
+        query = "SELECT stem, field, old_value, new_value, corrected_at FROM corrections"
+        params: Tuple = ()
+        if file_name is not None:
+            query += " WHERE stem = ?"
+            params = (_stem(file_name),)
+        with self._lock:
+            return [dict(zip(('stem', 'field', 'old_value', 'new_value', 'corrected_at'), row))
+                    for row in self._conn.execute(query + " ORDER BY id", params)]
+
+    def corrections_since(self, last_id: int = 0) -> Tuple[int, List[str]]:
+        """读取指定修正记录之后被人工修正过的图片
+
+        Args:
+            last_id: 上次读取到的最后一条修正记录的ID
+
+        Returns:
+            (最后一条修正记录的ID, 按修正顺序排列且不重复的不含扩展名的文件名)
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT id, stem FROM corrections WHERE id > ? ORDER BY id",
+                                      (last_id,)).fetchall()
+        stems = list(dict.fromkeys(stem for _, stem in rows))
+        return (rows[-1][0] if rows else last_id), stems
+
+    # ------------------------------------------------------------------
+    # 校验结果
+    # ------------------------------------------------------------------
+    def load_validation(self) -> Dict[str, bool]:
+        """读取全部校验结果 {文件名: 是否正确}"""
+        with self._lock:
+            return {row[0]: bool(row[1]) for row in self._conn.execute("SELECT file_name, verdict FROM validation")}
+
+    def set_verdict(self, file_name: str, verdict: bool) -> None:
+        """保存一张图片的校验结果"""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO validation (file_name, verdict, updated) VALUES (?, ?, ?)",
+                               (file_name, int(bool(verdict)), datetime.now().isoformat(timespec='seconds')))
+
+    def apply_verdicts(self, verdicts: Dict[str, Optional[bool]]) -> None:
+        """在一个事务中批量写入校验结果，值为 None 的图片删除其校验结果"""
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("DELETE FROM validation WHERE file_name = ?",
+                                       [(f,) for f, v in verdicts.items() if v is None])
+                self._conn.executemany("INSERT OR REPLACE INTO validation (file_name, verdict, updated) VALUES (?, ?, ?)",
+                                       [(f, int(bool(v)), now) for f, v in verdicts.items() if v is not None])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def clear_validation(self) -> None:
+        """清除全部校验结果"""
+        with self._lock:
+            self._conn.execute("DELETE FROM validation")
+
+    # ------------------------------------------------------------------
+    # 旧文件迁移
+    # ------------------------------------------------------------------
+    def migrate_legacy_files(self) -> int:
+        """将目录中旧的逐图检测结果文件（JSON或紧凑格式）和 validation.json 导入数据库，导入成功后删除原文件
+
+        Returns:
+            导入的文件数
+        """
+        try:
+            names = os.listdir(self.project_dir)
+        except OSError:
+            return 0
+        sidecars = list_sidecars(self.project_dir)
+        migrated = []
+        tables = None
+
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                for name in sidecars:
+                    path = os.path.join(self.project_dir, name)
+                    try:
+                        if tables is None and not name.lower().endswith('.json'):
+                            tables = ClassTables.load(self.project_dir)
+                        info = read_sidecar(path, tables)
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"无法迁移检测结果文件 {name}: {e}")
+                        continue
+                    stem = _stem(name)
+                    if not self._conn.execute("SELECT 1 FROM images WHERE stem = ?", (stem,)).fetchone():
+                        self._write_detection(stem, info)
+                    migrated.append(path)
+                if migrated:
+                    self._bump_revision()
+                    if TABLE_FILE in names and len(migrated) == len(sidecars):
+                        migrated.append(os.path.join(self.project_dir, TABLE_FILE))
+
+                validation_path = os.path.join(self.project_dir, VALIDATION_FILE)
+                if VALIDATION_FILE in names:
+                    try:
+                        with open(validation_path, 'r', encoding='utf-8') as f:
+                            validation_data = json.load(f)
+                        now = datetime.now().isoformat(timespec='seconds')
+                        self._conn.executemany(
+                            "INSERT OR IGNORE INTO validation (file_name, verdict, updated) VALUES (?, ?, ?)",
+                            [(f, int(bool(v)), now) for f, v in validation_data.items()])
+                        migrated.append(validation_path)
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"无法迁移校验文件: {e}")
+                self._conn.execute("COMMIT")
+            except Exception as e:
+                self._conn.execute("ROLLBACK")
+                logger.error(f"迁移旧的检测结果文件失败: {e}")
+                return 0
+
+        for path in migrated:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"删除已迁移的文件失败 ({path}): {e}")
+        if migrated:
+            logger.info(f"已将 {len(migrated)} 个JSON文件迁移到 {self.db_path}")
+        return len(migrated)
+
+
+class CorrectionTransaction:
+    """一张图片的人工修正事务
+
+    多次修改（如先选物种、再选数量）只在内存中合并，info 随时反映合并后的结果，
+    提交时通过一次 update_fields 写入数据库，修正记录只保存最初值到最终值的变化。
+    """
+
+    def __init__(self, store: ResultStore, file_name: str, base_info: Dict[str, Any]):
+        self.store = store
+        self.file_name = file_name
+        self.fields: Dict[str, Any] = {}
+        self.clear_boxes = False
+        self.info = dict(base_info)
+
+    def set(self, fields: Dict[str, Any], clear_boxes: bool = False) -> Dict[str, Any]:
+        """合并字段修改，返回合并后的检测信息"""
+        self.fields.update(fields)
+        self.clear_boxes = self.clear_boxes or clear_boxes
+        self.info.update(fields)
+        if self.clear_boxes:
+            self.info['检测框'] = []
+        return self.info
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.fields) or self.clear_boxes
+
+    def commit(self) -> Optional[Dict[str, Any]]:
+        """将合并后的修改一次写入数据库，返回写入后的检测信息"""
+        if not self.pending:
+            return self.info
+        info = self.store.update_fields(self.file_name, self.fields, clear_boxes=self.clear_boxes)
+        self.fields, self.clear_boxes = {}, False
+        return info
@@ -174,4 +174,38 @@ class SettingsManager:
             return True
         except Exception as e:
             logger.error(f"保存置信度配置文件失败: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def save_run_metrics(self, metrics: Dict[str, Any], max_records: int = 50) -> bool:
+        """追加一次批处理运行的统计信息到run_metrics.json
+
+        Args:
+            metrics: 本次运行的统计信息
+            max_records: 最多保留的记录条数
+
+        Returns:
+            保存是否成功
+        """
+        metrics_file = os.path.join(self.settings_dir, "run_metrics.json")
+        records = self.load_run_metrics()
+        records.append(metrics)
+        try:
+            with open(metrics_file, 'w', encoding='utf-8') as f:
+                json.dump(records[-max_records:], f, ensure_ascii=False, indent=4)
+            return True
+        except Exception as e:
+            logger.error(f"保存运行统计失败: {e}")
+            return False
+
+    def load_run_metrics(self) -> List[Dict[str, Any]]:
+        """从run_metrics.json加载历史运行统计"""
+        metrics_file = os.path.join(self.settings_dir, "run_metrics.json")
+        if not os.path.exists(metrics_file):
+            return []
+        try:
+            with open(metrics_file, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            return records if isinstance(records, list) else []
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"加载运行统计失败: {e}")
+            return []
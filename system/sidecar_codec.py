@@ -0,0 +1,233 @@
+"""
+检测结果紧凑格式模块 - 以二进制格式保存逐图检测结果，类别表按文件夹共享，检测框以 float32 存储
+"""
+
+import os
+import sys
+import json
+import struct
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JSON_EXT = ".json"
+COMPACT_EXT = ".nrb"
+# 文件夹共享的类别表
+TABLE_FILE = "classes.nrt"
+# 不属于逐图检测结果的JSON文件
+RESERVED_JSON_FILES = {"validation.json", "folder_index.json"}
+
+_RECORD_MAGIC = b"NRB1"
+_TABLE_MAGIC = b"NRT1"
+# 魔数, 标志, 类别表序号, 检测数, 标量字段长度
+_RECORD_HEADER = struct.Struct("<4sBHII")
+_NO_TABLE = 0xFFFF
+_FLAG_BOXES = 0x01
+
+# 由二进制数组保存、不写入标量字段的键
+_ARRAY_FIELDS = ('检测框', 'all_confidences', 'all_classes', 'names_map')
+
+
+def _table_key(names_map: Dict) -> str:
+    return json.dumps({str(k): v for k, v in names_map.items()}, ensure_ascii=False, sort_keys=True)
+
+
+def _pack_floats(values: List[float]) -> bytes:
+    """打包为 float32，无法无损表示的数值抛出 ValueError"""
+    packed = struct.pack(f"<{len(values)}f", *values)
+    if list(struct.unpack(f"<{len(values)}f", packed)) != [float(v) for v in values]:
+        raise ValueError("数值无法无损保存为 float32")
+    return packed
+
+
+class ClassTables:
+    """文件夹共享的类别表（及模型信息），每个不同的 names_map 只保存一次"""
+
+    def __init__(self, tables: Optional[List[Dict[str, str]]] = None, meta: Optional[Dict[str, Any]] = None):
+        self.tables: List[Dict[str, str]] = tables or []
+        self.meta: Dict[str, Any] = meta or {}
+        self._ids = {_table_key(t): i for i, t in enumerate(self.tables)}
+
+    def table_id(self, names_map: Dict) -> int:
+        """获取类别表序号，新的类别表会被追加"""
+        key = _table_key(names_map)
+        table_id = self._ids.get(key)
+        if table_id is None:
+            if len(self.tables) >= _NO_TABLE:
+                raise ValueError("类别表数量超出上限")
+            table_id = len(self.tables)
+            self.tables.append(json.loads(key))
+            self._ids[key] = table_id
+        return table_id
+
+    @classmethod
+    def load(cls, folder: str) -> 'ClassTables':
+        """读取文件夹的类别表文件，不存在时返回空表"""
+        path = os.path.join(folder, TABLE_FILE)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != _TABLE_MAGIC:
+            raise ValueError(f"无效的类别表文件: {path}")
+        content = json.loads(data[4:].decode('utf-8'))
+        return cls(content.get('tables', []), content.get('meta', {}))
+
+    def save(self, folder: str) -> None:
+        """写入文件夹的类别表文件"""
+        path = os.path.join(folder, TABLE_FILE)
+        content = json.dumps({'tables': self.tables, 'meta': self.meta}, ensure_ascii=False,
+                             separators=(',', ':')).encode('utf-8')
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_TABLE_MAGIC + content)
+        os.replace(tmp_path, path)
+
+
+def encode_record(info: Dict[str, Any], tables: ClassTables) -> bytes:
+    """将一张图片的检测信息编码为紧凑格式
+
+    检测框的物种名称由类别表还原，因此要求与类别表一致；
+    无法无损编码的记录抛出 ValueError，调用方应保留原JSON。
+    """
+    boxes = info.get('检测框') or []
+    confidences = info.get('all_confidences') or []
+    classes = info.get('all_classes') or []
+    names_map = {str(k): v for k, v in (info.get('names_map') or {}).items()}
+    count = len(classes)
+    if len(confidences) != count or (boxes and len(boxes) != count):
+        raise ValueError("检测框数量与类别数量不一致")
+
+    class_ids = [int(c) for c in classes]
+    if any(c != float(cid) or not 0 <= cid <= 0xFFFF for c, cid in zip(classes, class_ids)):
+        raise ValueError("类别编号无效")
+    for box, cid, conf in zip(boxes, class_ids, confidences):
+        bbox = box.get('边界框') or []
+        if box.get('物种') != names_map.get(str(cid)) or box.get('置信度') != conf or len(bbox) != 4:
+            raise ValueError("检测框与类别表不一致")
+
+    scalars = {k: v for k, v in info.items() if k not in _ARRAY_FIELDS}
+    scalar_bytes = json.dumps(scalars, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    table_id = tables.table_id(names_map) if names_map else _NO_TABLE
+    flags = _FLAG_BOXES if boxes else 0
+
+    parts = [
+        _RECORD_HEADER.pack(_RECORD_MAGIC, flags, table_id, count, len(scalar_bytes)),
+        scalar_bytes,
+        struct.pack(f"<{count}H", *class_ids),
+        _pack_floats(confidences),
+    ]
+    if boxes:
+        parts.append(_pack_floats([v for box in boxes for v in box['边界框']]))
+    return b"".join(parts)
+
+
+def decode_record(data: bytes, tables: ClassTables) -> Dict[str, Any]:
+    """将紧凑格式解码为与原JSON文件结构相同的检测信息"""
+    magic, flags, table_id, count, scalar_len = _RECORD_HEADER.unpack_from(data, 0)
+    if magic != _RECORD_MAGIC:
+        raise ValueError("无效的检测结果文件")
+    offset = _RECORD_HEADER.size
+    info = json.loads(data[offset:offset + scalar_len].decode('utf-8'))
+    offset += scalar_len
+    class_ids = struct.unpack_from(f"<{count}H", data, offset)
+    offset += 2 * count
+    confidences = list(struct.unpack_from(f"<{count}f", data, offset))
+    offset += 4 * count
+
+    names_map = tables.tables[table_id] if table_id != _NO_TABLE else {}
+    boxes = []
+    if flags & _FLAG_BOXES:
+        coords = struct.unpack_from(f"<{4 * count}f", data, offset)
+        boxes = [{"物种": names_map.get(str(cid)), "置信度": conf, "边界框": list(coords[4 * i:4 * i + 4])}
+                 for i, (cid, conf) in enumerate(zip(class_ids, confidences))]
+
+    info['检测框'] = boxes
+    info['all_confidences'] = confidences
+    info['all_classes'] = [float(cid) for cid in class_ids]
+    info['names_map'] = dict(names_map)
+    return info
+
+
+def list_sidecars(folder: str) -> List[str]:
+    """列出文件夹中的逐图检测结果文件（JSON 和紧凑格式）"""
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return []
+    return [n for n in names
+            if (n.lower().endswith(JSON_EXT) and n not in RESERVED_JSON_FILES) or n.lower().endswith(COMPACT_EXT)]
+
+
+def read_sidecar(path: str, tables: Optional[ClassTables] = None) -> Dict[str, Any]:
+    """读取一个检测结果文件，自动识别JSON和紧凑格式
+
+    Args:
+        path: 文件路径
+        tables: 所在文件夹的类别表，读取紧凑格式时为 None 则自动加载
+    """
+    if path.lower().endswith(COMPACT_EXT):
+        if tables is None:
+            tables = ClassTables.load(os.path.dirname(path))
+        with open(path, 'rb') as f:
+            return decode_record(f.read(), tables)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_sidecar(folder: str, stem: str, info: Dict[str, Any], tables: ClassTables) -> str:
+    """以紧凑格式写入一张图片的检测结果（类别表需由调用方保存）
+
+    Returns:
+        写入的文件路径
+    """
+    path = os.path.join(folder, stem + COMPACT_EXT)
+    data = encode_record(info, tables)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def convert_folder(folder: str, remove_json: bool = True) -> Tuple[int, int]:
+    """将文件夹中的JSON检测结果转换为紧凑格式
+
+    Args:
+        folder: 检测结果所在文件夹
+        remove_json: 转换成功后是否删除原JSON文件
+
+    Returns:
+        (转换成功数, 保留为JSON的文件数)
+    """
+    tables = ClassTables.load(folder)
+    converted: List[str] = []
+    kept = 0
+    for name in list_sidecars(folder):
+        if not name.lower().endswith(JSON_EXT):
+            continue
+        path = os.path.join(folder, name)
+        try:
+            info = read_sidecar(path)
+            write_sidecar(folder, os.path.splitext(name)[0], info, tables)
+            converted.append(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"无法转换为紧凑格式，保留JSON ({name}): {e}")
+            kept += 1
+    if converted:
+        tables.save(folder)
+        if remove_json:
+            for path in converted:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"删除已转换的JSON文件失败 ({path}): {e}")
+    return len(converted), kept
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 2:
+        print("用法: python -m system.sidecar_codec <检测结果文件夹> [--keep-json]")
+        sys.exit(1)
+    done, skipped = convert_folder(sys.argv[1], remove_json='--keep-json' not in sys.argv[2:])
+    print(f"已转换 {done} 个文件，{skipped} 个文件保留为JSON")
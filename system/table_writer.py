@@ -0,0 +1,187 @@
+"""
+表格写入模块 - 逐行流式写入Excel或CSV，内存占用与行数无关，超出Excel行数上限时自动分表或分文件
+"""
+
+import os
+import csv
+import logging
+import threading
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Excel 工作表的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+# 工作表名称的最大长度
+_SHEET_TITLE_MAX = 31
+# CSV 每次批量写入的行数
+CSV_CHUNK_ROWS = 5000
+
+
+class TableWriter:
+    """流式表格写入器
+
+    Excel 使用 openpyxl 的只写模式，行在写入时即序列化到临时文件，不在内存中保留整个工作簿；
+    CSV 按批写入。每个工作表（或CSV文件）都带表头，数据行数达到 max_rows 后，Excel 新建
+    "名称_2"、"名称_3"… 工作表，CSV 新建 "文件名_2.csv"、"文件名_3.csv"… 文件。
+    """
+
+    def __init__(self, output_path: str, columns: Sequence[str], file_format: str = 'excel',
+                 sheet_name: str = "Sheet", max_rows: int = EXCEL_MAX_ROWS - 1):
+        """初始化写入器
+
+        Args:
+            output_path: 输出文件路径
+            columns: 表头
+            file_format: 文件格式 ('excel' 或 'csv')
+            sheet_name: Excel 工作表名称
+            max_rows: 每个工作表或CSV文件的最大数据行数
+
+        Raises:
+            ValueError: 文件格式不受支持
+        """
+        self.file_format = file_format.lower()
+        if self.file_format not in ('excel', 'csv'):
+            raise ValueError(f"不支持的文件格式: {file_format}")
+        self.output_path = output_path
+        self.columns = list(columns)
+        self.sheet_name = sheet_name
+        self.max_rows = max(int(max_rows), 1)
+        self.rows_written = 0
+        self.paths: List[str] = []
+
+        self._part_rows = 0
+        self._parts = 0
+        self._workbook = None
+        self._sheet = None
+        self._csv_file = None
+        self._csv_writer = None
+        self._buffer: List[Sequence[Any]] = []
+
+        if self.file_format == 'excel':
+            from openpyxl import Workbook
+            self._workbook = Workbook(write_only=True)
+        self._new_part()
+
+    def _part_path(self) -> str:
+        if self._parts == 1:
+            return self.output_path
+        base, ext = os.path.splitext(self.output_path)
+        return f"{base}_{self._parts}{ext}"
+
+    def _new_part(self) -> None:
+        """新建一个工作表或CSV文件并写入表头"""
+        self._parts += 1
+        self._part_rows = 0
+        if self._workbook is not None:
+            suffix = "" if self._parts == 1 else f"_{self._parts}"
+            title = self.sheet_name[:_SHEET_TITLE_MAX - len(suffix)] + suffix
+            self._sheet = self._workbook.create_sheet(title=title)
+            self._sheet.append(self.columns)
+        else:
+            self._flush_csv()
+            if self._csv_file is not None:
+                self._csv_file.close()
+            path = self._part_path()
+            # 使用 utf-8-sig 以便 Excel 正确显示中文
+            self._csv_file = open(path, 'w', newline='', encoding='utf-8-sig')
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_writer.writerow(self.columns)
+            self.paths.append(path)
+
+    def _flush_csv(self) -> None:
+        if self._buffer and self._csv_writer is not None:
+            self._csv_writer.writerows(self._buffer)
+            self._buffer = []
+
+    def write_row(self, values: Sequence[Any]) -> None:
+        """写入一行，值的顺序与表头一致"""
+        if self._part_rows >= self.max_rows:
+            if self._parts == 1:
+                logger.info(f"数据超过每个{'工作表' if self._workbook is not None else '文件'}"
+                            f" {self.max_rows} 行的上限，将分开写入")
+            self._new_part()
+        if self._workbook is not None:
+            self._sheet.append(list(values))
+        else:
+            self._buffer.append(values)
+            if len(self._buffer) >= CSV_CHUNK_ROWS:
+                self._flush_csv()
+        self._part_rows += 1
+        self.rows_written += 1
+
+    def close(self) -> List[str]:
+        """写入剩余数据并保存
+
+        Returns:
+            写入的文件路径
+        """
+        if self._workbook is not None:
+            self._workbook.save(self.output_path)
+            self._workbook = None
+            self.paths.append(self.output_path)
+        elif self._csv_file is not None:
+            self._flush_csv()
+            self._csv_file.close()
+            self._csv_file = None
+        return self.paths
+
+    def abort(self) -> None:
+        """放弃写入并删除已创建的CSV文件（Excel 文件在 close 时才写入磁盘）"""
+        self._workbook = None
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+        for path in self.paths:
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                logger.warning(f"删除未完成的导出文件失败: {e}")
+        self.paths = []
+
+    def __enter__(self) -> 'TableWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_table(rows: Iterable[Sequence[Any]], output_path: str, columns: Sequence[str], file_format: str = 'excel',
+                sheet_name: str = "Sheet", total: Optional[int] = None,
+                progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+                progress_interval: int = 5000, max_rows: int = EXCEL_MAX_ROWS - 1,
+                stop_event: Optional[threading.Event] = None) -> List[str]:
+    """逐行消费 rows 并写入表格
+
+    Args:
+        rows: 行的可迭代对象（可以是生成器），每行的值与 columns 顺序一致
+        output_path: 输出文件路径
+        columns: 表头
+        file_format: 文件格式 ('excel' 或 'csv')
+        sheet_name: Excel 工作表名称
+        total: 总行数（仅用于进度回调），未知时为 None
+        progress_callback: 进度回调 (已写入行数, 总行数)
+        progress_interval: 每写入多少行回调一次
+        max_rows: 每个工作表或CSV文件的最大数据行数
+        stop_event: 设置后停止写入并删除已创建的文件
+
+    Returns:
+        写入的文件路径，被停止时为空列表
+    """
+    with TableWriter(output_path, columns, file_format, sheet_name, max_rows) as writer:
+        for values in rows:
+            writer.write_row(values)
+            if writer.rows_written % progress_interval == 0:
+                if stop_event is not None and stop_event.is_set():
+                    logger.info(f"导出已停止，已删除未完成的文件: {output_path}")
+                    writer.abort()
+                    return []
+                if progress_callback:
+                    progress_callback(writer.rows_written, total)
+    if progress_callback:
+        progress_callback(writer.rows_written, total)
+    return writer.paths
@@ -0,0 +1,209 @@
+"""
+物种分类索引模块 - 将翻译表、物种按钮列表和鸟类名录编译为二进制缓存，按资源文件的修改时间自动失效
+"""
+
+import os
+import json
+import pickle
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Iterable, Tuple, FrozenSet
+
+from system.utils import resource_path
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = "taxonomy.cache"
+CACHE_VERSION = 1
+
+TRANSLATE_FILE = os.path.join("res", "translate.json")
+MODEL_FILE = os.path.join("res", "model.json")
+BIRD_LIST_FILE = os.path.join("res", "中国鸟类名录.xlsx")
+
+PERSONNEL_NAMES = frozenset({"人", "牧民", "人员"})
+
+# 物种类型
+TYPE_PERSONNEL = "人员"
+TYPE_BIRD = "鸟"
+TYPE_MAMMAL = "兽"
+
+
+def _source_signature(path: str) -> Optional[Tuple[int, int]]:
+    """返回资源文件的 (大小, 修改时间纳秒)，文件不存在时返回 None"""
+    try:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None
+
+
+def _compile_translations(path: str) -> Dict[str, str]:
+    if not os.path.exists(path):
+        logger.warning("翻译文件 res/translate.json 未找到，将使用原始英文名称。")
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"加载或解析翻译文件失败: {e}")
+        return {}
+
+
+def _compile_species_buttons(path: str) -> Optional[List[str]]:
+    """读取物种按钮列表，文件不存在时返回 None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return list(json.load(f).get("species", []))
+    except Exception as e:
+        logger.error(f"加载物种按钮列表失败: {e}")
+        return []
+
+
+def _compile_bird_list(path: str) -> Tuple[List[str], Dict[str, str]]:
+    """读取鸟类名录，返回 (中文名列表, {学名或英文名: 中文名})"""
+    if not os.path.exists(path):
+        return [], {}
+    try:
+        import pandas as pd
+        df_birds = pd.read_excel(path)
+    except Exception as e:
+        logger.error(f"加载鸟类名录失败: {e}")
+        return [], {}
+    # 学名、中文名、英文名分别在B、C、D列
+    if df_birds.shape[1] <= 2:
+        return [], {}
+    names = df_birds.iloc[:, 2].dropna().astype(str).tolist()
+    aliases: Dict[str, str] = {}
+    for column in (1, 3):
+        if df_birds.shape[1] <= column:
+            continue
+        for alias, name in zip(df_birds.iloc[:, column], df_birds.iloc[:, 2]):
+            if isinstance(alias, str) and isinstance(name, str) and alias.strip() and name.strip():
+                aliases.setdefault(alias.strip(), name.strip())
+    return names, aliases
+
+
+class Taxonomy:
+    """物种分类索引：模型类别名翻译、物种按钮列表、物种类型（人员、鸟、兽）和别名
+
+    由 res 目录中的 translate.json、model.json 和中国鸟类名录.xlsx 编译而成，编译结果以 pickle
+    保存在临时目录中。每次获取时只比较资源文件的大小和修改时间，资源未变化时直接使用内存中或
+    缓存文件中的索引，避免每次导出都用 openpyxl 读取鸟类名录。
+    """
+
+    _shared: Optional['Taxonomy'] = None
+    _cache_dir: Optional[str] = None
+    _lock = threading.Lock()
+
+    def __init__(self, data: Dict[str, Any], sources: Dict[str, Optional[Tuple[int, int]]]):
+        self.sources = sources
+        self.translations: Dict[str, str] = data['translations']
+        self.species_buttons: Optional[List[str]] = data['species_buttons']
+        self.bird_names: FrozenSet[str] = frozenset(data['bird_names'])
+        self.aliases: Dict[str, str] = data['aliases']
+        self._reverse_translation = {v: k for k, v in self.translations.items()}
+
+    @staticmethod
+    def _source_paths() -> Dict[str, str]:
+        return {
+            'translations': resource_path(TRANSLATE_FILE),
+            'species_buttons': resource_path(MODEL_FILE),
+            'bird_names': resource_path(BIRD_LIST_FILE),
+        }
+
+    @classmethod
+    def load(cls, cache_dir: Optional[str] = None) -> 'Taxonomy':
+        """获取共享的分类索引，资源文件变化时重新编译
+
+        Args:
+            cache_dir: 缓存文件所在目录，为 None 时使用上次指定的目录；从未指定时只在内存中保存
+
+        Returns:
+            分类索引
+        """
+        paths = cls._source_paths()
+        sources = {key: _source_signature(path) for key, path in paths.items()}
+        with cls._lock:
+            if cache_dir is not None:
+                cls._cache_dir = cache_dir
+            if cls._shared is not None and cls._shared.sources == sources:
+                return cls._shared
+            cache_path = os.path.join(cls._cache_dir, CACHE_FILE) if cls._cache_dir else None
+            data = cls._read_cache(cache_path, sources) if cache_path else None
+            if data is None:
+                data = cls._compile(paths)
+                if cache_path:
+                    cls._write_cache(cache_path, sources, data)
+            cls._shared = cls(data, sources)
+            return cls._shared
+
+    @staticmethod
+    def _compile(paths: Dict[str, str]) -> Dict[str, Any]:
+        translations = _compile_translations(paths['translations'])
+        bird_names, aliases = _compile_bird_list(paths['bird_names'])
+        # 模型类别名（包括下划线换成空格的写法）也是中文名的别名
+        for english_name, name in translations.items():
+            aliases[english_name] = name
+            aliases.setdefault(english_name.replace('_', ' '), name)
+        logger.info(f"物种分类索引已编译: {len(translations)} 个翻译, {len(bird_names)} 个鸟类名称")
+        return {
+            'translations': translations,
+            'species_buttons': _compile_species_buttons(paths['species_buttons']),
+            'bird_names': bird_names,
+            'aliases': aliases,
+        }
+
+    @staticmethod
+    def _read_cache(cache_path: str, sources: Dict[str, Optional[Tuple[int, int]]]) -> Optional[Dict[str, Any]]:
+        """读取缓存文件，版本或资源文件签名不一致时返回 None"""
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('version') != CACHE_VERSION or cached.get('sources') != sources:
+                return None
+            return cached['data']
+        except Exception as e:
+            logger.warning(f"读取物种分类缓存失败，将重新编译: {e}")
+            return None
+
+    @staticmethod
+    def _write_cache(cache_path: str, sources: Dict[str, Optional[Tuple[int, int]]], data: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'version': CACHE_VERSION, 'sources': sources, 'data': data}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"保存物种分类缓存失败: {e}")
+
+    def translate(self, name: str) -> str:
+        """将模型类别名翻译为中文名，没有翻译时返回原名"""
+        return self.translations.get(name, name)
+
+    def original_name(self, translated_name: str) -> str:
+        """将翻译后的物种名称还原为模型中的原始名称"""
+        return self._reverse_translation.get(translated_name, translated_name)
+
+    def canonical(self, name: str) -> str:
+        """将学名、英文名等别名统一为中文名"""
+        name = name.strip()
+        return self.aliases.get(name, name)
+
+    def species_type(self, name: str) -> str:
+        """物种类型：人员、鸟或兽"""
+        name = self.canonical(name)
+        if name in PERSONNEL_NAMES:
+            return TYPE_PERSONNEL
+        if name in self.bird_names:
+            return TYPE_BIRD
+        return TYPE_MAMMAL
+
+    def species_types(self, names: Iterable[str]) -> str:
+        """一组物种去重、排序后的类型，以逗号连接"""
+        return ','.join(sorted({self.species_type(name) for name in names}))
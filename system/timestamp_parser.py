@@ -0,0 +1,180 @@
+"""
+时间戳解析模块 - 按相机学习EXIF时间格式并以固定位置切片快速解析，缺少EXIF时间时从文件名或修改时间推断
+"""
+
+import os
+import re
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from system.config import DATE_FORMATS
+
+logger = logging.getLogger(__name__)
+
+# 拍摄时间的来源
+TIME_SOURCE_EXIF = "exif"
+TIME_SOURCE_FILENAME = "filename"
+TIME_SOURCE_MTIME = "mtime"
+
+TIME_SOURCE_LABELS = {
+    TIME_SOURCE_EXIF: "EXIF",
+    TIME_SOURCE_FILENAME: "文件名",
+    TIME_SOURCE_MTIME: "修改时间",
+}
+
+# 文件名中的时间，如 IMG_20230405_123456、2023-04-05 12-34-56、20230405123456
+_FILENAME_PATTERN = re.compile(
+    r"(?<!\d)((?:19|20)\d{2})[-_.]?(\d{2})[-_.]?(\d{2})[-_T ]?(\d{2})[-_.:]?(\d{2})[-_.:]?(\d{2})(?!\d)")
+# 可编译为固定位置切片的格式：年 分隔符 月/日 分隔符 日/月 时:分:秒
+_FIXED_PATTERN = re.compile(r"%Y(.)%([md])\1%([md]) %H:%M:%S")
+
+
+class _CompiledFormat:
+    """一种时间格式，可行时以固定位置切片解析，否则使用 strptime"""
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        match = _FIXED_PATTERN.fullmatch(fmt)
+        self.fixed = match is not None and match.group(2) != match.group(3)
+        if self.fixed:
+            self.sep = match.group(1)
+            self.day_first = match.group(2) == 'd'
+
+    def parse(self, value: str) -> Optional[datetime]:
+        """解析失败时返回 None"""
+        if not self.fixed or not self._fixed_shape(value):
+            # 不符合固定位置的值（如月份只有一位）仍按 strptime 的宽松规则解析
+            try:
+                return datetime.strptime(value, self.fmt)
+            except ValueError:
+                return None
+        first, second = int(value[5:7]), int(value[8:10])
+        month, day = (second, first) if self.day_first else (first, second)
+        try:
+            return datetime(int(value[0:4]), month, day, int(value[11:13]), int(value[14:16]), int(value[17:19]))
+        except ValueError:
+            return None
+
+    def _fixed_shape(self, value: str) -> bool:
+        if (len(value) != 19 or value[4] != self.sep or value[7] != self.sep or value[10] != ' '
+                or value[13] != ':' or value[16] != ':'):
+            return False
+        digits = value[0:4] + value[5:7] + value[8:10] + value[11:13] + value[14:16] + value[17:19]
+        return digits.isascii() and digits.isdigit()
+
+
+class TimestampParser:
+    """按相机学习时间格式的解析器
+
+    每个键（如 文件夹+相机厂商+型号）的格式由样本确定：选择能解析最多样本的格式，
+    并列时按 DATE_FORMATS 的顺序优先。只有一个格式能解析全部样本（如日大于12可区分年月日与年日月），
+    或样本达到 sample_size 时固定下来，之后直接使用该格式的快速解析。
+    """
+
+    def __init__(self, formats: Iterable[str] = DATE_FORMATS, sample_size: int = 20):
+        self._formats = [_CompiledFormat(fmt) for fmt in formats]
+        self.sample_size = sample_size
+        self._learned: Dict[Hashable, _CompiledFormat] = {}
+        self._samples: Dict[Hashable, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def _detect(self, samples: List[str]) -> Tuple[Optional[_CompiledFormat], bool]:
+        """返回 (最佳格式, 是否唯一)"""
+        counts = [sum(1 for s in samples if fmt.parse(s) is not None) for fmt in self._formats]
+        best = max(counts, default=0)
+        if best == 0:
+            return None, False
+        return self._formats[counts.index(best)], counts.count(best) == 1
+
+    def learn(self, key: Hashable, samples: Iterable[str]) -> Optional[str]:
+        """根据一批样本确定该键的格式并固定下来
+
+        Returns:
+            确定的格式，没有任何格式能解析样本时返回 None
+        """
+        samples = [s.strip() for s in samples if s]
+        fmt, _ = self._detect(samples)
+        if fmt is not None:
+            with self._lock:
+                self._learned[key] = fmt
+                self._samples.pop(key, None)
+            logger.debug(f"时间格式已确定 {key}: {fmt.fmt}")
+        return fmt.fmt if fmt else None
+
+    def learned_format(self, key: Hashable) -> Optional[str]:
+        fmt = self._learned.get(key)
+        return fmt.fmt if fmt else None
+
+    def parse(self, value: str, key: Hashable = None) -> Optional[datetime]:
+        """解析时间字符串，格式尚未确定时先把该值加入样本
+
+        Returns:
+            日期时间对象，所有格式都无法解析时返回 None
+        """
+        value = value.strip()
+        with self._lock:
+            fmt = self._learned.get(key)
+            if fmt is None:
+                samples = self._samples.setdefault(key, [])
+                if len(samples) < self.sample_size:
+                    samples.append(value)
+                fmt, unique = self._detect(samples)
+                if fmt is not None and (unique or len(samples) >= self.sample_size):
+                    self._learned[key] = fmt
+                    self._samples.pop(key, None)
+        if fmt is not None:
+            result = fmt.parse(value)
+            if result is not None:
+                return result
+        # 个别值与该相机的格式不符时逐个尝试
+        for candidate in self._formats:
+            if candidate is not fmt:
+                result = candidate.parse(value)
+                if result is not None:
+                    return result
+        return None
+
+
+def timestamp_from_filename(filename: str) -> Optional[datetime]:
+    """从文件名中提取时间，没有可识别的时间时返回 None"""
+    for match in _FILENAME_PATTERN.finditer(os.path.splitext(filename)[0]):
+        try:
+            return datetime(*(int(g) for g in match.groups()))
+        except ValueError:
+            continue
+    return None
+
+
+def timestamp_from_mtime(path: str, mtime_ns: Optional[int] = None) -> Optional[datetime]:
+    """使用文件修改时间，文件不存在时返回 None"""
+    try:
+        if mtime_ns is None:
+            mtime_ns = os.stat(path).st_mtime_ns
+        return datetime.fromtimestamp(mtime_ns / 1e9).replace(microsecond=0)
+    except (OSError, ValueError, OverflowError):
+        return None
+
+
+def resolve_timestamp(exif_value: Optional[str], path: str, parser: TimestampParser, key: Hashable = None,
+                      mtime_ns: Optional[int] = None) -> Tuple[Optional[datetime], Optional[str]]:
+    """确定图片的拍摄时间及其来源
+
+    依次使用 EXIF 时间、文件名中的时间、文件修改时间。
+
+    Returns:
+        (拍摄时间, 来源)，均无法获得时为 (None, None)
+    """
+    if exif_value:
+        date_taken = parser.parse(exif_value, key)
+        if date_taken is not None:
+            return date_taken, TIME_SOURCE_EXIF
+        logger.warning(f"无法解析图片 '{os.path.basename(path)}' 的日期格式: '{exif_value}'")
+    date_taken = timestamp_from_filename(os.path.basename(path))
+    if date_taken is not None:
+        return date_taken, TIME_SOURCE_FILENAME
+    date_taken = timestamp_from_mtime(path, mtime_ns)
+    if date_taken is not None:
+        return date_taken, TIME_SOURCE_MTIME
+    return None, None
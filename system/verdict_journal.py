@@ -0,0 +1,178 @@
+"""
+校验日志模块 - 校验结果先追加写入日志文件，由后台线程批量落盘，定期合并到结果数据库
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Dict, Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE = "validation.journal"
+
+
+class VerdictJournal:
+    """校验结果日志
+
+    每次标记只在内存中排队，后台线程按批追加到 validation.journal（每行一条记录），
+    日志累积到一定条数后合并到结果数据库并清空日志。关闭时写入剩余记录、fsync 并合并，
+    程序异常退出后再次打开时会重放日志中的记录。
+    """
+
+    def __init__(self, store, flush_interval: float = 0.5, compact_threshold: int = 1000):
+        """初始化校验日志
+
+        Args:
+            store: 项目的结果数据库（ResultStore）
+            flush_interval: 后台批量写入日志的间隔（秒）
+            compact_threshold: 日志累积多少条不同图片的记录后合并到数据库
+        """
+        self.store = store
+        self.path = os.path.join(store.project_dir, JOURNAL_FILE)
+        self.flush_interval = flush_interval
+        self.compact_threshold = compact_threshold
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._pending: List[Tuple[str, Optional[bool]]] = []
+        # 已写入日志、尚未合并到数据库的记录
+        self._journaled: Dict[str, Optional[bool]] = {}
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> Dict[str, bool]:
+        """读取全部校验结果（数据库中的结果加上日志中尚未合并的记录），并启动后台写入线程"""
+        verdicts = self.store.load_validation()
+        replayed = self._replay()
+        for file_name, verdict in replayed.items():
+            if verdict is None:
+                verdicts.pop(file_name, None)
+            else:
+                verdicts[file_name] = verdict
+        if replayed:
+            logger.info(f"已从校验日志恢复 {len(replayed)} 条记录")
+            with self._io_lock:
+                self._journaled.update(replayed)
+                self._compact()
+
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True, name="verdict-journal")
+        self._thread.start()
+        return verdicts
+
+    def _replay(self) -> Dict[str, Optional[bool]]:
+        """读取日志中的记录，忽略异常退出时写了一半的最后一行"""
+        records: Dict[str, Optional[bool]] = {}
+        if not os.path.exists(self.path):
+            return records
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        records[entry['f']] = entry['v']
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError as e:
+            logger.error(f"读取校验日志失败: {e}")
+        return records
+
+    def record(self, file_name: str, verdict: Optional[bool]) -> None:
+        """记录一张图片的校验结果（None 表示撤销），立即返回"""
+        with self._cond:
+            if self._closed:
+                logger.warning(f"校验日志已关闭，未记录: {file_name}")
+                return
+            self._pending.append((file_name, verdict))
+            self._cond.notify()
+
+    def flush(self, sync: bool = False) -> None:
+        """将排队的记录写入日志
+
+        Args:
+            sync: 是否调用 fsync 确保写入磁盘
+        """
+        with self._cond:
+            batch, self._pending = self._pending, []
+        with self._io_lock:
+            self._append(batch, sync)
+            if len(self._journaled) >= self.compact_threshold:
+                self._compact()
+
+    def _append(self, batch: List[Tuple[str, Optional[bool]]], sync: bool = False) -> None:
+        if not batch and not sync:
+            return
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for file_name, verdict in batch:
+                    f.write(json.dumps({'f': file_name, 'v': verdict}, ensure_ascii=False) + "\n")
+                f.flush()
+                if sync:
+                    os.fsync(f.fileno())
+        except OSError as e:
+            logger.error(f"写入校验日志失败: {e}")
+            # 日志写入失败时直接写入数据库，避免丢失校验结果
+            for file_name, verdict in batch:
+                self._journaled[file_name] = verdict
+            self._compact()
+            return
+        for file_name, verdict in batch:
+            self._journaled[file_name] = verdict
+
+    def _compact(self) -> None:
+        """将日志中的记录合并到数据库并清空日志（调用方需持有 _io_lock）"""
+        if not self._journaled:
+            return
+        try:
+            self.store.apply_verdicts(self._journaled)
+        except Exception as e:
+            logger.error(f"合并校验日志失败: {e}")
+            return
+        self._journaled.clear()
+        try:
+            with open(self.path, 'w', encoding='utf-8'):
+                pass
+        except OSError as e:
+            logger.error(f"清空校验日志失败: {e}")
+
+    def _writer_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            # 等待一个间隔，把连续的标记合并为一批写入
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed, timeout=self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def clear(self) -> None:
+        """清除全部校验结果（包括日志和数据库）"""
+        with self._cond:
+            self._pending.clear()
+        with self._io_lock:
+            self._journaled.clear()
+            try:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+            except OSError as e:
+                logger.error(f"删除校验日志失败: {e}")
+            self.store.clear_validation()
+
+    def close(self) -> None:
+        """停止后台线程，写入剩余记录并 fsync，然后合并到数据库"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        with self._cond:
+            batch, self._pending = self._pending, []
+        with self._io_lock:
+            self._append(batch, sync=True)
+            self._compact()